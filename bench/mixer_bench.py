@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NumPy dubbed-track mixer vs the previous pydub overlay loop.
+
+Generates a synthetic 48 kHz stereo track and N short mono TTS clips, then
+times audio_mixer.create_dubbed_audio against the pydub implementation it
+replaced. Peak memory is measured with tracemalloc.
+
+Usage:
+    python bench/mixer_bench.py [--duration 3600] [--segments 1000] [--skip-pydub]
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "python"))
+
+from audio_mixer import create_dubbed_audio  # noqa: E402
+
+SAMPLE_RATE = 48000
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    """Write int16 (frames, channels) samples."""
+    with wave.open(path, "wb") as out:
+        out.setnchannels(samples.shape[1])
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(samples.astype("<i2").tobytes())
+
+
+def make_fixtures(directory: str, duration: float, segments: int, seed: int = 0):
+    """
+    Create the background track and TTS clips.
+
+    Returns:
+        (track_path, subtitles)
+    """
+    rng = np.random.default_rng(seed)
+
+    track_path = os.path.join(directory, "track.wav")
+    frames = int(duration * SAMPLE_RATE)
+
+    # Written in chunks so fixture generation itself stays small
+    with wave.open(track_path, "wb") as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        chunk = SAMPLE_RATE * 60
+        for pos in range(0, frames, chunk):
+            n = min(chunk, frames - pos)
+            noise = rng.normal(0, 3000, size=(n, 2)).clip(-32768, 32767)
+            out.writeframes(noise.astype("<i2").tobytes())
+
+    subtitles = []
+    slot = duration / segments
+    for i in range(segments):
+        start = i * slot
+        length = min(slot * 0.9, 1.0 + rng.random() * 3.0)
+        t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+        tone = 0.3 * np.sin(2 * math.pi * (180 + 40 * rng.random()) * t)
+        clip_path = os.path.join(directory, f"tts_{i + 1}.wav")
+        write_wav(clip_path, (tone * 32767).reshape(-1, 1))
+        subtitles.append({
+            "id": i + 1,
+            "start": start,
+            "end": start + length,
+            "audioFile": clip_path
+        })
+
+    return track_path, subtitles
+
+
+def create_dubbed_audio_pydub(
+    original_audio: str,
+    subtitles_with_audio: list,
+    output_path: str,
+    original_volume: float = 0.15,
+    tts_volume: float = 1.0
+) -> bool:
+    """The overlay loop create_dubbed_audio used before the NumPy mixer."""
+    from pydub import AudioSegment
+
+    original = AudioSegment.from_wav(original_audio)
+    original_db_change = 20 * math.log10(original_volume) if original_volume > 0 else -60
+    output = original + original_db_change
+
+    for sub in subtitles_with_audio:
+        audio_file = sub.get("audioFile")
+        if not audio_file or not os.path.exists(audio_file):
+            continue
+
+        start_ms = int(sub["start"] * 1000)
+        duration_ms = int(sub["end"] * 1000) - start_ms
+        tts = AudioSegment.from_wav(audio_file)
+        if len(tts) > duration_ms * 1.2:
+            tts = tts[:duration_ms]
+        if tts_volume != 1.0:
+            tts = tts + (20 * math.log10(tts_volume) if tts_volume > 0 else -60)
+        output = output.overlay(tts, position=start_ms)
+
+    output.export(output_path, format="wav")
+    return True
+
+
+def measure(fn, *args) -> dict:
+    """Run fn and return wall time and tracemalloc peak."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    ok = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ok": bool(ok), "seconds": round(elapsed, 3), "peak_mb": round(peak / 2**20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3600, help="Track length in seconds")
+    parser.add_argument("--segments", type=int, default=1000, help="Number of TTS clips")
+    parser.add_argument("--skip-pydub", action="store_true", help="Only run the NumPy mixer")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="subplayer_mixbench_")
+    try:
+        print(f"Generating {args.duration:.0f}s track with {args.segments} clips...", file=sys.stderr)
+        track, subtitles = make_fixtures(directory, args.duration, args.segments)
+
+        report = {"duration": args.duration, "segments": args.segments}
+        report["numpy"] = measure(
+            create_dubbed_audio, track, subtitles, os.path.join(directory, "numpy.wav")
+        )
+        if not args.skip_pydub:
+            report["pydub"] = measure(
+                create_dubbed_audio_pydub, track, subtitles, os.path.join(directory, "pydub.wav")
+            )
+            report["speedup"] = round(report["pydub"]["seconds"] / max(report["numpy"]["seconds"], 1e-9), 1)
+
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end processing pipeline.
+
+Generates a synthetic 48 kHz stereo recording that alternates speech-like
+phrases (voiced harmonics with formants and syllable envelopes, or loops of
+a real recording given with --speech) with silence, plus an English script
+of one sentence per phrase. Then, each in a fresh process with an empty
+cache directory (models must be prefetched, see python/model_store.py):
+
+  stages  times decode, transcribe, translate (the script), TTS (the
+          translations) and mix (incremental dubbing) one after another
+  full    runs process_video_streaming on the file and records every
+          protocol message it sends
+
+The report (JSON on stdout) has throughput, latency percentiles, time to
+first subtitle and peak RSS per run. With --baseline it is compared with an
+earlier report and the exit status is 1 if anything got slower (or bigger)
+by more than --tolerance.
+
+Usage:
+    python bench/pipeline_bench.py [--duration 300] [--no-tts] [--runs stages full]
+    python bench/pipeline_bench.py --save-baseline bench/baseline.json
+    python bench/pipeline_bench.py --baseline bench/baseline.json [--tolerance 0.2]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from importlib import metadata
+
+import numpy as np
+
+PYTHON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python")
+sys.path.insert(0, PYTHON_DIR)
+
+SAMPLE_RATE = 48000
+
+# Sentence parts combined into a script of distinct lines, so neither the
+# translation memo nor the TTS cache turns repeats into free hits
+SUBJECTS = ["The old captain", "My neighbour", "Our team", "The little girl", "A stranger", "The professor"]
+VERBS = ["found", "painted", "forgot", "repaired", "described", "carried"]
+OBJECTS = [
+    "a letter from the city", "the broken radio", "an empty box near the river",
+    "the map of the island", "a very strange picture", "the keys to the garage"
+]
+ENDINGS = ["yesterday", "before dinner", "in the rain", "without a word", "last summer", "again"]
+
+# Library versions recorded with every report (upgrades are what we compare)
+PACKAGES = ["faster-whisper", "ctranslate2", "argostranslate", "torch", "numpy"]
+
+
+def make_script(phrases: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(ENDINGS)}."
+        for _ in range(phrases)
+    ]
+
+
+def synthetic_phrase(length: float, rng) -> np.ndarray:
+    """Mono float32 phrase: a pitch contour with vowel formants, 4-5 syllables per second."""
+    t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 60 * rng.random() + 20 * np.sin(2 * math.pi * 0.7 * t)
+    phase = 2 * math.pi * np.cumsum(pitch) / SAMPLE_RATE
+
+    formants = rng.choice([(700, 1200), (400, 2000), (300, 900), (500, 1700)])
+    signal = np.zeros_like(t)
+    for harmonic in range(1, 25):
+        frequency = pitch * harmonic
+        gain = sum(np.exp(-((frequency - f) / 120.0) ** 2) for f in formants) + 0.05
+        signal += gain * np.sin(harmonic * phase) / harmonic
+
+    syllables = 0.5 - 0.5 * np.cos(2 * math.pi * (4 + rng.random()) * t)
+    signal *= syllables
+    return (0.3 * signal / max(np.abs(signal).max(), 1e-9)).astype(np.float32)
+
+
+def read_speech(path: str) -> np.ndarray:
+    """Mono float32 samples of a 16-bit WAV, resampled to SAMPLE_RATE."""
+    with wave.open(path, "rb") as f:
+        rate = f.getframerate()
+        channels = f.getnchannels()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+    mono = samples.reshape(-1, channels).mean(axis=1) / 32768
+    if rate != SAMPLE_RATE:
+        positions = np.linspace(0, len(mono) - 1, int(len(mono) * SAMPLE_RATE / rate))
+        mono = np.interp(positions, np.arange(len(mono)), mono)
+    return mono.astype(np.float32)
+
+
+def make_fixture(directory: str, duration: float, speech_path: str = None, seed: int = 0) -> dict:
+    """
+    Write fixture.wav (stereo speech/silence) and fixture.json (its phrases).
+
+    Returns:
+        {"audio": path, "duration": seconds, "phrases": [{"start", "end", "text"}]}
+    """
+    rng = np.random.default_rng(seed)
+    speech = read_speech(speech_path) if speech_path else None
+
+    phrases = []
+    position = 0.5
+    while True:
+        length = 1.5 + 2.5 * rng.random()
+        if position + length > duration:
+            break
+        phrases.append((position, position + length))
+        position += length + 0.4 + 1.2 * rng.random()
+
+    audio_path = os.path.join(directory, "fixture.wav")
+    frames = int(duration * SAMPLE_RATE)
+    with wave.open(audio_path, "wb") as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        written = 0
+        speech_pos = 0
+        for start, end in phrases:
+            first = int(start * SAMPLE_RATE)
+            out.writeframes(bytes(4 * (first - written)))
+            if speech is not None:
+                n = int((end - start) * SAMPLE_RATE)
+                take = np.resize(np.roll(speech, -speech_pos), n)
+                speech_pos = (speech_pos + n) % len(speech)
+            else:
+                take = synthetic_phrase(end - start, rng)
+            pcm = (np.clip(take, -1, 1) * 32767).astype("<i2")
+            out.writeframes(np.repeat(pcm[:, None], 2, axis=1).tobytes())
+            written = first + len(pcm)
+        out.writeframes(bytes(4 * max(0, frames - written)))
+
+    script = make_script(len(phrases), seed)
+    fixture = {
+        "audio": audio_path,
+        "duration": duration,
+        "speech": os.path.basename(speech_path) if speech_path else "synthetic",
+        "phrases": [
+            {"start": round(start, 3), "end": round(end, 3), "text": text}
+            for (start, end), text in zip(phrases, script)
+        ]
+    }
+    with open(os.path.join(directory, "fixture.json"), "w", encoding="utf-8") as f:
+        json.dump(fixture, f, indent=2)
+    return fixture
+
+
+def percentiles(values: list) -> dict:
+    """Nearest-rank p50/p90/p99 and max (seconds)."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return round(ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))], 4)
+
+    return {"count": len(ordered), "p50": rank(50), "p90": rank(90), "p99": rank(99), "max": round(ordered[-1], 4)}
+
+
+def timed_stream(iterable):
+    """Yield (item, seconds since the previous item or the start)."""
+    last = time.perf_counter()
+    for item in iterable:
+        now = time.perf_counter()
+        yield item, now - last
+        last = now
+
+
+def stage_report(seconds: float, audio_seconds: float, latencies: list, **extra) -> dict:
+    from metrics import peak_rss_mb
+
+    return {
+        "seconds": round(seconds, 3),
+        "audio_seconds": round(audio_seconds, 3),
+        "speed": round(audio_seconds / seconds, 2) if seconds else None,
+        "latency": percentiles(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+        **extra
+    }
+
+
+def run_stages(fixture: dict, mode: str, enable_tts: bool) -> dict:
+    """Time every stage on its own, in pipeline order."""
+    from audio_decode import decode_media
+    from transcribe import transcribe_audio_streaming, preload_model as preload_whisper
+    from translate import translate_batch, ensure_translation_ready
+    from process import DEFAULT_BATCH_SIZE, TTS_AVAILABLE
+
+    report = {}
+    phrases = fixture["phrases"]
+    speech_seconds = sum(p["end"] - p["start"] for p in phrases)
+
+    # Model loading is reported separately so stages show steady-state speed
+    started = time.perf_counter()
+    preload_whisper(mode)
+    source_lang = ensure_translation_ready()
+    enable_tts = enable_tts and TTS_AVAILABLE
+    if enable_tts:
+        from tts import preload_model as preload_tts
+        enable_tts = preload_tts()
+    report["load"] = {"seconds": round(time.perf_counter() - started, 3)}
+
+    started = time.perf_counter()
+    decoded = decode_media(fixture["audio"])
+    if decoded is None:
+        raise RuntimeError("Decoding failed (is ffmpeg installed?)")
+    report["decode"] = stage_report(time.perf_counter() - started, decoded.duration, [])
+
+    try:
+        started = time.perf_counter()
+        latencies = []
+        segments = []
+        for segment, latency in timed_stream(
+            transcribe_audio_streaming(fixture["audio"], use_cache=False, audio=decoded.speech, mode=mode)
+        ):
+            segments.append(segment)
+            latencies.append(latency)
+        report["transcribe"] = stage_report(
+            time.perf_counter() - started, decoded.duration, latencies,
+            segments=len(segments),
+            first_segment=round(latencies[0], 3) if latencies else None
+        )
+
+        # The script, not Whisper's output, is translated and voiced: the same
+        # work every run, whatever the recognizer makes of the fixture
+        texts = [p["text"] for p in phrases]
+        started = time.perf_counter()
+        latencies = []
+        translations = []
+        for i in range(0, len(texts), DEFAULT_BATCH_SIZE):
+            batch_started = time.perf_counter()
+            translations += translate_batch(texts[i:i + DEFAULT_BATCH_SIZE], source_lang)
+            latencies.append(time.perf_counter() - batch_started)
+        report["translate"] = stage_report(
+            time.perf_counter() - started, speech_seconds, latencies,
+            lines=len(texts), batch_size=DEFAULT_BATCH_SIZE
+        )
+
+        if not enable_tts:
+            return report
+
+        from tts import get_synthesis_engine
+        from tts_track import PackedTrack
+        from audio_mixer import IncrementalDubber
+
+        directory = os.path.dirname(fixture["audio"])
+        track = PackedTrack(os.path.join(directory, "stages.pcm"))
+        subtitles = [
+            {"id": i, "start": p["start"], "end": p["end"], "text": p["text"],
+             "translatedText": translated, "audioFile": None}
+            for i, (p, translated) in enumerate(zip(phrases, translations))
+        ]
+        submitted = {}
+
+        def jobs():
+            for subtitle in subtitles:
+                submitted[subtitle["id"]] = time.perf_counter()
+                yield subtitle["id"], subtitle["translatedText"]
+
+        started = time.perf_counter()
+        latencies = []
+        voiced = 0.0
+        for subtitle_id, audio_path in get_synthesis_engine().synthesize(jobs()):
+            latencies.append(time.perf_counter() - submitted[subtitle_id])
+            audio = track.append(audio_path) if audio_path else None
+            if audio:
+                subtitles[subtitle_id].update(audio)
+                voiced += audio["audioLength"] / 2 / audio["audioRate"]
+        track.close()
+        report["tts"] = stage_report(
+            time.perf_counter() - started, voiced, latencies,
+            lines=len(subtitles), voiced=sum(1 for s in subtitles if s["audioFile"])
+        )
+
+        dubber = IncrementalDubber(decoded.mix, os.path.join(directory, "stages_dub.wav"), decoded.mix_sample_rate)
+        started = time.perf_counter()
+        latencies = []
+        for subtitle in subtitles:
+            step_started = time.perf_counter()
+            dubber.add(subtitle)
+            dubber.advance(subtitle["start"])
+            latencies.append(time.perf_counter() - step_started)
+        step_started = time.perf_counter()
+        ok = dubber.finish()
+        latencies.append(time.perf_counter() - step_started)
+        report["mix"] = stage_report(time.perf_counter() - started, decoded.duration, latencies, ok=ok)
+        return report
+    finally:
+        decoded.close()
+
+
+def run_full(fixture: dict, mode: str, enable_tts: bool) -> dict:
+    """Run the whole job as the app does and time its protocol messages."""
+    import process
+    from metrics import peak_rss_mb
+
+    messages = []
+
+    def record(kind: str, data: dict):
+        messages.append((time.perf_counter(), kind, data))
+
+    # Protocol lines are collected instead of printed
+    process.send_message = record
+
+    directory = os.path.dirname(fixture["audio"])
+    started = time.perf_counter()
+    subtitles = process.process_video_streaming(
+        fixture["audio"],
+        enable_tts=enable_tts,
+        mode=mode,
+        output_path=os.path.join(directory, "full.jsonl"),
+        dub_path=os.path.join(directory, "full_dub.wav") if enable_tts else None
+    )
+    seconds = time.perf_counter() - started
+
+    arrivals = [at for at, kind, _ in messages if kind == "SUBTITLE"]
+    gaps = [b - a for a, b in zip([started] + arrivals, arrivals)]
+    summary = next(
+        (data for _, kind, data in reversed(messages) if kind == "METRICS" and data.get("final")),
+        None
+    )
+    return {
+        "seconds": round(seconds, 3),
+        "audio_seconds": fixture["duration"],
+        "speed": round(fixture["duration"] / seconds, 2),
+        "subtitles": len(subtitles),
+        "first_subtitle": round(arrivals[0] - started, 3) if arrivals else None,
+        "latency": percentiles(gaps),
+        "peak_rss_mb": peak_rss_mb(),
+        "job_metrics": summary
+    }
+
+
+def run_child(name: str, args, fixture_dir: str) -> dict:
+    """Run one benchmark in a new interpreter with its own empty cache."""
+    cache_dir = os.path.join(fixture_dir, f"cache_{name}")
+    env = {**os.environ, "SUBPLAYER_CACHE_DIR": cache_dir, "PYTHONUNBUFFERED": "1"}
+    # No periodic snapshots; only the final summary is used
+    env["SUBPLAYER_METRICS_INTERVAL"] = "0"
+
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", name,
+        "--fixture-dir", fixture_dir, "--mode", args.mode
+    ]
+    if args.no_tts:
+        command.append("--no-tts")
+    print(f"Running {name}...", file=sys.stderr)
+    output = subprocess.run(command, env=env, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def environment() -> dict:
+    from transcribe import DEFAULT_MODEL
+    try:
+        from tts import SILERO_MODEL
+    except ImportError:
+        SILERO_MODEL = None
+
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "whisper_model": DEFAULT_MODEL,
+        "tts_model": SILERO_MODEL,
+        "packages": versions
+    }
+
+
+# Lower is better for all of these; compared as "run.stage.key"
+COMPARED_KEYS = ["seconds", "first_subtitle", "first_segment", "peak_rss_mb"]
+COMPARED_LATENCIES = ["p50", "p90", "p99"]
+
+
+def flatten(report: dict) -> dict:
+    values = {}
+    for run in ("stages", "full"):
+        entries = report.get(run) or {}
+        if run == "full":
+            entries = {"job": entries}
+        for stage, stats in entries.items():
+            for key in COMPARED_KEYS:
+                if stats.get(key) is not None:
+                    values[f"{run}.{stage}.{key}"] = stats[key]
+            for key in COMPARED_LATENCIES:
+                if (stats.get("latency") or {}).get(key) is not None:
+                    values[f"{run}.{stage}.latency_{key}"] = stats["latency"][key]
+    return values
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> dict:
+    """Relative change of every compared value; regressions exceed the tolerance."""
+    current = flatten(report)
+    previous = flatten(baseline)
+    changes = {}
+    regressions = []
+    for key in sorted(current.keys() & previous.keys()):
+        before, after = previous[key], current[key]
+        # Sub-millisecond timings are noise
+        if before < 0.001:
+            continue
+        change = (after - before) / before
+        changes[key] = {"baseline": before, "current": after, "change": round(change, 3)}
+        if change > tolerance:
+            regressions.append(key)
+
+    result = {"tolerance": tolerance, "changes": changes, "regressions": regressions}
+    if baseline.get("fixture") != report.get("fixture"):
+        result["warning"] = "fixture settings differ from the baseline"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=300, help="Fixture length in seconds")
+    parser.add_argument("--speech", help="16-bit WAV looped for the speech phrases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", default="latency", choices=["latency", "throughput"])
+    parser.add_argument("--no-tts", action="store_true", help="Skip TTS and mixing")
+    parser.add_argument("--runs", nargs="+", default=["stages", "full"], choices=["stages", "full"])
+    parser.add_argument("--baseline", help="Compare with this report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Also write the report here")
+    parser.add_argument("--keep", action="store_true", help="Keep the fixture directory")
+    parser.add_argument("--child", choices=["stages", "full"], help=argparse.SUPPRESS)
+    parser.add_argument("--fixture-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(os.path.join(args.fixture_dir, "fixture.json"), encoding="utf-8") as f:
+            fixture = json.load(f)
+        run = run_stages if args.child == "stages" else run_full
+        # Anything the pipeline prints goes to stderr; stdout is the result
+        print(json.dumps(run(fixture, args.mode, not args.no_tts)))
+        return
+
+    directory = tempfile.mkdtemp(prefix="subplayer_bench_")
+    try:
+        print(f"Generating {args.duration:.0f}s fixture...", file=sys.stderr)
+        fixture = make_fixture(directory, args.duration, args.speech, args.seed)
+
+        report = {
+            "fixture": {
+                "duration": args.duration,
+                "speech": fixture["speech"],
+                "phrases": len(fixture["phrases"]),
+                "seed": args.seed,
+                "mode": args.mode,
+                "tts": not args.no_tts
+            },
+            "environment": environment(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        for name in args.runs:
+            report[name] = run_child(name, args, directory)
+
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                report["comparison"] = compare(report, json.load(f), args.tolerance)
+        if args.save_baseline:
+            with open(args.save_baseline, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+        print(json.dumps(report, indent=2))
+        if args.keep:
+            print(f"Fixture kept in {directory}", file=sys.stderr)
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if report.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,47 @@
-import { app, BrowserWindow, ipcMain, dialog } from 'electron'
+import { app, BrowserWindow, ipcMain, dialog, protocol } from 'electron'
 import { join } from 'path'
-import { readFileSync, existsSync } from 'fs'
+import { tmpdir } from 'os'
+import { readFileSync, existsSync, mkdtempSync, rmSync } from 'fs'
+import { open, readFile } from 'fs/promises'
 import { PythonBridge } from './python-bridge'
 
 let mainWindow: BrowserWindow | null = null
 let pythonBridge: PythonBridge | null = null
 
+// TTS clips are served as tts://clip/?file=...&offset=...&length=...&rate=...
+// straight from the job's packed PCM track (see python/tts_track.py)
+const TTS_SCHEME = 'tts'
+const WAV_HEADER_BYTES = 44
+
+// Audio files reported by jobs; the protocol serves nothing else
+const ttsFiles = new Set<string>()
+
+// Temp directories of jobs (subtitle list, index, packed TTS track) and
+// whether the job has finished. Finished jobs' files are removed when the
+// next job starts (their video is no longer played), all of them on quit
+const jobDirs = new Map<string, boolean>()
+
+// Temp directory of the job whose video is open; messages of jobs it
+// replaced (cancelled, still winding down) are not forwarded
+let activeJobDir: string | null = null
+
+function removeJobDirs(finishedOnly: boolean) {
+  for (const [dir, finished] of jobDirs) {
+    if (finishedOnly && !finished) continue
+    for (const file of ttsFiles) {
+      if (file.startsWith(dir)) {
+        ttsFiles.delete(file)
+      }
+    }
+    rmSync(dir, { recursive: true, force: true })
+    jobDirs.delete(dir)
+  }
+}
+
+protocol.registerSchemesAsPrivileged([
+  { scheme: TTS_SCHEME, privileges: { standard: true, secure: true, stream: true, supportFetchAPI: true } }
+])
+
 function createWindow() {
   mainWindow = new BrowserWindow({
     width: 1280,
@@ -46,8 +82,57 @@ function initPythonBridge() {
   pythonBridge = new PythonBridge(pythonPath)
 }
 
+// Header of a 16-bit mono WAV holding `dataBytes` of PCM
+function wavHeader(dataBytes: number, sampleRate: number): Buffer {
+  const header = Buffer.alloc(WAV_HEADER_BYTES)
+  header.write('RIFF', 0)
+  header.writeUInt32LE(36 + dataBytes, 4)
+  header.write('WAVE', 8)
+  header.write('fmt ', 12)
+  header.writeUInt32LE(16, 16)
+  header.writeUInt16LE(1, 20)
+  header.writeUInt16LE(1, 22)
+  header.writeUInt32LE(sampleRate, 24)
+  header.writeUInt32LE(sampleRate * 2, 28)
+  header.writeUInt16LE(2, 32)
+  header.writeUInt16LE(16, 34)
+  header.write('data', 36)
+  header.writeUInt32LE(dataBytes, 40)
+  return header
+}
+
+// Read one clip: a byte range of a packed track, or a whole WAV file
+async function handleTtsRequest(request: Request): Promise<Response> {
+  const params = new URL(request.url).searchParams
+  const file = params.get('file')
+  if (!file || !ttsFiles.has(file)) {
+    return new Response(null, { status: 404 })
+  }
+
+  try {
+    const offset = params.get('offset')
+    if (offset === null) {
+      return new Response(await readFile(file), { headers: { 'Content-Type': 'audio/wav' } })
+    }
+
+    const length = Number(params.get('length'))
+    const body = Buffer.alloc(WAV_HEADER_BYTES + length)
+    wavHeader(length, Number(params.get('rate'))).copy(body)
+    const handle = await open(file, 'r')
+    try {
+      await handle.read(body, WAV_HEADER_BYTES, length, Number(offset))
+    } finally {
+      await handle.close()
+    }
+    return new Response(body, { headers: { 'Content-Type': 'audio/wav' } })
+  } catch {
+    return new Response(null, { status: 404 })
+  }
+}
+
 // App lifecycle
 app.whenReady().then(() => {
+  protocol.handle(TTS_SCHEME, handleTtsRequest)
   initPythonBridge()
   createWindow()
 
@@ -58,6 +143,27 @@ app.whenReady().then(() => {
   })
 })
 
+// Stopping the Python worker on quit; quitting goes ahead once it is done
+let workerStopping: Promise<void> | null = null
+let workerStopped = false
+
+app.on('before-quit', (event) => {
+  if (workerStopped) {
+    return
+  }
+  // Let the persistent Python worker exit (it may still be writing job
+  // files) before removing them, then quit for real
+  event.preventDefault()
+  if (workerStopping) {
+    return
+  }
+  workerStopping = (pythonBridge ? pythonBridge.dispose() : Promise.resolve()).finally(() => {
+    workerStopped = true
+    removeJobDirs(false)
+    app.quit()
+  })
+})
+
 app.on('window-all-closed', () => {
   if (process.platform !== 'darwin') {
     app.quit()
@@ -82,28 +188,47 @@ ipcMain.handle('open-file', async () => {
   return result.filePaths[0]
 })
 
-// Read audio file and return as base64 data URL
-ipcMain.handle('read-audio-file', async (event, filePath: string): Promise<string | null> => {
+// Read a binary subtitle index written at the end of processing
+ipcMain.handle('read-subtitle-index', async (event, filePath: string): Promise<ArrayBuffer | null> => {
   try {
     if (!existsSync(filePath)) {
       return null
     }
     const buffer = readFileSync(filePath)
-    const base64 = buffer.toString('base64')
-    return `data:audio/wav;base64,${base64}`
+    return buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + buffer.byteLength)
   } catch {
     return null
   }
 })
 
-ipcMain.handle('process-video', async (event, videoPath: string, enableTts: boolean = false) => {
+// Playback position hints: transcription follows the playhead
+ipcMain.on('playback-seek', (_event, time: number) => {
+  pythonBridge?.seek(time)
+})
+
+ipcMain.handle('process-video', async (
+  event,
+  videoPath: string,
+  enableTts: boolean = false,
+  progressive: boolean = false,
+  seekable: boolean = false
+) => {
   if (!pythonBridge || !mainWindow) {
     throw new Error('Python bridge not initialized')
   }
 
+  // A newly opened video replaces the one being processed
+  pythonBridge.cancel()
+  removeJobDirs(true)
+  const jobDir = mkdtempSync(join(tmpdir(), 'subplayer_job_'))
+  jobDirs.set(jobDir, false)
+  activeJobDir = jobDir
+  const isActive = () => activeJobDir === jobDir
+
   try {
     // Progress callback
     const onProgress = (update: { stage: string; progress: number; message: string }) => {
+      if (!isActive()) return
       mainWindow?.webContents.send('processing-update', update)
     }
 
@@ -114,26 +239,68 @@ ipcMain.handle('process-video', async (event, videoPath: string, enableTts: bool
       end: number
       text: string
       translatedText: string
+      language?: string
       audioFile?: string | null
+      audioOffset?: number
+      audioLength?: number
+      audioRate?: number
     }) => {
+      if (!isActive()) return
+      if (subtitle.audioFile) {
+        ttsFiles.add(subtitle.audioFile)
+      }
       mainWindow?.webContents.send('subtitle-ready', subtitle)
     }
 
+    // Refined subtitle replacing an earlier draft with the same id
+    const onSubtitleUpdate = (subtitle: Parameters<typeof onSubtitle>[0]) => {
+      if (!isActive()) return
+      if (subtitle.audioFile) {
+        ttsFiles.add(subtitle.audioFile)
+      }
+      mainWindow?.webContents.send('subtitle-update', subtitle)
+    }
+
+    // Stage timings, queue depths and the final job summary
+    const onMetrics = (metrics: object) => {
+      if (!isActive()) return
+      mainWindow?.webContents.send('processing-metrics', metrics)
+    }
+
+    // Subtitles already reach the renderer one by one; keeping a second
+    // copy here would grow with the length of the video
+    const outputPath = join(jobDir, 'subtitles.jsonl')
+    const indexPath = outputPath.replace(/\.jsonl$/, '.spsi')
+
     // Process video with streaming support
-    const subtitles = await pythonBridge.processVideo(
+    await pythonBridge.processVideo(
       videoPath, 
       onProgress, 
       onSubtitle,
-      { enableTts }
+      {
+        enableTts,
+        progressive,
+        seekable,
+        onSubtitleUpdate,
+        onMetrics,
+        outputPath
+      }
     )
-    return subtitles
+    // Binary time index of the final subtitles (see python/subtitle_index.py)
+    return { indexPath: existsSync(indexPath) ? indexPath : null }
 
   } catch (error) {
-    mainWindow?.webContents.send('processing-update', {
-      stage: 'error',
-      progress: 0,
-      message: error instanceof Error ? error.message : 'Unknown error'
-    })
+    if (isActive()) {
+      mainWindow?.webContents.send('processing-update', {
+        stage: 'error',
+        progress: 0,
+        message: error instanceof Error ? error.message : 'Unknown error'
+      })
+    }
     throw error
+  } finally {
+    if (jobDirs.has(jobDir)) {
+      jobDirs.set(jobDir, true)
+    }
   }
 })
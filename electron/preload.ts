@@ -7,13 +7,37 @@ interface ProcessingUpdate {
   message: string
 }
 
+interface ProcessVideoResult {
+  indexPath: string | null
+}
+
+interface ProcessingMetrics {
+  elapsed: number
+  cpu: number
+  covered: number
+  rtf: number | null
+  // Process-wide peak (all jobs of a server worker) and its value at job start
+  peak_rss_mb: number | null
+  peak_rss_at_start_mb: number | null
+  stages: Record<string, { calls: number; wall: number; cpu: number; audio_seconds: number; rtf: number | null }>
+  counters: Record<string, number>
+  queues: Record<string, number>
+  final?: boolean
+  first_subtitle?: number | null
+  warmup?: Record<string, number>
+}
+
 interface SubtitleResult {
   id: number
   start: number
   end: number
   text: string
   translatedText: string
+  language?: string
   audioFile?: string | null
+  audioOffset?: number
+  audioLength?: number
+  audioRate?: number
 }
 
 // Expose protected methods to renderer process
@@ -26,14 +50,21 @@ contextBridge.exposeInMainWorld('electron', {
   // Process video (transcribe + translate + optional TTS)
   processVideo: (
     videoPath: string, 
-    enableTts: boolean = false
-  ): Promise<SubtitleResult[]> => {
-    return ipcRenderer.invoke('process-video', videoPath, enableTts)
+    enableTts: boolean = false,
+    progressive: boolean = false,
+    seekable: boolean = false
+  ): Promise<ProcessVideoResult> => {
+    return ipcRenderer.invoke('process-video', videoPath, enableTts, progressive, seekable)
   },
 
-  // Read audio file as base64 data URL (via IPC to main process)
-  readAudioFile: (filePath: string): Promise<string | null> => {
-    return ipcRenderer.invoke('read-audio-file', filePath)
+  // Load the binary subtitle index of a finished job
+  readSubtitleIndex: (filePath: string): Promise<ArrayBuffer | null> => {
+    return ipcRenderer.invoke('read-subtitle-index', filePath)
+  },
+
+  // Tell the processor where playback is, so that region is transcribed first
+  seekTo: (time: number) => {
+    ipcRenderer.send('playback-seek', time)
   },
 
   // Listen for processing updates
@@ -44,6 +75,14 @@ contextBridge.exposeInMainWorld('electron', {
     ipcRenderer.on('processing-update', handler)
   },
 
+  // Listen for telemetry snapshots (every few seconds and once at the end)
+  onProcessingMetrics: (callback: (metrics: ProcessingMetrics) => void) => {
+    const handler = (_event: Electron.IpcRendererEvent, metrics: ProcessingMetrics) => {
+      callback(metrics)
+    }
+    ipcRenderer.on('processing-metrics', handler)
+  },
+
   // Listen for streaming subtitles (real-time as they are ready)
   onSubtitleReady: (callback: (subtitle: SubtitleResult) => void) => {
     const handler = (_event: Electron.IpcRendererEvent, subtitle: SubtitleResult) => {
@@ -52,12 +91,22 @@ contextBridge.exposeInMainWorld('electron', {
     ipcRenderer.on('subtitle-ready', handler)
   },
 
+  // Listen for refined subtitles replacing drafts (progressive mode)
+  onSubtitleUpdate: (callback: (subtitle: SubtitleResult) => void) => {
+    const handler = (_event: Electron.IpcRendererEvent, subtitle: SubtitleResult) => {
+      callback(subtitle)
+    }
+    ipcRenderer.on('subtitle-update', handler)
+  },
+
   // Remove all listeners
   removeProcessingListener: () => {
     ipcRenderer.removeAllListeners('processing-update')
+    ipcRenderer.removeAllListeners('processing-metrics')
   },
 
   removeSubtitleListener: () => {
     ipcRenderer.removeAllListeners('subtitle-ready')
+    ipcRenderer.removeAllListeners('subtitle-update')
   }
 })
@@ -5,13 +5,30 @@ import { existsSync } from 'fs'
 // Get process.env before any variable shadowing
 const nodeEnv = process.env
 
+// How long to wait for the worker to load its imports and report READY
+const WORKER_START_TIMEOUT_MS = 60000
+
+// Give up on the persistent worker after this many failed starts in a row
+const MAX_WORKER_START_FAILURES = 3
+
+// How long dispose() waits for the worker to exit before killing it
+const WORKER_SHUTDOWN_TIMEOUT_MS = 2500
+
+// Jobs the worker runs at the same time, so a newly opened video does not
+// wait for the cancelled one to wind down
+const WORKER_MAX_JOBS = 2
+
 interface Subtitle {
   id: number
   start: number
   end: number
   text: string
   translatedText: string
+  language?: string
   audioFile?: string | null
+  audioOffset?: number
+  audioLength?: number
+  audioRate?: number
 }
 
 interface ProgressCallback {
@@ -22,13 +39,165 @@ interface SubtitleCallback {
   (subtitle: Subtitle): void
 }
 
+interface DubProgressCallback {
+  // final: the track was encoded to the end
+  (update: { path: string; duration: number; final?: boolean }): void
+}
+
+// Telemetry snapshot from python/metrics.py (final: true for the job summary)
+interface JobMetrics {
+  elapsed: number
+  cpu: number
+  covered: number
+  rtf: number | null
+  // Process-wide peak (all jobs of a server worker) and its value at job start
+  peak_rss_mb: number | null
+  peak_rss_at_start_mb: number | null
+  stages: Record<string, { calls: number; wall: number; cpu: number; audio_seconds: number; rtf: number | null }>
+  counters: Record<string, number>
+  queues: Record<string, number>
+  final?: boolean
+  first_subtitle?: number | null
+  warmup?: Record<string, number>
+}
+
+interface MetricsCallback {
+  (metrics: JobMetrics): void
+}
+
 interface ProcessOptions {
   enableTts?: boolean
+  // Stream fast draft subtitles and replace them with refined ones later
+  progressive?: boolean
+  // Transcribe in windows that follow the playhead (see seek()); windows
+  // are decoded without context from each other, so this is opt-in
+  seekable?: boolean
+  // Playback position to transcribe first (seconds; seekable jobs only)
+  startAt?: number
+  // Stream subtitles to this JSONL file instead of collecting them here;
+  // processVideo then resolves with an empty list (bounded memory)
+  outputPath?: string
+  // Encode the dubbed track here while processing (.ogg or .m4a stay
+  // playable up to the processing point; needs enableTts)
+  dubPath?: string
+  onSubtitleUpdate?: SubtitleCallback
+  onDubProgress?: DubProgressCallback
+  onMetrics?: MetricsCallback
+}
+
+interface WorkerJob {
+  // Worker process the job was sent to
+  worker: ChildProcess
+  onProgress: ProgressCallback
+  onSubtitle?: SubtitleCallback
+  onSubtitleUpdate?: SubtitleCallback
+  onDubProgress?: DubProgressCallback
+  onMetrics?: MetricsCallback
+  // null when subtitles are streamed to a file
+  subtitles: SubtitleList | null
+  result: Subtitle[] | null
+  resolve: (subtitles: Subtitle[]) => void
+  reject: (error: Error) => void
+}
+
+interface MessageHandlers {
+  onProgress: ProgressCallback
+  onSubtitle: SubtitleCallback
+  onSubtitleUpdate: SubtitleCallback
+  onDubProgress?: DubProgressCallback
+  onMetrics?: MetricsCallback
+  onResult: (subtitles: Subtitle[]) => void
+}
+
+// Subtitles collected for a job; refined versions replace drafts by id.
+// Seekable jobs deliver windows out of order, so items are sorted by start.
+class SubtitleList {
+  private byId = new Map<number, Subtitle>()
+
+  get items(): Subtitle[] {
+    return [...this.byId.values()].sort((a, b) => a.start - b.start)
+  }
+
+  get size(): number {
+    return this.byId.size
+  }
+
+  add(subtitle: Subtitle) {
+    this.byId.set(subtitle.id, subtitle)
+  }
+
+  update(subtitle: Subtitle) {
+    if (this.byId.has(subtitle.id)) {
+      this.byId.set(subtitle.id, subtitle)
+    }
+  }
+}
+
+class WorkerUnavailableError extends Error {}
+
+// Split a stream of stdout chunks into complete lines
+function createLineReader(onLine: (line: string) => void): (data: Buffer) => void {
+  let pending = ''
+  return (data: Buffer) => {
+    pending += data.toString()
+    const lines = pending.split('\n')
+    pending = lines.pop() ?? ''
+    for (const line of lines) {
+      onLine(line.trimEnd())
+    }
+  }
+}
+
+// Parse one PREFIX:{json} protocol line; returns null for anything else
+function parseMessage(line: string): { kind: string; data: any } | null {
+  const separator = line.indexOf(':')
+  if (separator <= 0) {
+    return null
+  }
+  const kind = line.substring(0, separator)
+  if (!/^[A-Z_]+$/.test(kind)) {
+    return null
+  }
+  try {
+    return { kind, data: JSON.parse(line.substring(separator + 1)) }
+  } catch {
+    return null
+  }
+}
+
+function dispatchMessage(kind: string, data: any, handlers: MessageHandlers) {
+  switch (kind) {
+    case 'PROGRESS':
+      handlers.onProgress(data)
+      break
+    case 'SUBTITLE':
+      handlers.onSubtitle(data as Subtitle)
+      break
+    case 'SUBTITLE_UPDATE':
+      handlers.onSubtitleUpdate(data as Subtitle)
+      break
+    case 'DUB':
+      handlers.onDubProgress?.(data)
+      break
+    case 'METRICS':
+      handlers.onMetrics?.(data as JobMetrics)
+      break
+    case 'RESULT':
+      handlers.onResult(data.subtitles || [])
+      break
+  }
 }
 
 export class PythonBridge {
   private pythonPath: string
   private pythonExecutable: string
+  private worker: ChildProcess | null = null
+  private workerReady: Promise<ChildProcess> | null = null
+  private workerStartFailures = 0
+  private jobs = new Map<string, WorkerJob>()
+  private nextJobId = 1
+  // One-shot processes of the fallback path, killed by cancel()
+  private spawned = new Set<ChildProcess>()
 
   constructor(pythonPath: string) {
     this.pythonPath = pythonPath
@@ -67,24 +236,233 @@ export class PythonBridge {
     return 'python3' // Default fallback
   }
 
+  private getScriptPath(): string {
+    const scriptPath = join(this.pythonPath, 'process.py')
+
+    // Check if script exists
+    if (!existsSync(scriptPath)) {
+      throw new Error(`Python script not found: ${scriptPath}`)
+    }
+    return scriptPath
+  }
+
   async processVideo(
-    videoPath: string, 
+    videoPath: string,
     onProgress: ProgressCallback,
     onSubtitle?: SubtitleCallback,
     options?: ProcessOptions
   ): Promise<Subtitle[]> {
-    const scriptPath = join(this.pythonPath, 'process.py')
-    
-    // Check if script exists
-    if (!existsSync(scriptPath)) {
-      throw new Error(`Python script not found: ${scriptPath}`)
+    // Prefer the persistent worker so models stay loaded between videos
+    if (this.workerStartFailures < MAX_WORKER_START_FAILURES) {
+      try {
+        return await this.processWithWorker(videoPath, onProgress, onSubtitle, options)
+      } catch (error) {
+        if (!(error instanceof WorkerUnavailableError)) {
+          throw error
+        }
+        console.warn(`Python worker unavailable, falling back to one-shot process: ${error.message}`)
+      }
+    }
+
+    return this.processWithSpawn(videoPath, onProgress, onSubtitle, options)
+  }
+
+  // Start the worker if it is not running and wait until it reports READY
+  private ensureWorker(): Promise<ChildProcess> {
+    if (this.workerReady) {
+      return this.workerReady
+    }
+
+    const scriptPath = this.getScriptPath()
+
+    this.workerReady = new Promise((resolve, reject) => {
+      const worker = spawn(this.pythonExecutable, [scriptPath, '--server', '--max-jobs', String(WORKER_MAX_JOBS)], {
+        cwd: this.pythonPath,
+        env: { ...nodeEnv, PYTHONUNBUFFERED: '1' }
+      })
+      // Current from spawn on, so a late exit of a replaced worker can
+      // tell that it is no longer current
+      this.worker = worker
+      let ready = false
+      let failed = false
+      let errorBuffer = ''
+
+      const startTimeout = setTimeout(() => {
+        worker.kill()
+        fail(new WorkerUnavailableError('Worker did not become ready in time'))
+      }, WORKER_START_TIMEOUT_MS)
+
+      const fail = (error: Error) => {
+        clearTimeout(startTimeout)
+        if (!ready && !failed) {
+          failed = true
+          this.workerStartFailures++
+          reject(error)
+        }
+      }
+
+      worker.stdout?.on('data', createLineReader((line) => {
+        const message = parseMessage(line)
+        if (!message) {
+          return
+        }
+        if (message.kind === 'READY') {
+          clearTimeout(startTimeout)
+          ready = true
+          this.workerStartFailures = 0
+          resolve(worker)
+          return
+        }
+        this.handleWorkerMessage(message.kind, message.data)
+      }))
+
+      worker.stderr?.on('data', (data: Buffer) => {
+        // Keep only the tail - the worker lives for the whole session
+        errorBuffer = (errorBuffer + data.toString()).slice(-8192)
+      })
+
+      worker.on('error', (err: Error) => {
+        this.resetWorker(worker)
+        fail(new WorkerUnavailableError(`Failed to start Python worker: ${err.message}`))
+      })
+
+      worker.on('close', (code: number | null) => {
+        this.resetWorker(worker)
+        fail(new WorkerUnavailableError(`Worker exited with code ${code}: ${errorBuffer}`))
+
+        // Fail jobs that were running on the dead worker; the next job restarts it
+        for (const [jobId, job] of this.jobs) {
+          if (job.worker !== worker) continue
+          job.reject(new Error(`Python worker exited with code ${code}: ${errorBuffer}`))
+          this.jobs.delete(jobId)
+        }
+      })
+    })
+
+    return this.workerReady
+  }
+
+  // Write one request line; a worker that is shutting down accepts no more
+  private sendRequest(worker: ChildProcess, request: object) {
+    if (worker.stdin?.writable) {
+      worker.stdin.write(JSON.stringify(request) + '\n')
+    }
+  }
+
+  // Forget a worker that exited, unless it has been replaced already
+  private resetWorker(worker: ChildProcess) {
+    if (this.worker === worker) {
+      this.worker = null
+      this.workerReady = null
+    }
+  }
+
+  private handleWorkerMessage(kind: string, data: any) {
+    const jobId = data?.job
+    const job = jobId !== undefined ? this.jobs.get(String(jobId)) : undefined
+    if (!job) {
+      return
     }
+    delete data.job
+
+    if (kind === 'DONE') {
+      this.jobs.delete(String(jobId))
+      if (data.ok) {
+        if (!job.subtitles) {
+          job.resolve([])
+        } else {
+          job.resolve(job.subtitles.size > 0 ? job.subtitles.items : job.result ?? [])
+        }
+      } else {
+        job.reject(new Error(data.error || 'Processing failed'))
+      }
+      return
+    }
+
+    dispatchMessage(kind, data, {
+      onProgress: job.onProgress,
+      onSubtitle: (subtitle) => {
+        job.subtitles?.add(subtitle)
+        job.onSubtitle?.(subtitle)
+      },
+      onSubtitleUpdate: (subtitle) => {
+        job.subtitles?.update(subtitle)
+        job.onSubtitleUpdate?.(subtitle)
+      },
+      onDubProgress: job.onDubProgress,
+      onMetrics: job.onMetrics,
+      onResult: (subtitles) => {
+        job.result = subtitles
+      }
+    })
+  }
+
+  private async processWithWorker(
+    videoPath: string,
+    onProgress: ProgressCallback,
+    onSubtitle?: SubtitleCallback,
+    options?: ProcessOptions
+  ): Promise<Subtitle[]> {
+    const worker = await this.ensureWorker()
+    const jobId = String(this.nextJobId++)
+
+    return new Promise((resolve, reject) => {
+      this.jobs.set(jobId, {
+        worker,
+        onProgress,
+        onSubtitle,
+        onSubtitleUpdate: options?.onSubtitleUpdate,
+        onDubProgress: options?.onDubProgress,
+        onMetrics: options?.onMetrics,
+        subtitles: options?.outputPath ? null : new SubtitleList(),
+        result: null,
+        resolve,
+        reject
+      })
+
+      const request = {
+        cmd: 'process',
+        id: jobId,
+        video_path: videoPath,
+        tts: options?.enableTts ?? false,
+        progressive: options?.progressive ?? false,
+        seekable: options?.seekable ?? false,
+        start_at: options?.seekable ? options.startAt : undefined,
+        output_path: options?.outputPath,
+        dub_path: options?.dubPath
+      }
+      worker.stdin?.write(JSON.stringify(request) + '\n')
+    })
+  }
+
+  private processWithSpawn(
+    videoPath: string,
+    onProgress: ProgressCallback,
+    onSubtitle?: SubtitleCallback,
+    options?: ProcessOptions
+  ): Promise<Subtitle[]> {
+    const scriptPath = this.getScriptPath()
 
     // Build command args
     const args = [scriptPath, videoPath]
     if (options?.enableTts) {
       args.push('--tts')
     }
+    if (options?.progressive) {
+      args.push('--progressive')
+    }
+    if (options?.seekable) {
+      args.push('--seekable')
+      if (options.startAt) {
+        args.push('--start-at', String(options.startAt))
+      }
+    }
+    if (options?.outputPath) {
+      args.push('--output', options.outputPath)
+    }
+    if (options?.dubPath) {
+      args.push('--dub', options.dubPath)
+    }
 
     return new Promise((resolve, reject) => {
       const pythonProcess: ChildProcess = spawn(this.pythonExecutable, args, {
@@ -92,63 +470,50 @@ export class PythonBridge {
         env: { ...nodeEnv, PYTHONUNBUFFERED: '1' }
       })
 
-      let outputBuffer = ''
+      this.spawned.add(pythonProcess)
       let errorBuffer = ''
-      const subtitles: Subtitle[] = []
-
-      pythonProcess.stdout?.on('data', (data: Buffer) => {
-        const text = data.toString()
-        outputBuffer += text
-
-        // Parse messages from stdout
-        const lines = text.split('\n')
-        for (const line of lines) {
-          // Progress updates
-          if (line.startsWith('PROGRESS:')) {
-            try {
-              const progressData = JSON.parse(line.substring(9))
-              onProgress(progressData)
-            } catch {
-              // Ignore parse errors
-            }
-          }
+      let result: Subtitle[] = []
+      const subtitles = options?.outputPath ? null : new SubtitleList()
+
+      pythonProcess.stdout?.on('data', createLineReader((line) => {
+        const message = parseMessage(line)
+        if (!message) {
+          return
+        }
+        dispatchMessage(message.kind, message.data, {
+          onProgress,
           // Streaming subtitles - send immediately to UI
-          else if (line.startsWith('SUBTITLE:')) {
-            try {
-              const subtitle = JSON.parse(line.substring(9)) as Subtitle
-              subtitles.push(subtitle)
-              if (onSubtitle) {
-                onSubtitle(subtitle)
-              }
-            } catch {
-              // Ignore parse errors
+          onSubtitle: (subtitle) => {
+            subtitles?.add(subtitle)
+            if (onSubtitle) {
+              onSubtitle(subtitle)
             }
+          },
+          onSubtitleUpdate: (subtitle) => {
+            subtitles?.update(subtitle)
+            options?.onSubtitleUpdate?.(subtitle)
+          },
+          onDubProgress: options?.onDubProgress,
+          onMetrics: options?.onMetrics,
+          onResult: (resultSubtitles) => {
+            result = resultSubtitles
           }
-        }
-      })
+        })
+      }))
 
       pythonProcess.stderr?.on('data', (data: Buffer) => {
-        errorBuffer += data.toString()
+        // Only the tail is reported on failure
+        errorBuffer = (errorBuffer + data.toString()).slice(-8192)
       })
 
       pythonProcess.on('close', (code: number | null) => {
+        this.spawned.delete(pythonProcess)
         if (code === 0) {
-          // Return collected subtitles
-          if (subtitles.length > 0) {
-            resolve(subtitles)
+          // Return collected subtitles, falling back to RESULT if none were streamed
+          if (!subtitles) {
+            resolve([])
           } else {
-            // Fallback: parse RESULT if no streaming subtitles
-            const jsonMatch = outputBuffer.match(/RESULT:(\{.*\})/s)
-            if (jsonMatch) {
-              try {
-                const result = JSON.parse(jsonMatch[1])
-                resolve(result.subtitles || [])
-              } catch (e) {
-                reject(new Error(`Failed to parse result: ${e}`))
-              }
-            } else {
-              resolve([])
-            }
+            resolve(subtitles.size > 0 ? subtitles.items : result)
           }
         } else {
           reject(new Error(`Process exited with code ${code}: ${errorBuffer}`))
@@ -156,8 +521,55 @@ export class PythonBridge {
       })
 
       pythonProcess.on('error', (err: Error) => {
+        this.spawned.delete(pythonProcess)
         reject(new Error(`Failed to start Python process: ${err.message}`))
       })
     })
   }
+
+  // Transcribe the region around a playback position first (seekable worker jobs only)
+  seek(time: number) {
+    for (const [jobId, job] of this.jobs) {
+      this.sendRequest(job.worker, { cmd: 'seek', id: jobId, time })
+    }
+  }
+
+  // Cancel every queued or running job (a newly opened video replaces the
+  // current one); their processVideo promises reject once they have stopped
+  cancel() {
+    for (const [jobId, job] of this.jobs) {
+      this.sendRequest(job.worker, { cmd: 'cancel', id: jobId })
+    }
+    for (const pythonProcess of this.spawned) {
+      pythonProcess.kill()
+    }
+  }
+
+  // Stop the persistent worker (called on app shutdown): ask it to shut down
+  // so it can close its files, and kill it if it has not exited in time
+  dispose(): Promise<void> {
+    const worker = this.worker
+    if (!worker) {
+      return Promise.resolve()
+    }
+    this.worker = null
+    this.workerReady = null
+
+    return new Promise((resolve) => {
+      if (worker.exitCode !== null || worker.signalCode !== null) {
+        resolve()
+        return
+      }
+      const killTimeout = setTimeout(() => {
+        worker.kill()
+        resolve()
+      }, WORKER_SHUTDOWN_TIMEOUT_MS)
+      worker.once('exit', () => {
+        clearTimeout(killTimeout)
+        resolve()
+      })
+      worker.stdin?.write(JSON.stringify({ cmd: 'shutdown' }) + '\n')
+      worker.stdin?.end()
+    })
+  }
 }
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Shared audio decode for the processing pipeline.
+
+A single ffmpeg run demuxes and decodes the media file once into raw PCM
+cache files: a 16 kHz mono float32 view for Whisper and VAD and, for jobs
+that dub or mix, the full-rate track (48 kHz stereo s16le). Both are
+memory-mapped, so long videos are not decoded two or three times or held
+in memory whole. Jobs that did not ask for the full-rate track decode it
+on first access.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from disk_cache import DiskCache
+from fingerprint import media_fingerprint
+
+# Full-rate track used for mixing
+MIX_SAMPLE_RATE = 48000
+MIX_CHANNELS = 2
+
+# Whisper / VAD input
+SPEECH_SAMPLE_RATE = 16000
+
+# Size limit for decoded PCM (override with SUBPLAYER_PCM_CACHE_MB)
+MAX_CACHE_BYTES = int(os.environ.get("SUBPLAYER_PCM_CACHE_MB", "4096")) * 1024 * 1024
+
+# ffmpeg output options, by cache key suffix
+MIX_SUFFIX = ".s16le"
+SPEECH_SUFFIX = ".f32le"
+_FORMATS = {
+    MIX_SUFFIX: ["-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(MIX_SAMPLE_RATE), "-ac", str(MIX_CHANNELS)],
+    SPEECH_SUFFIX: ["-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(SPEECH_SAMPLE_RATE), "-ac", "1"]
+}
+
+_cache = DiskCache("pcm", MAX_CACHE_BYTES)
+
+
+class DecodedAudio:
+    """
+    Memory-mapped views of a decoded media file.
+
+    The files are PCM cache entries, or temp files in work_dir when the
+    cache is not used; close() deletes the latter. Without mix_path the
+    full-rate track is decoded (and cached next to the speech track) when
+    mix is first read.
+    """
+
+    def __init__(
+        self,
+        media_path: str,
+        key: str,
+        speech_path: Optional[str] = None,
+        mix_path: Optional[str] = None,
+        use_cache: bool = True
+    ):
+        self.media_path = media_path
+        self.key = key
+        self.speech_path = speech_path
+        self.mix_path = mix_path
+        self.use_cache = use_cache
+        self.work_dir = None
+        self.mix_sample_rate = MIX_SAMPLE_RATE
+        self.speech_sample_rate = SPEECH_SAMPLE_RATE
+        self._mix = None
+        self._speech = None
+
+    @property
+    def mix(self) -> np.ndarray:
+        """48 kHz stereo int16 samples, shape (frames, 2)."""
+        if self._mix is None:
+            if self.mix_path is None:
+                cached = _cache.get(self.key + MIX_SUFFIX) if self.use_cache else None
+                if cached:
+                    self.mix_path = cached
+                elif not self.decode([MIX_SUFFIX]):
+                    raise OSError(f"Failed to decode audio: {self.media_path}")
+            self._mix = _map(self.mix_path, np.int16, MIX_CHANNELS)
+        return self._mix
+
+    @property
+    def speech(self) -> np.ndarray:
+        """16 kHz mono float32 samples for Whisper."""
+        if self._speech is None:
+            self._speech = _map(self.speech_path, np.float32, 1).reshape(-1)
+        return self._speech
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return len(self.speech) / SPEECH_SAMPLE_RATE
+
+    def speech_slice(self, start: float, end: Optional[float] = None) -> np.ndarray:
+        """Speech samples between two timestamps (seconds)."""
+        first = max(0, int(start * SPEECH_SAMPLE_RATE))
+        last = None if end is None else max(first, int(end * SPEECH_SAMPLE_RATE))
+        return self.speech[first:last]
+
+    def decode(self, suffixes: List[str]) -> bool:
+        """
+        Decode the given tracks (MIX_SUFFIX / SPEECH_SUFFIX) in one ffmpeg
+        run and cache them, or keep them in work_dir when the cache is not
+        used or the recording is too long for it.
+
+        Returns:
+            False if ffmpeg is unavailable or decoding failed
+        """
+        if self.work_dir is None:
+            self.work_dir = tempfile.mkdtemp(prefix="subplayer_decode_")
+        temp_paths = {suffix: os.path.join(self.work_dir, f"track{suffix}") for suffix in suffixes}
+
+        # One demux/decode, one resampled output per track
+        cmd = ["ffmpeg", "-y", "-v", "error", "-i", self.media_path]
+        for suffix, path in temp_paths.items():
+            cmd += ["-map", "0:a:0", "-vn", *_FORMATS[suffix], path]
+
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, "stderr", b"") or b""
+            print(f"Failed to decode audio: {e} {stderr.decode(errors='replace')}", file=sys.stderr)
+            for path in temp_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            return False
+
+        paths = temp_paths
+        if self.use_cache:
+            paths = self._store(temp_paths)
+        for suffix, path in paths.items():
+            if suffix == MIX_SUFFIX:
+                self.mix_path = path
+            else:
+                self.speech_path = path
+        return True
+
+    def _store(self, temp_paths: Dict[str, str]) -> Dict[str, str]:
+        """Move decoded tracks into the cache unless the pair is too large."""
+        # Recordings too long for the cache are used from the temp files; the
+        # pair must never evict itself while the job maps it
+        size = sum(os.path.getsize(path) for path in temp_paths.values())
+        size += sum(os.path.getsize(path) for path in (self.mix_path, self.speech_path) if path)
+        if size > _cache.max_bytes:
+            print(
+                f"Decoded audio ({size / 1024 / 1024:.0f} MB) exceeds the PCM cache limit; not caching",
+                file=sys.stderr
+            )
+            self.use_cache = False
+            return temp_paths
+
+        pair = (self.key + MIX_SUFFIX, self.key + SPEECH_SUFFIX)
+        paths = {
+            suffix: _cache.put_file(self.key + suffix, path, keep=pair)
+            for suffix, path in temp_paths.items()
+        }
+        if not os.listdir(self.work_dir):
+            os.rmdir(self.work_dir)
+            self.work_dir = None
+        return paths
+
+    def close(self):
+        """Drop the memory maps and delete temp files (cache entries stay)."""
+        self._mix = None
+        self._speech = None
+        if self.work_dir is not None:
+            # Views still held elsewhere keep the data readable on POSIX
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+
+def _map(path: str, dtype, channels: int) -> np.ndarray:
+    """Memory-map a raw PCM file (empty files map to an empty array)."""
+    if os.path.getsize(path) == 0:
+        return np.zeros((0, channels), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r").reshape(-1, channels)
+
+
+def decode_media(media_path: str, use_cache: bool = True, need_mix: bool = True) -> Optional[DecodedAudio]:
+    """
+    Decode the first audio stream of a media file once.
+
+    Args:
+        media_path: Video or audio file
+        use_cache: Reuse (and store) decoded PCM keyed by the media fingerprint
+        need_mix: Decode the full-rate track for mixing too; otherwise it is
+            decoded only if DecodedAudio.mix is read
+
+    Returns:
+        DecodedAudio, or None if ffmpeg is unavailable or decoding failed
+    """
+    key = media_fingerprint(media_path)
+    decoded = DecodedAudio(media_path, key, use_cache=use_cache)
+
+    if use_cache:
+        decoded.speech_path = _cache.get(key + SPEECH_SUFFIX)
+        if need_mix:
+            decoded.mix_path = _cache.get(key + MIX_SUFFIX)
+
+    missing = []
+    if decoded.speech_path is None:
+        missing.append(SPEECH_SUFFIX)
+    if need_mix and decoded.mix_path is None:
+        missing.append(MIX_SUFFIX)
+
+    if missing and not decoded.decode(missing):
+        decoded.close()
+        return None
+    return decoded
+
+
+# For testing
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python audio_decode.py <media_path>")
+        sys.exit(1)
+
+    decoded = decode_media(sys.argv[1])
+    if decoded is None:
+        print("Failed!")
+        sys.exit(1)
+
+    print(f"Mix:    {decoded.mix_path} {decoded.mix.shape}")
+    print(f"Speech: {decoded.speech_path} {decoded.speech.shape}")
+    print(f"Duration: {decoded.duration:.2f}s")
@@ -1,17 +1,54 @@
 #!/usr/bin/env python3
 """
 Audio mixer module for combining original audio with TTS voice-over.
+The dubbed track is rendered window by window, so memory use stays constant
+regardless of video length.
 """
 
 import os
 import subprocess
 import tempfile
-from typing import List, Dict, Any, Optional
+import threading
+import wave
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable, Union
+
+import numpy as np
+
+from subtitle_index import SubtitleIndex
+from tts_track import read_clip
+
+# Where a clip sits inside a packed TTS track: (offset, length, rate)
+ClipSpan = Tuple[int, int, int]
+
+# Window length of the incremental dubbing stage (seconds); shorter windows
+# keep the encoded track closer to the processing point
+DUB_WINDOW_SECONDS = 5.0
+
+# Encoder options for outputs that are read while still being written:
+# small Ogg pages, or fragmented MP4 with the moov atom up front
+STREAMING_ENCODERS = {
+    '.ogg': ['-c:a', 'libopus', '-b:a', '96k', '-page_duration', '500000'],
+    '.opus': ['-c:a', 'libopus', '-b:a', '96k', '-page_duration', '500000'],
+    '.m4a': ['-c:a', 'aac', '-b:a', '128k', '-movflags', '+frag_keyframe+empty_moov+default_base_moof',
+             '-frag_duration', '1000000'],
+    '.mp4': ['-c:a', 'aac', '-b:a', '128k', '-movflags', '+frag_keyframe+empty_moov+default_base_moof',
+             '-frag_duration', '1000000'],
+}
+
+# TTS longer than this multiple of its subtitle duration is truncated
+MAX_CLIP_OVERRUN = 1.2
+
+# Ducking of the original under TTS clips: how long it takes to fade down
+# before a clip and back up after it (seconds)
+DUCK_ATTACK_SECONDS = 0.08
+DUCK_RELEASE_SECONDS = 0.3
 
 
 def extract_audio_from_video(video_path: str, output_path: str) -> bool:
     """
-    Extract audio track from video using ffmpeg.
+    Extract audio track from video as 48 kHz stereo WAV.
+    Reuses the shared decode (audio_decode) so the file is not decoded again
+    when Whisper already needed it.
     
     Args:
         video_path: Path to video file
@@ -20,6 +57,23 @@ def extract_audio_from_video(video_path: str, output_path: str) -> bool:
     Returns:
         True if successful
     """
+    from audio_decode import decode_media
+    
+    decoded = decode_media(video_path)
+    if decoded is not None:
+        try:
+            samples = decoded.mix
+            with wave.open(output_path, 'wb') as out:
+                out.setnchannels(samples.shape[1])
+                out.setsampwidth(2)
+                out.setframerate(decoded.mix_sample_rate)
+                step = decoded.mix_sample_rate * 60
+                for pos in range(0, len(samples), step):
+                    out.writeframes(samples[pos:pos + step].astype('<i2').tobytes())
+            return True
+        except Exception as e:
+            print(f"Failed to write decoded audio: {e}", file=__import__('sys').stderr)
+    
     try:
         cmd = [
             'ffmpeg', '-y', '-i', video_path,
@@ -36,74 +90,567 @@ def extract_audio_from_video(video_path: str, output_path: str) -> bool:
         return False
 
 
-def create_dubbed_audio(
-    original_audio: str,
-    subtitles_with_audio: List[Dict[str, Any]],
+def read_wav(path: str, mmap: bool = False) -> Tuple[int, np.ndarray]:
+    """
+    Read a WAV file as a (frames, channels) array.
+    
+    Args:
+        path: Path to WAV file
+        mmap: Memory-map the samples instead of loading them
+        
+    Returns:
+        (sample_rate, samples)
+    """
+    from scipy.io import wavfile
+    
+    sample_rate, samples = wavfile.read(path, mmap=mmap)
+    if samples.ndim == 1:
+        samples = samples.reshape(-1, 1)
+    return sample_rate, samples
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """Convert PCM samples to a new float32 array in [-1, 1]."""
+    result = samples.astype(np.float32)
+    if samples.dtype == np.int16:
+        result *= np.float32(1 / 32768)
+    elif samples.dtype == np.int32:
+        result *= np.float32(1 / 2147483648)
+    elif samples.dtype == np.uint8:
+        result -= np.float32(128)
+        result *= np.float32(1 / 128)
+    return result
+
+
+def clip_span(subtitle: Dict[str, Any]) -> Optional[ClipSpan]:
+    """Span of a subtitle's clip in a packed TTS track, or None for a WAV file."""
+    if subtitle.get('audioOffset') is None:
+        return None
+    return subtitle['audioOffset'], subtitle['audioLength'], subtitle['audioRate']
+
+
+def load_tts_clip(
+    audio_file: str,
+    sample_rate: int,
+    channels: int,
+    span: Optional[ClipSpan] = None
+) -> Optional[np.ndarray]:
+    """
+    Load a TTS clip as float32 (frames, channels) at the given sample rate.
+    
+    Args:
+        span: Where the clip sits if audio_file is a packed TTS track
+    """
+    try:
+        if span is not None:
+            offset, length, clip_rate = span
+            clip = read_clip(audio_file, offset, length)
+        else:
+            clip_rate, clip = read_wav(audio_file)
+    except Exception as e:
+        print(f"Failed to read TTS audio {audio_file}: {e}", file=__import__('sys').stderr)
+        return None
+    
+    clip = to_float32(clip)
+    
+    # Linear resampling if the TTS rate differs from the track rate
+    if clip_rate != sample_rate and len(clip) > 1:
+        frames = int(round(len(clip) * sample_rate / clip_rate))
+        positions = np.linspace(0, len(clip) - 1, frames)
+        clip = np.stack(
+            [np.interp(positions, np.arange(len(clip)), clip[:, c]) for c in range(clip.shape[1])],
+            axis=1
+        ).astype(np.float32)
+    
+    # Mono TTS is spread over all channels; extra channels are averaged down
+    if clip.shape[1] != channels:
+        clip = clip.mean(axis=1, keepdims=True)
+    
+    return clip
+
+
+def duck_gain(
+    frames: int,
+    sample_rate: int,
+    spans: Iterable[Tuple[int, int]],
+    ducked_volume: float,
+    background_volume: float = 1.0,
+    offset_frames: int = 0
+) -> np.ndarray:
+    """
+    Gain envelope for the original audio of one buffer: background_volume
+    between clips, ducked_volume under them, with linear ramps down before
+    each clip (DUCK_ATTACK_SECONDS) and back up after it (DUCK_RELEASE_SECONDS).
+    
+    Args:
+        frames: Buffer length
+        spans: (start, end) track frames of the clips mixed over the original
+        offset_frames: Track position of the first buffer frame
+        
+    Returns:
+        float32 gain per frame
+    """
+    attack = max(1, int(DUCK_ATTACK_SECONDS * sample_rate))
+    release = max(1, int(DUCK_RELEASE_SECONDS * sample_rate))
+    # 0 = background level, 1 = fully ducked
+    depth = np.zeros(frames, dtype=np.float32)
+    
+    for start, end in spans:
+        begin = max(start - attack, offset_frames)
+        stop = min(end + release, offset_frames + frames)
+        if stop <= begin:
+            continue
+        # Positions relative to the clip start keep the ramps exact on long tracks
+        t = np.arange(begin - start, stop - start, dtype=np.float64)
+        ramps = np.minimum((t + attack) / attack, (end - start + release - t) / release)
+        np.clip(ramps, 0.0, 1.0, out=ramps)
+        target = depth[begin - offset_frames:stop - offset_frames]
+        np.maximum(target, ramps, out=target, casting='same_kind')
+    
+    depth *= np.float32(ducked_volume - background_volume)
+    depth += np.float32(background_volume)
+    return depth
+
+
+def mix_segments(
+    buffer: np.ndarray,
+    sample_rate: int,
+    subtitles_with_audio: Iterable[Dict[str, Any]],
+    tts_volume: float = 1.0,
+    offset_frames: int = 0,
+    clip_loader: Callable[..., Optional[np.ndarray]] = load_tts_clip,
+    original_volume: Optional[float] = None,
+    background_volume: float = 1.0
+) -> int:
+    """
+    Add TTS clips into a float32 (frames, channels) buffer in place.
+    
+    With original_volume set, the buffer holds the unscaled original and is
+    ducked first (see duck_gain); clips that end shortly before the buffer
+    or start shortly after it still shape the ramps at its edges.
+    
+    Args:
+        buffer: Mix buffer covering frames [offset_frames, offset_frames + len(buffer))
+        sample_rate: Sample rate of the buffer
+        subtitles_with_audio: Subtitles with 'audioFile', 'start', 'end'
+        tts_volume: Gain applied to TTS audio
+        offset_frames: Track position of the first buffer frame
+        clip_loader: Loads a clip as (audio_file, sample_rate, channels, span) -> array
+            (None if the file is missing or unreadable)
+        original_volume: Gain of the original under clips (None: leave it as is)
+        background_volume: Gain of the original between clips
+        
+    Returns:
+        Number of mixed segments
+    """
+    channels = buffer.shape[1]
+    placed = []
+    
+    for sub in subtitles_with_audio:
+        audio_file = sub.get('audioFile')
+        if not audio_file:
+            continue
+        
+        clip = clip_loader(audio_file, sample_rate, channels, clip_span(sub))
+        if clip is None:
+            continue
+        
+        start = int(round(sub['start'] * sample_rate))
+        duration = int(round((sub['end'] - sub['start']) * sample_rate))
+        
+        # Truncate TTS that is much longer than its subtitle
+        if len(clip) > duration * MAX_CLIP_OVERRUN:
+            clip = clip[:duration]
+        placed.append((start, clip))
+    
+    if original_volume is not None:
+        gain = duck_gain(
+            len(buffer), sample_rate, [(start, start + len(clip)) for start, clip in placed],
+            original_volume, background_volume, offset_frames
+        )
+        buffer *= gain[:, np.newaxis]
+    
+    mixed = 0
+    for start, clip in placed:
+        # Clip to the part that falls inside the buffer
+        begin = max(start, offset_frames)
+        end = min(start + len(clip), offset_frames + len(buffer))
+        if end <= begin:
+            continue
+        
+        target = buffer[begin - offset_frames:end - offset_frames]
+        source = clip[begin - start:end - start]
+        if tts_volume != 1.0:
+            target += source * np.float32(tts_volume)
+        else:
+            target += source
+        mixed += 1
+    
+    return mixed
+
+
+def to_pcm16(buffer: np.ndarray) -> bytes:
+    """Clip a float32 buffer to [-1, 1] in place and encode it as 16-bit PCM."""
+    np.clip(buffer, -1.0, 1.0, out=buffer)
+    buffer *= np.float32(32767)
+    return buffer.astype('<i2').tobytes()
+
+
+def iter_pcm_windows(
+    source: Union[str, np.ndarray],
+    window_frames: int,
+    sample_rate: int = 48000,
+    channels: int = 2
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Read a track window by window without loading it whole.
+    
+    Arrays (e.g. the memory-mapped PCM from audio_decode) and WAV files are
+    sliced directly; anything else (e.g. the video itself) is decoded by
+    ffmpeg into a pipe at sample_rate / channels.
+    
+    Yields:
+        (offset_frames, int16 samples of shape (frames, channels))
+    """
+    if isinstance(source, np.ndarray) or source.lower().endswith('.wav'):
+        samples = source if isinstance(source, np.ndarray) else read_wav(source, mmap=True)[1]
+        for offset in range(0, len(samples), window_frames):
+            yield offset, samples[offset:offset + window_frames]
+        return
+    
+    cmd = [
+        'ffmpeg', '-v', 'error', '-i', source,
+        '-vn',
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ar', str(sample_rate),
+        '-ac', str(channels),
+        '-'
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    frame_bytes = channels * 2
+    offset = 0
+    
+    try:
+        while True:
+            data = process.stdout.read(window_frames * frame_bytes)
+            if not data:
+                break
+            usable = len(data) - len(data) % frame_bytes
+            samples = np.frombuffer(data[:usable], dtype='<i2').reshape(-1, channels)
+            yield offset, samples
+            offset += len(samples)
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+class PcmSink:
+    """
+    Streaming 16-bit PCM output: a WAV file, or an ffmpeg encoder for any
+    other extension (m4a, ogg, mp3, ...).
+    
+    With streaming=True, Ogg/Opus and MP4/M4A outputs are encoded so that the
+    part written so far can be played back (see STREAMING_ENCODERS).
+    """
+    
+    def __init__(self, output_path: str, sample_rate: int, channels: int, streaming: bool = False):
+        self._wav = None
+        self._process = None
+        
+        if output_path.lower().endswith('.wav'):
+            self._wav = wave.open(output_path, 'wb')
+            self._wav.setnchannels(channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(sample_rate)
+        else:
+            cmd = [
+                'ffmpeg', '-y', '-v', 'error',
+                '-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels), '-i', '-'
+            ]
+            if streaming:
+                extension = os.path.splitext(output_path)[1].lower()
+                cmd += STREAMING_ENCODERS.get(extension, []) + ['-flush_packets', '1']
+            cmd.append(output_path)
+            self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    
+    def write(self, pcm: bytes):
+        if self._wav is not None:
+            self._wav.writeframes(pcm)
+        else:
+            self._process.stdin.write(pcm)
+    
+    def close(self) -> bool:
+        """Finish the output. Returns True if it was written successfully."""
+        if self._wav is not None:
+            self._wav.close()
+            return True
+        self._process.stdin.close()
+        return self._process.wait() == 0
+
+
+class ClipCache:
+    """Keeps loaded TTS clips while they can still overlap upcoming windows."""
+    
+    def __init__(self):
+        self._clips: Dict[Tuple[str, Optional[ClipSpan], int, int], Optional[np.ndarray]] = {}
+    
+    def load(
+        self,
+        audio_file: str,
+        sample_rate: int,
+        channels: int,
+        span: Optional[ClipSpan] = None
+    ) -> Optional[np.ndarray]:
+        key = (audio_file, span, sample_rate, channels)
+        if key not in self._clips:
+            self._clips[key] = load_tts_clip(audio_file, sample_rate, channels, span)
+        return self._clips[key]
+    
+    def retain(self, clips: set):
+        """Drop clips that are no longer needed ((audio_file, span) pairs)."""
+        for key in [k for k in self._clips if k[:2] not in clips]:
+            del self._clips[key]
+
+
+def render_dubbed_track(
+    source: Union[str, np.ndarray],
+    subtitles_with_audio: Union[List[Dict[str, Any]], SubtitleIndex],
     output_path: str,
-    original_volume: float = 0.15,  # 15% of original volume (background)
-    tts_volume: float = 1.0
+    original_volume: float = 0.15,
+    tts_volume: float = 1.0,
+    window_seconds: float = 30.0,
+    background_volume: float = 1.0,
+    sample_rate: int = 48000,
+    channels: int = 2
 ) -> bool:
     """
-    Create dubbed audio by mixing original (quiet) with TTS voice-over.
+    Render the dubbed track in fixed-size windows with constant memory use.
+    
+    The source is memory-mapped (WAV) or decoded by ffmpeg into a pipe. For
+    each window only the TTS segments that intersect it are mixed, and the
+    result is streamed to a WAV file or an ffmpeg encoder.
     
     Args:
-        original_audio: Path to original audio WAV
-        subtitles_with_audio: List of subtitles with 'audioFile', 'start', 'end'
-        output_path: Path to save mixed audio
-        original_volume: Volume of original audio (0.0-1.0)
+        source: Original audio WAV, the video file itself, or int16
+            (frames, channels) samples at sample_rate
+        subtitles_with_audio: Subtitles with 'audioFile', 'start', 'end', or
+            a SubtitleIndex of them
+        output_path: Output file (.wav is written directly, others via ffmpeg)
+        original_volume: Volume of original audio under TTS clips (0.0-1.0)
         tts_volume: Volume of TTS audio (0.0-1.0)
+        window_seconds: Window length
+        background_volume: Volume of original audio between clips
+        sample_rate: Rate of array sources / decode rate for non-WAV files
+        channels: Decode channel count for non-WAV files
         
     Returns:
         True if successful
     """
+    if isinstance(subtitles_with_audio, SubtitleIndex):
+        index = subtitles_with_audio
+    else:
+        index = SubtitleIndex.from_subtitles(
+            {**s, 'id': i} for i, s in enumerate(subtitles_with_audio) if s.get('audioFile')
+        )
+    
+    if isinstance(source, np.ndarray):
+        channels = source.shape[1]
+    elif source.lower().endswith('.wav'):
+        sample_rate, probe = read_wav(source, mmap=True)
+        channels = probe.shape[1]
+        del probe
+    
+    window_frames = max(1, int(window_seconds * sample_rate))
+    clips = ClipCache()
+    sink = None
+    
     try:
-        from pydub import AudioSegment
-        
-        # Load original audio
-        original = AudioSegment.from_wav(original_audio)
-        
-        # Lower original volume (keep as background)
-        original_db_change = 20 * __import__('math').log10(original_volume) if original_volume > 0 else -60
-        background = original + original_db_change
-        
-        # Create output audio starting with background
-        output = background
+        sink = PcmSink(output_path, sample_rate, channels)
         
-        # Overlay TTS segments
-        for sub in subtitles_with_audio:
-            audio_file = sub.get('audioFile')
-            if not audio_file or not os.path.exists(audio_file):
-                continue
+        for offset, samples in iter_pcm_windows(source, window_frames, sample_rate, channels):
+            buffer = to_float32(samples)
             
-            start_ms = int(sub['start'] * 1000)
-            end_ms = int(sub['end'] * 1000)
-            duration_ms = end_ms - start_ms
+            # Segments whose audio or ducking ramps can intersect the window;
+            # a clip may run past its subtitle before being truncated
+            window_start = offset / sample_rate - DUCK_RELEASE_SECONDS
+            window_end = (offset + len(buffer)) / sample_rate + DUCK_ATTACK_SECONDS
+            active = [
+                s for s in index.range(window_start, window_end, extend=MAX_CLIP_OVERRUN)
+                if s['audioFile']
+            ]
             
-            # Load TTS audio
-            tts = AudioSegment.from_wav(audio_file)
+            clips.retain({(s['audioFile'], clip_span(s)) for s in active})
+            mix_segments(
+                buffer, sample_rate, active, tts_volume, offset, clips.load,
+                original_volume=original_volume, background_volume=background_volume
+            )
             
-            # Adjust TTS speed if needed to fit duration
-            if len(tts) > duration_ms * 1.2:  # If TTS is >20% longer
-                # Speed up (simple approach: truncate for now)
-                tts = tts[:duration_ms]
-            
-            # Apply TTS volume
-            if tts_volume != 1.0:
-                tts_db_change = 20 * __import__('math').log10(tts_volume) if tts_volume > 0 else -60
-                tts = tts + tts_db_change
-            
-            # Overlay at the correct position
-            output = output.overlay(tts, position=start_ms)
+            sink.write(to_pcm16(buffer))
         
-        # Export
-        output.export(output_path, format='wav')
-        return True
+        ok = sink.close()
+        sink = None
+        return ok
         
     except Exception as e:
-        print(f"Failed to mix audio: {e}", file=__import__('sys').stderr)
+        print(f"Failed to render dubbed track: {e}", file=__import__('sys').stderr)
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        if sink is not None:
+            sink.close()
+
+
+class IncrementalDubber:
+    """
+    Mixes and encodes the dubbed track while subtitles are still arriving.
+    
+    A window is final once every subtitle starting before its end has been
+    added (for in-order jobs: once a later subtitle arrives); advance() then
+    mixes it and pushes it to a long-running encoder, so the output is
+    playable up to the processing point. Refined clips only reach windows
+    that were not encoded yet.
+    """
+    
+    def __init__(
+        self,
+        source: np.ndarray,
+        output_path: str,
+        sample_rate: int = 48000,
+        original_volume: float = 0.15,
+        tts_volume: float = 1.0,
+        window_seconds: float = DUB_WINDOW_SECONDS,
+        background_volume: float = 1.0
+    ):
+        """
+        Args:
+            source: int16 (frames, channels) original audio, e.g. the
+                memory-mapped mix from audio_decode.decode_media
+            output_path: Dubbed track (.ogg/.opus or .m4a for playback while
+                encoding, anything ffmpeg knows otherwise)
+        """
+        self.source = source
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.original_volume = original_volume
+        self.tts_volume = tts_volume
+        self.background_volume = background_volume
+        self.index = SubtitleIndex()
+        self._window_frames = max(1, int(window_seconds * sample_rate))
+        self._written = 0
+        self._clips = ClipCache()
+        self._lock = threading.Lock()
+        self._sink = PcmSink(output_path, sample_rate, source.shape[1], streaming=True)
+    
+    @property
+    def position(self) -> float:
+        """Seconds of the dubbed track encoded so far."""
+        return self._written / self.sample_rate
+    
+    def add(self, subtitle: Dict[str, Any]):
+        """Add a finished subtitle (or a refined one replacing it by id)."""
+        with self._lock:
+            if subtitle.get('audioFile'):
+                self.index.add(subtitle)
+    
+    def advance(self, until: float) -> bool:
+        """
+        Encode every whole window that ends by `until` (seconds). The caller
+        guarantees that all subtitles starting before `until` were added.
+        
+        Returns:
+            True if the encoded part of the track grew
+        """
+        with self._lock:
+            # A clip starting just after a window already ducks its end
+            last = min(int((until - DUCK_ATTACK_SECONDS) * self.sample_rate), len(self.source))
+            written = self._written
+            while self._written + self._window_frames <= last:
+                self._write_window()
+            return self._written > written
+    
+    def _write_window(self):
+        offset = self._written
+        samples = self.source[offset:offset + self._window_frames]
+        buffer = to_float32(samples)
+        
+        window_start = offset / self.sample_rate - DUCK_RELEASE_SECONDS
+        window_end = (offset + len(buffer)) / self.sample_rate + DUCK_ATTACK_SECONDS
+        active = [
+            s for s in self.index.range(window_start, window_end, extend=MAX_CLIP_OVERRUN)
+            if s['audioFile']
+        ]
+        self._clips.retain({(s['audioFile'], clip_span(s)) for s in active})
+        mix_segments(
+            buffer, self.sample_rate, active, self.tts_volume, offset, self._clips.load,
+            original_volume=self.original_volume, background_volume=self.background_volume
+        )
+        
+        self._sink.write(to_pcm16(buffer))
+        self._written += len(samples)
+        # Cues whose clips (and release ramps) cannot reach the next window
+        # are done with, so the index stays small however long the job runs
+        self.index.prune(self.position - DUCK_RELEASE_SECONDS, extend=MAX_CLIP_OVERRUN)
+    
+    def finish(self) -> bool:
+        """Encode the rest of the track and close the output."""
+        with self._lock:
+            try:
+                while self._written < len(self.source):
+                    self._write_window()
+                return self._sink.close()
+            except Exception as e:
+                print(f"Failed to render dubbed track: {e}", file=__import__('sys').stderr)
+                self._close_sink()
+                return False
+    
+    def close(self):
+        """Stop encoding; the output holds the part written so far."""
+        with self._lock:
+            self._close_sink()
+    
+    def _close_sink(self):
+        # The encoder may already be gone (broken pipe)
+        try:
+            self._sink.close()
+        except OSError:
+            pass
+
+
+def create_dubbed_audio(
+    original_audio: Union[str, np.ndarray],
+    subtitles_with_audio: List[Dict[str, Any]],
+    output_path: str,
+    original_volume: float = 0.15,  # 15% of original volume under the voice-over
+    tts_volume: float = 1.0
+) -> bool:
+    """
+    Create dubbed audio by mixing the original, ducked under each line, with
+    the TTS voice-over.
+    
+    The original is processed in fixed windows (see render_dubbed_track), so
+    memory use does not depend on the length of the video.
+    
+    Args:
+        original_audio: Path to original audio WAV (or the video file), or
+            the 48 kHz mix samples from audio_decode.decode_media
+        subtitles_with_audio: List of subtitles with 'audioFile', 'start', 'end'
+        output_path: Path to save mixed audio
+        original_volume: Volume of original audio under TTS clips (0.0-1.0)
+        tts_volume: Volume of TTS audio (0.0-1.0)
+        
+    Returns:
+        True if successful
+    """
+    return render_dubbed_track(
+        original_audio,
+        subtitles_with_audio,
+        output_path,
+        original_volume=original_volume,
+        tts_volume=tts_volume
+    )
 
 
 def get_audio_duration(audio_path: str) -> float:
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Headless batch processing.
+
+Runs every video of a directory (recursively) or a manifest file through a
+pool of persistent workers (`process.py --server`, one job at a time each),
+so every worker loads its models once for the whole batch. Next to each
+video it writes `<name>.<suffix>.srt` / `.vtt` / `.json` and, with --tts,
+the dubbed track. The dubbed track is encoded to a temporary name and only
+renamed once it is complete. A `<name>.<suffix>.manifest.json` records what
+a finished job produced (no dubbed track when TTS was unavailable); videos
+whose outputs already exist and are newer than the video are skipped, so an
+interrupted batch can simply be started again.
+
+Usage:
+    python batch.py DIR_OR_MANIFEST [--workers 2] [--formats srt vtt] [--tts]
+                    [--dub-format ogg] [--force] [--report report.json]
+
+A manifest is a text file with one path per line (relative to the manifest;
+blank lines and lines starting with # are ignored).
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from subtitle_store import iter_subtitles
+
+VIDEO_EXTENSIONS = {
+    ".mp4", ".mkv", ".avi", ".mov", ".webm", ".m4v", ".wmv", ".flv", ".ts",
+    ".mp3", ".m4a", ".wav", ".flac", ".ogg", ".opus"
+}
+
+SUBTITLE_FORMATS = ["srt", "vtt", "json"]
+DUB_FORMATS = ["ogg", "m4a", "wav"]
+
+# Outputs are named <video name>.<suffix>.<format>
+DEFAULT_SUFFIX = "ru"
+
+PROCESS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "process.py")
+
+
+def find_videos(source: str) -> List[str]:
+    """Media files of a directory (recursively, sorted) or listed in a manifest."""
+    if os.path.isdir(source):
+        found = []
+        for root, dirs, names in os.walk(source):
+            dirs.sort()
+            found.extend(
+                os.path.join(root, name) for name in sorted(names)
+                if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+            )
+        return found
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [
+        os.path.normpath(os.path.join(base, line))
+        for line in lines if line and not line.startswith("#")
+    ]
+
+
+def output_paths(video_path: str, formats: List[str], dub_format: Optional[str], suffix: str) -> Dict[str, str]:
+    """Output file per format ("dub" for the dubbed track)."""
+    stem = f"{os.path.splitext(video_path)[0]}.{suffix}"
+    paths = {fmt: f"{stem}.{fmt}" for fmt in formats}
+    if dub_format:
+        paths["dub"] = f"{stem}.{dub_format}"
+    return paths
+
+
+def _stem(outputs: Dict[str, str]) -> str:
+    """<video name>.<suffix> shared by all outputs."""
+    return os.path.splitext(next(iter(outputs.values())))[0]
+
+
+def manifest_path(outputs: Dict[str, str]) -> str:
+    """File recording what the last finished job for these outputs produced."""
+    return _stem(outputs) + ".manifest.json"
+
+
+def is_complete(video_path: str, outputs: Dict[str, str]) -> bool:
+    """
+    All outputs exist and are newer than the video. The dubbed track is not
+    required if the manifest says the worker could not voice subtitles.
+    """
+    required = list(outputs.values())
+    try:
+        with open(manifest_path(outputs), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not manifest.get("tts", True):
+            required = [path for kind, path in outputs.items() if kind != "dub"]
+        required.append(manifest_path(outputs))
+    except (OSError, ValueError):
+        pass
+
+    try:
+        source_mtime = os.path.getmtime(video_path)
+        return all(os.path.getmtime(path) >= source_mtime for path in required)
+    except OSError:
+        return False
+
+
+def write_manifest(outputs: Dict[str, str], tts: bool):
+    """
+    Record a finished job's outputs and whether its worker had TTS (see
+    is_complete).
+    """
+    path = manifest_path(outputs)
+    tmp_path = path + ".tmp"
+    produced = sorted(kind for kind in outputs if kind != "dub" or tts)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"outputs": produced, "tts": tts}, f)
+    os.replace(tmp_path, path)
+
+
+def probe_duration(video_path: str) -> Optional[float]:
+    """Duration of a media file in seconds (via ffprobe), or None."""
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1", video_path
+            ],
+            capture_output=True, text=True, timeout=60
+        ).stdout
+        return float(output.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+# Subtitle formats
+
+def _timestamp(seconds: float, separator: str) -> str:
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+def _text(subtitle: Dict[str, Any]) -> str:
+    return (subtitle.get("translatedText") or subtitle.get("text") or "").strip()
+
+
+def write_srt(subtitles: Iterator[Dict[str, Any]], f):
+    for number, subtitle in enumerate(subtitles, start=1):
+        f.write(f"{number}\n")
+        f.write(f"{_timestamp(subtitle['start'], ',')} --> {_timestamp(subtitle['end'], ',')}\n")
+        f.write(f"{_text(subtitle)}\n\n")
+
+
+def write_vtt(subtitles: Iterator[Dict[str, Any]], f):
+    f.write("WEBVTT\n\n")
+    for subtitle in subtitles:
+        f.write(f"{_timestamp(subtitle['start'], '.')} --> {_timestamp(subtitle['end'], '.')}\n")
+        f.write(f"{_text(subtitle)}\n\n")
+
+
+def write_json(subtitles: Iterator[Dict[str, Any]], f):
+    # Clip references point into the job's temporary packed track
+    fields = ("id", "start", "end", "text", "translatedText")
+    json.dump([{key: s.get(key) for key in fields} for s in subtitles], f, ensure_ascii=False, indent=1)
+
+
+WRITERS = {"srt": write_srt, "vtt": write_vtt, "json": write_json}
+
+
+def export_subtitles(jsonl_path: str, outputs: Dict[str, str]):
+    """Write every subtitle format from a job's JSONL file (atomically)."""
+    for fmt, writer in WRITERS.items():
+        path = outputs.get(fmt)
+        if path is None:
+            continue
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            writer(iter_subtitles(jsonl_path), f)
+        os.replace(tmp_path, path)
+
+
+class Worker:
+    """A `process.py --server` process running one job at a time."""
+
+    def __init__(self, number: int, env: Optional[Dict[str, str]] = None):
+        self.number = number
+        self.env = env or {}
+        self.process: Optional[subprocess.Popen] = None
+        # Whether the worker can voice subtitles (from its READY message)
+        self.tts = False
+        self._job = 0
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, PROCESS_SCRIPT, "--server", "--max-jobs", "1"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            env={**os.environ, **self.env, "PYTHONUNBUFFERED": "1"}
+        )
+        for kind, data in self._messages():
+            if kind == "READY":
+                self.tts = bool(data.get("tts"))
+                return
+        raise RuntimeError(f"Worker {self.number} exited during startup")
+
+    def _messages(self) -> Iterator[tuple]:
+        for line in self.process.stdout:
+            kind, separator, payload = line.rstrip("\n").partition(":")
+            if not separator or not kind.isupper():
+                continue
+            try:
+                yield kind, json.loads(payload)
+            except ValueError:
+                continue
+
+    def run(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one job and wait for it to finish.
+
+        Returns:
+            The DONE payload plus the job's final "metrics" summary and the
+            final "dub" progress (None unless the dubbed track was completed)
+
+        Raises:
+            RuntimeError: The worker process died
+        """
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+
+        self._job += 1
+        job_id = f"{self.number}-{self._job}"
+        self.process.stdin.write(json.dumps({"cmd": "process", "id": job_id, **request}) + "\n")
+        self.process.stdin.flush()
+
+        metrics = None
+        dub = None
+        for kind, data in self._messages():
+            if data.get("job") != job_id:
+                continue
+            if kind == "METRICS" and data.get("final"):
+                metrics = data
+            elif kind == "DUB" and data.get("final"):
+                dub = data
+            elif kind == "DONE":
+                return {**data, "metrics": metrics, "dub": dub}
+        self.process = None
+        raise RuntimeError(f"Worker {self.number} exited during the job")
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.write(json.dumps({"cmd": "shutdown"}) + "\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
+
+
+def worker_environments(count: int, mode: Optional[str]) -> List[Dict[str, str]]:
+    """
+    Give every worker its own slice of the cores, so their model thread
+    pools (sized from the slice, see resources.py) never compete.
+    """
+    from resources import usable_cores
+
+    cores = usable_cores()
+    environments = []
+    for i in range(count):
+        own = cores[i * len(cores) // count:(i + 1) * len(cores) // count] or [cores[i % len(cores)]]
+        env = {"SUBPLAYER_CPU_CORES": ",".join(map(str, own))}
+        if mode:
+            env["SUBPLAYER_CPU_PRESET"] = mode
+        environments.append(env)
+    return environments
+
+
+def process_item(worker: Worker, video_path: str, outputs: Dict[str, str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one video on a worker and export its outputs."""
+    # Outputs share one stem; the job streams its subtitles (and packed TTS
+    # track) to temporary files there. The dubbed track is encoded under a
+    # temporary name, so a partial one is never taken for a finished one.
+    stem = _stem(outputs)
+    jsonl_path = stem + ".jsonl"
+    dub_path = outputs.get("dub")
+    dub_tmp = f"{stem}.tmp{os.path.splitext(dub_path)[1]}" if dub_path else None
+    temporary = [jsonl_path, stem + ".spsi", stem + ".pcm", dub_tmp]
+
+    started = time.perf_counter()
+    try:
+        done = worker.run({
+            "video_path": video_path,
+            "output_path": jsonl_path,
+            "dub_path": dub_tmp,
+            **options
+        })
+        # Without TTS the worker writes no dubbed track
+        voiced = dub_path is not None and worker.tts
+        if done.get("ok") and voiced and not done.get("dub"):
+            done = {**done, "ok": False, "error": "dubbed track failed"}
+        if done.get("ok"):
+            export_subtitles(jsonl_path, outputs)
+            if voiced:
+                os.replace(dub_tmp, dub_path)
+            write_manifest(outputs, worker.tts)
+    except (OSError, RuntimeError) as e:
+        done = {"ok": False, "error": str(e)}
+    finally:
+        for path in temporary:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    result = {
+        "path": video_path,
+        "ok": bool(done.get("ok")),
+        "seconds": round(time.perf_counter() - started, 3),
+        "duration": probe_duration(video_path)
+    }
+    if not result["ok"]:
+        result["error"] = done.get("error", "unknown error")
+    if done.get("metrics"):
+        result["metrics"] = done["metrics"]
+    return result
+
+
+def run_batch(
+    videos: List[str],
+    workers: int,
+    formats: List[str],
+    dub_format: Optional[str],
+    suffix: str = DEFAULT_SUFFIX,
+    force: bool = False,
+    options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Process videos on a pool of workers.
+
+    Returns:
+        Report with per-file results and aggregate throughput
+    """
+    started = time.perf_counter()
+    pending: "queue.Queue[tuple]" = queue.Queue()
+    skipped = []
+    for video_path in videos:
+        outputs = output_paths(video_path, formats, dub_format, suffix)
+        if not force and is_complete(video_path, outputs):
+            skipped.append(video_path)
+        else:
+            pending.put((video_path, outputs))
+
+    total = pending.qsize()
+    results = []
+    lock = threading.Lock()
+    print(f"{len(videos)} files: {total} to process, {len(skipped)} already done", file=sys.stderr)
+
+    def work(worker: Worker):
+        try:
+            while True:
+                try:
+                    video_path, outputs = pending.get_nowait()
+                except queue.Empty:
+                    return
+                result = process_item(worker, video_path, outputs, options or {})
+                with lock:
+                    results.append(result)
+                    status = "ok" if result["ok"] else f"failed: {result['error']}"
+                    speed = (
+                        f" ({result['duration'] / result['seconds']:.1f}x)"
+                        if result["ok"] and result["duration"] else ""
+                    )
+                    print(
+                        f"[{len(results)}/{total}] {video_path}: {status}, {result['seconds']:.1f}s{speed}",
+                        file=sys.stderr
+                    )
+        finally:
+            worker.stop()
+
+    count = max(1, min(workers, total))
+    threads = [
+        threading.Thread(target=work, args=(Worker(number, env),), name=f"batch-worker-{number}")
+        for number, env in enumerate(worker_environments(count, (options or {}).get("mode")), start=1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    done = [r for r in results if r["ok"]]
+    media_seconds = sum(r["duration"] or 0.0 for r in done)
+    return {
+        "files": len(videos),
+        "processed": len(done),
+        "failed": len(results) - len(done),
+        "skipped": len(skipped),
+        "workers": len(threads),
+        "elapsed": round(elapsed, 3),
+        "media_seconds": round(media_seconds, 3),
+        # Media seconds processed per wall-clock second, all workers together
+        "throughput": round(media_seconds / elapsed, 2) if elapsed and media_seconds else None,
+        "results": results
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SubPlayer batch processing")
+    parser.add_argument("source", help="Directory of videos or a manifest file (one path per line)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (each loads the models once)")
+    parser.add_argument("--formats", nargs="+", choices=SUBTITLE_FORMATS, default=["srt"],
+                        help="Subtitle files to write next to each video")
+    parser.add_argument("--tts", action="store_true", help="Voice the translation and write a dubbed track")
+    parser.add_argument("--dub-format", choices=DUB_FORMATS, default="ogg",
+                        help="Container of the dubbed track (with --tts)")
+    parser.add_argument("--suffix", default=DEFAULT_SUFFIX, help="Output names are <video>.<suffix>.<format>")
+    parser.add_argument("--mode", choices=["latency", "throughput"], default="throughput",
+                        help="Whisper decoding mode (batched throughput suits batch runs)")
+    parser.add_argument("--cpu-threads", type=int, default=None,
+                        help="Whisper cpu_threads per worker (default: its share of the worker's cores)")
+    parser.add_argument("--force", action="store_true", help="Process files whose outputs already exist")
+    parser.add_argument("--report", default=None, help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    videos = find_videos(args.source)
+    if not videos:
+        print(f"No media files in {args.source}", file=sys.stderr)
+        sys.exit(1)
+
+    workers = max(1, args.workers)
+    options = {"tts": args.tts, "mode": args.mode, "cpu_threads": args.cpu_threads}
+    report = run_batch(
+        videos,
+        workers,
+        args.formats,
+        args.dub_format if args.tts else None,
+        args.suffix,
+        args.force,
+        options
+    )
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    print(
+        f"Done: {report['processed']} processed, {report['failed']} failed, {report['skipped']} skipped"
+        + (f", {report['throughput']}x real time" if report["throughput"] else ""),
+        file=sys.stderr
+    )
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
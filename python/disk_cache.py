@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Size-bounded on-disk cache with LRU eviction.
+Entries are plain files; the file mtime records the last access.
+"""
+
+import os
+import tempfile
+import time
+from typing import Optional, Iterable, List, Dict, Any
+
+# Root directory for all SubPlayer caches (next to the downloaded models)
+CACHE_ROOT = os.environ.get(
+    "SUBPLAYER_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "cache")
+)
+
+
+class DiskCache:
+    """
+    Directory of cache files addressed by key.
+    Reading an entry refreshes its mtime, and writing evicts the least
+    recently used entries once the total size exceeds max_bytes.
+
+    The total size is tracked in memory after the first write, so caches
+    with many small entries are not rescanned on every put.
+    """
+
+    def __init__(self, name: str, max_bytes: int, suffix: str = ""):
+        self.directory = os.path.join(CACHE_ROOT, name)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._size: Optional[int] = None
+
+    def _added(self, path: str, keep: Iterable[str] = ()):
+        """
+        Account for a newly written entry and evict if over the limit.
+        Entries whose keys are in keep (the ones just written) are not evicted.
+        """
+        if self._size is None:
+            self._size = self.total_size()
+        else:
+            try:
+                self._size += os.path.getsize(path)
+            except OSError:
+                pass
+        if self._size > self.max_bytes:
+            self.evict(keep=keep)
+
+    def path_for(self, key: str) -> str:
+        """Return the file path used for a key (whether or not it exists)."""
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up an entry.
+
+        Returns:
+            Path to the cached file, or None on a miss
+        """
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def read_bytes(self, key: str) -> Optional[bytes]:
+        """Return the cached contents for a key, or None on a miss."""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """
+        Store data under a key atomically and enforce the size limit.
+
+        Returns:
+            Path to the cached file
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._added(path, keep=(key,))
+        return path
+
+    def put_file(self, key: str, source_path: str, keep: Iterable[str] = ()) -> str:
+        """
+        Move an existing file into the cache under a key. Neither it nor the
+        entries in keep (e.g. other files of the same item) are evicted to
+        make room for it.
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+        self._added(path, keep=(key, *keep))
+        return path
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """List cache entries, most recently used first."""
+        result = []
+        if not os.path.isdir(self.directory):
+            return result
+
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp") or not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = name[:len(name) - len(self.suffix)] if self.suffix else name
+                result.append({
+                    "key": key,
+                    "path": path,
+                    "size": stat.st_size,
+                    "accessed": stat.st_mtime
+                })
+
+        result.sort(key=lambda e: e["accessed"], reverse=True)
+        return result
+
+    def total_size(self) -> int:
+        """Total size of all entries in bytes."""
+        return sum(e["size"] for e in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None, keep: Iterable[str] = ()) -> int:
+        """
+        Remove least recently used entries until the cache fits, skipping
+        the keys in keep (the cache stays over the limit if they alone are).
+
+        Returns:
+            Number of removed entries
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        keep = set(keep)
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        entries = [e for e in entries if e["key"] not in keep]
+        removed = 0
+
+        while entries and total > limit:
+            entry = entries.pop()
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                continue
+            total -= entry["size"]
+            removed += 1
+
+        self._size = total
+        return removed
+
+    def purge(self, older_than_days: Optional[float] = None) -> int:
+        """
+        Remove all entries, or only those not used for the given number of days.
+
+        Returns:
+            Number of removed entries
+        """
+        cutoff = None
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 86400
+
+        removed = 0
+        for entry in self.entries():
+            if cutoff is not None and entry["accessed"] >= cutoff:
+                continue
+            try:
+                os.remove(entry["path"])
+                removed += 1
+            except OSError:
+                pass
+
+        self._size = None
+        return removed
+
+
+def format_size(size: float) -> str:
+    """Human-readable byte count."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def run_cache_cli(cache: DiskCache, argv: List[str], prog: str):
+    """
+    Shared command line interface for inspecting and purging a cache.
+
+    Commands:
+        stats                   Entry count and total size
+        list                    Entries, most recently used first
+        purge [--older-than D]  Remove everything or entries unused for D days
+        evict                   Enforce the configured size limit
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entry count and total size")
+    sub.add_parser("list", help="List entries")
+    purge = sub.add_parser("purge", help="Remove entries")
+    purge.add_argument("--older-than", type=float, default=None, metavar="DAYS")
+    sub.add_parser("evict", help="Evict entries above the size limit")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(e["size"] for e in entries)
+        print(f"Directory: {cache.directory}")
+        print(f"Entries:   {len(entries)}")
+        print(f"Size:      {format_size(total)} / {format_size(cache.max_bytes)}")
+    elif args.command == "list":
+        for e in cache.entries():
+            accessed = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["accessed"]))
+            print(f"{e['key']}  {format_size(e['size']):>10}  {accessed}")
+    elif args.command == "purge":
+        print(f"Removed {cache.purge(args.older_than)} entries")
+    elif args.command == "evict":
+        print(f"Removed {cache.evict()} entries")
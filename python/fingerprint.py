@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Fast media file fingerprinting for cache keys.
+Reads a few sampled blocks instead of hashing the whole file.
+"""
+
+import hashlib
+import os
+
+# Number of evenly spaced blocks to hash and their size
+SAMPLE_BLOCKS = 16
+BLOCK_SIZE = 64 * 1024
+
+
+def media_fingerprint(path: str) -> str:
+    """
+    Compute a fingerprint of a media file.
+    Combines size, mtime and a hash of sampled blocks, so a multi-gigabyte
+    video is fingerprinted in milliseconds.
+    
+    Args:
+        path: Path to the media file
+        
+    Returns:
+        Hex digest identifying the file contents
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{size}:{stat.st_mtime_ns}".encode())
+    
+    with open(path, "rb") as f:
+        if size <= SAMPLE_BLOCKS * BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            step = (size - BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for i in range(SAMPLE_BLOCKS):
+                f.seek(i * step)
+                digest.update(f.read(BLOCK_SIZE))
+    
+    return digest.hexdigest()
+
+
+# For testing
+if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) < 2:
+        print("Usage: python fingerprint.py <file_path>")
+        sys.exit(1)
+    
+    print(media_fingerprint(sys.argv[1]))
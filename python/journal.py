@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Resumable job journal.
+
+Every subtitle a job finishes (transcript, translation and TTS file) is
+appended to a JSONL file keyed by the media fingerprint and a hash of the
+job settings, and fsync'd, so a crash or quit at 80% of a long file loses
+at most the segment in flight. When the same file is processed again with
+the same settings, the journal is replayed and transcription continues
+after the covered audio. A running job holds an exclusive lock on its
+journal; a second job for the same file and settings gets a private one.
+
+Usage:
+    python journal.py list
+    python journal.py purge
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Any, Optional, Set
+
+from disk_cache import CACHE_ROOT, format_size
+from fingerprint import media_fingerprint
+
+try:
+    import fcntl
+except ImportError:  # Windows: journals are not locked
+    fcntl = None
+
+JOURNAL_DIR = os.path.join(CACHE_ROOT, "journals")
+
+# Journals of jobs that were never resumed are removed after this many days
+MAX_AGE_DAYS = 30
+
+# Subtitle fields pointing at a clip in a job's packed TTS track
+PACKED_CLIP_FIELDS = ("audioOffset", "audioLength", "audioRate")
+
+
+class JobJournal:
+    """
+    Append-only record of the subtitles finished by one job.
+
+    The first line holds the job settings; a journal written with different
+    settings is discarded. Each further line is one of:
+        {"subtitle": {...}, "window": 3, "window_done": true}
+        {"window": 4, "window_done": true}     (a window without subtitles)
+        {"update": {...}}     (a refined subtitle replacing one by id)
+    A torn last line from a crash is ignored.
+    """
+
+    def __init__(self, media_path: str, settings: Dict[str, Any]):
+        name = f"{media_fingerprint(media_path)}-{_settings_hash(settings)}"
+        self.path = os.path.join(JOURNAL_DIR, name + ".jsonl")
+        self.settings = settings
+        self._subtitles: Dict[int, Dict[str, Any]] = {}
+        self._refined: Set[int] = set()
+        self.windows_done: Set[int] = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        _purge_stale()
+
+        self._file = open(self.path, "a+", encoding="utf-8")
+        if not _try_lock(self._file):
+            # Another job runs on the same file with the same settings and
+            # owns the journal; this one neither resumes nor touches it
+            self._file.close()
+            print(f"Journal {name} is in use by another job; not resuming", file=sys.stderr)
+            fd, self.path = tempfile.mkstemp(prefix=name + "-", suffix=".jsonl", dir=JOURNAL_DIR)
+            self._file = os.fdopen(fd, "a+", encoding="utf-8")
+            _try_lock(self._file)
+
+        if not self._load():
+            self._file.truncate(0)
+            self._file.write(json.dumps({"settings": settings}) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _load(self) -> bool:
+        """Read an existing journal; returns False if there is none to resume."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return False
+
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if not header or header.get("settings") != self.settings:
+            return False
+
+        # Drop a torn last line so new entries start on a line of their own
+        if not lines[-1].endswith("\n"):
+            with open(self.path, "r+b") as f:
+                f.truncate(sum(len(line.encode("utf-8")) for line in lines[:-1]))
+            lines = lines[:-1]
+
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            if "subtitle" in entry:
+                subtitle = entry["subtitle"]
+                self._subtitles[subtitle["id"]] = subtitle
+                if entry.get("window_done"):
+                    self.windows_done.add(entry["window"])
+            elif "update" in entry:
+                subtitle = entry["update"]
+                self._subtitles[subtitle["id"]] = subtitle
+                self._refined.add(subtitle["id"])
+            elif entry.get("window_done"):
+                self.windows_done.add(entry["window"])
+
+        # Clips are byte ranges of the interrupted job's packed track, which
+        # the resumed job does not reuse (and which may be gone); the job
+        # voices them again into its own track
+        for subtitle in self._subtitles.values():
+            subtitle["audioFile"] = None
+            for field in PACKED_CLIP_FIELDS:
+                subtitle.pop(field, None)
+
+        return True
+
+    def subtitles(self) -> List[Dict[str, Any]]:
+        """Journaled subtitles in time order."""
+        return sorted(self._subtitles.values(), key=lambda subtitle: subtitle["start"])
+
+    def is_refined(self, subtitle_id: int) -> bool:
+        """Whether a progressive draft was already replaced by its refined version."""
+        return subtitle_id in self._refined
+
+    @property
+    def next_id(self) -> int:
+        """First subtitle id not used by the journal."""
+        return max(self._subtitles, default=0) + 1
+
+    @property
+    def resume_time(self) -> float:
+        """End of the last journaled subtitle (seconds)."""
+        return max((subtitle["end"] for subtitle in self._subtitles.values()), default=0.0)
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record(self, subtitle: Dict[str, Any], window: Optional[int] = None, window_done: bool = False):
+        """Append a finished subtitle."""
+        entry: Dict[str, Any] = {"subtitle": subtitle}
+        if window is not None:
+            entry["window"] = window
+            entry["window_done"] = window_done
+        self._append(entry)
+
+    def record_window(self, window: int):
+        """Append a window that finished without any subtitle."""
+        self._append({"window": window, "window_done": True})
+
+    def record_update(self, subtitle: Dict[str, Any]):
+        """Append a refined version of a journaled subtitle."""
+        self._append({"update": subtitle})
+
+    def close(self):
+        """Stop writing and release the lock; the journal stays for a later resume."""
+        with self._lock:
+            self._file.close()
+
+    def complete(self):
+        """The job finished: the journal is no longer needed."""
+        # Removed while still locked, so no other job resumes it meanwhile
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.close()
+
+
+def _settings_hash(settings: Dict[str, Any]) -> str:
+    """Short stable hash of job settings (part of the journal name)."""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _try_lock(f) -> bool:
+    """Take an exclusive lock on an open journal; False if another job holds it."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _purge_stale():
+    """Remove journals older than MAX_AGE_DAYS."""
+    cutoff = time.time() - MAX_AGE_DAYS * 86400
+    for entry in os.scandir(JOURNAL_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    journals = list(os.scandir(JOURNAL_DIR)) if os.path.isdir(JOURNAL_DIR) else []
+
+    if command == "list":
+        for entry in journals:
+            stat = entry.stat()
+            age = time.strftime("%Y-%m-%d %H:%M", time.localtime(stat.st_mtime))
+            print(f"{entry.name}  {format_size(stat.st_size):>10}  {age}")
+    elif command == "purge":
+        for entry in journals:
+            os.remove(entry.path)
+        print(f"Removed {len(journals)} journals")
+    else:
+        print("Usage: python journal.py [list|purge]")
+        sys.exit(1)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Per-job telemetry.
+
+Each pipeline stage charges the time it spends producing items to a named
+entry: wall time, CPU time of the stage thread and the seconds of audio it
+handled, which gives a real-time factor per stage (wall / audio). This
+shows whether Whisper, Argos, Silero or the mixer is the bottleneck on a
+given machine. Process-wide statistics such as cache counters are sampled
+when a job starts tracking them and reported as differences.
+
+Peak memory cannot be reset per job: peak_rss_mb is the peak of the whole
+process (in server mode, of every job so far), and peak_rss_at_start_mb is
+its value when the job started. Only a larger peak was reached by this job.
+
+A job sends snapshot() as periodic METRICS lines and the final summary as
+one more METRICS line (with "final": true), which is also written as JSON
+to cache/metrics/.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from disk_cache import CACHE_ROOT
+
+# Seconds between periodic METRICS lines (override with SUBPLAYER_METRICS_INTERVAL)
+METRICS_INTERVAL = float(os.environ.get("SUBPLAYER_METRICS_INTERVAL", "2.0"))
+
+METRICS_DIR = os.path.join(CACHE_ROOT, "metrics")
+# Only the most recent job summaries are kept
+MAX_SUMMARIES = 100
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (since it started) in MB, None where unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class Measurement:
+    """Handle of a measure() block; set audio_seconds once it is known."""
+
+    def __init__(self, audio_seconds: float = 0.0):
+        self.audio_seconds = audio_seconds
+
+
+class JobMetrics:
+    """Timings, counters and queue depths of one job."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._peak_rss_started = peak_rss_mb()
+        # stage -> {"calls", "wall", "cpu", "audio_seconds"}
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+        # name -> (stats function, baseline)
+        self._sources: Dict[str, Any] = {}
+        # name -> object with qsize()
+        self._queues: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._reporter: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Media seconds up to the latest finished subtitle
+        self.covered = 0.0
+        self.first_subtitle: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def record(self, stage: str, wall: float, cpu: float, audio_seconds: float = 0.0, calls: int = 1):
+        """Charge time and audio to a stage."""
+        with self._lock:
+            stats = self._stages.setdefault(stage, {"calls": 0, "wall": 0.0, "cpu": 0.0, "audio_seconds": 0.0})
+            stats["calls"] += calls
+            stats["wall"] += wall
+            stats["cpu"] += cpu
+            stats["audio_seconds"] += audio_seconds
+
+    @contextmanager
+    def measure(self, stage: str, audio_seconds: float = 0.0) -> Iterator[Measurement]:
+        """Time a block on the current thread."""
+        measurement = Measurement(audio_seconds)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield measurement
+        finally:
+            self.record(
+                stage,
+                time.perf_counter() - wall,
+                time.thread_time() - cpu,
+                measurement.audio_seconds
+            )
+
+    def instrument(
+        self,
+        stage: str,
+        iterable: Iterable[Any],
+        audio_seconds: Optional[Callable[[Any], float]] = None
+    ) -> Iterator[Any]:
+        """Yield from iterable, charging the time spent producing each item to stage."""
+        iterator = iter(iterable)
+        try:
+            while True:
+                wall, cpu = time.perf_counter(), time.thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                self.record(
+                    stage,
+                    time.perf_counter() - wall,
+                    time.thread_time() - cpu,
+                    audio_seconds(item) if audio_seconds else 0.0
+                )
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def emitted(self, end: float):
+        """Note a subtitle sent to the player (ending at `end` seconds)."""
+        if self.first_subtitle is None:
+            self.first_subtitle = time.perf_counter()
+        self.covered = max(self.covered, end)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def track_source(self, name: str, stats: Callable[[], Dict[str, int]]):
+        """Report the change of process-wide counters (e.g. cache hits) from now on."""
+        with self._lock:
+            self._sources[name] = (stats, dict(stats()))
+
+    def track_queue(self, name: str, queue: Any):
+        """Report the number of items waiting in a stage queue."""
+        with self._lock:
+            self._queues[name] = queue
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": int(stats["calls"]),
+                    "wall": round(stats["wall"], 3),
+                    "cpu": round(stats["cpu"], 3),
+                    "audio_seconds": round(stats["audio_seconds"], 3),
+                    "rtf": round(stats["wall"] / stats["audio_seconds"], 4) if stats["audio_seconds"] else None
+                }
+                for name, stats in self._stages.items()
+            }
+            counters = dict(self._counters)
+            sources = dict(self._sources)
+            queues = dict(self._queues)
+
+        for name, (stats, baseline) in sources.items():
+            try:
+                current = stats()
+            except Exception:
+                continue
+            for key, value in current.items():
+                counters[f"{name}.{key}"] = value - baseline.get(key, 0)
+
+        return {
+            "elapsed": round(elapsed, 3),
+            "cpu": round(time.process_time() - self._cpu_started, 3),
+            "covered": round(self.covered, 3),
+            "rtf": round(elapsed / self.covered, 4) if self.covered else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_at_start_mb": self._peak_rss_started,
+            "stages": stages,
+            "counters": counters,
+            "queues": {name: queue.qsize() for name, queue in queues.items()}
+        }
+
+    def start_reporting(self, send: Callable[[Dict[str, Any]], None], interval: float = METRICS_INTERVAL):
+        """Call send(snapshot) every `interval` seconds on a background thread."""
+        def run():
+            while not self._stop.wait(interval):
+                send(self.snapshot())
+
+        if interval > 0:
+            self._reporter = threading.Thread(target=run, name="metrics", daemon=True)
+            self._reporter.start()
+
+    def stop_reporting(self):
+        self._stop.set()
+        if self._reporter is not None:
+            self._reporter.join()
+            self._reporter = None
+
+    def summary(self, **extra) -> Dict[str, Any]:
+        """Final snapshot with time to first subtitle and any extra fields."""
+        summary = self.snapshot()
+        summary["final"] = True
+        summary["first_subtitle"] = (
+            round(self.first_subtitle - self._started, 3) if self.first_subtitle else None
+        )
+        summary.update(extra)
+        return summary
+
+
+def write_summary(summary: Dict[str, Any], name: str) -> Optional[str]:
+    """Save a job summary to METRICS_DIR, dropping the oldest ones."""
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        entries = sorted(os.scandir(METRICS_DIR), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:-MAX_SUMMARIES]:
+            os.remove(entry.path)
+        return path
+    except OSError as e:
+        print(f"Failed to write metrics: {e}", file=sys.stderr)
+        return None
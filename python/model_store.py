@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Local model store.
+
+Whisper, Argos and Silero artifacts live under one directory with a
+manifest of their files, sizes and SHA-256 checksums. Jobs load models
+straight from there: no downloads, no package index refresh, no torch.hub
+lookup. A missing artifact is an error that names the prefetch command,
+the only place that touches the network. Air-gapped machines run
+`prefetch` on a connected one and copy the directory over.
+
+Usage:
+    python model_store.py prefetch [--whisper base tiny] [--lang en] [--no-tts]
+    python model_store.py list
+    python model_store.py verify
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Optional
+
+from disk_cache import format_size
+
+MODEL_ROOT = os.environ.get(
+    "SUBPLAYER_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+)
+MANIFEST_PATH = os.path.join(MODEL_ROOT, "manifest.json")
+
+# Silero publishes standalone torch.package files per model
+SILERO_URL = "https://models.silero.ai/models/tts/{language}/{model}.pt"
+
+_lock = threading.Lock()
+
+
+class ModelMissingError(RuntimeError):
+    """An artifact is not in the store (run `prefetch`)."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _files(path: str) -> Dict[str, str]:
+    """Files of an artifact (a file or a directory) by path relative to MODEL_ROOT."""
+    if os.path.isfile(path):
+        return {os.path.relpath(path, MODEL_ROOT): path}
+    result = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            full = os.path.join(root, name)
+            result[os.path.relpath(full, MODEL_ROOT)] = full
+    return result
+
+
+def load_manifest() -> Dict[str, Any]:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"artifacts": {}}
+
+
+def _save_manifest(manifest: Dict[str, Any]):
+    os.makedirs(MODEL_ROOT, exist_ok=True)
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def register(name: str, path: str):
+    """Record an artifact with the checksums of its files."""
+    files = {
+        relative: {"size": os.path.getsize(full), "sha256": _sha256(full)}
+        for relative, full in _files(path).items()
+    }
+    with _lock:
+        manifest = load_manifest()
+        manifest["artifacts"][name] = {
+            "path": os.path.relpath(path, MODEL_ROOT),
+            "files": files,
+            "fetched": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        _save_manifest(manifest)
+
+
+def artifact_path(name: str) -> Optional[str]:
+    """
+    Path of a stored artifact, or None if it is missing or incomplete.
+    Only file sizes are checked here; `verify` compares checksums.
+    """
+    entry = load_manifest()["artifacts"].get(name)
+    if entry is None:
+        return None
+    for relative, info in entry["files"].items():
+        try:
+            if os.path.getsize(os.path.join(MODEL_ROOT, relative)) != info["size"]:
+                return None
+        except OSError:
+            return None
+    return os.path.join(MODEL_ROOT, entry["path"])
+
+
+def require(name: str, hint: str) -> str:
+    """
+    Path of a stored artifact. Jobs never download; see prefetch().
+
+    Args:
+        hint: prefetch arguments that fetch this artifact
+
+    Raises:
+        ModelMissingError: The artifact is not in the store
+    """
+    path = artifact_path(name)
+    if path is None:
+        command = f"python model_store.py prefetch {hint}".rstrip()
+        raise ModelMissingError(f"Model {name} is not in {MODEL_ROOT}; run: {command}")
+    return path
+
+
+def prefetch(name: str, fetch: Callable[[], Optional[str]]) -> Optional[str]:
+    """
+    Download an artifact into the store unless it is there already.
+
+    Returns:
+        The path, or None if the artifact does not exist upstream
+    """
+    path = artifact_path(name)
+    if path is not None:
+        return path
+
+    print(f"Downloading {name} into the model store...", file=sys.stderr)
+    path = fetch()
+    if path is not None:
+        register(name, path)
+    return path
+
+
+# Whisper
+
+def _fetch_whisper(model_name: str) -> str:
+    from faster_whisper import download_model
+
+    output_dir = os.path.join(MODEL_ROOT, "whisper", model_name)
+    return download_model(model_name, output_dir=output_dir)
+
+
+def whisper_model_path(model_name: str, download: bool = False) -> str:
+    """Local directory of a CTranslate2 Whisper model (download: prefetch only)."""
+    name = f"whisper/{model_name}"
+    if download:
+        return prefetch(name, lambda: _fetch_whisper(model_name))
+    return require(name, f"--whisper {model_name}")
+
+
+# Argos Translate
+
+def _fetch_argos(from_code: str, to_code: str) -> Optional[str]:
+    import argostranslate.package
+
+    argostranslate.package.update_package_index()
+    package = next(
+        (
+            p for p in argostranslate.package.get_available_packages()
+            if p.from_code == from_code and p.to_code == to_code
+        ),
+        None
+    )
+    if package is None:
+        return None
+
+    target = os.path.join(MODEL_ROOT, "argos", f"{from_code}_{to_code}.argosmodel")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(package.download(), target)
+    return target
+
+
+def argos_package_path(from_code: str, to_code: str, download: bool = False) -> Optional[str]:
+    """
+    Local .argosmodel file for a language pair (download: prefetch only,
+    None if Argos has no such pair).
+    """
+    name = f"argos/{from_code}-{to_code}"
+    if download:
+        return prefetch(name, lambda: _fetch_argos(from_code, to_code))
+    return require(name, f"--lang {from_code}")
+
+
+# Silero TTS
+
+def _fetch_silero(model: str, language: str) -> str:
+    target = os.path.join(MODEL_ROOT, "silero", f"{model}.pt")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = target + ".tmp"
+    with urllib.request.urlopen(SILERO_URL.format(language=language, model=model)) as response, \
+            open(tmp_path, "wb") as f:
+        shutil.copyfileobj(response, f)
+    os.replace(tmp_path, target)
+    return target
+
+
+def silero_model_path(model: str, language: str = "ru", download: bool = False) -> str:
+    """Local torch.package file of a Silero TTS model (download: prefetch only)."""
+    name = f"silero/{model}"
+    if download:
+        return prefetch(name, lambda: _fetch_silero(model, language))
+    return require(name, "")
+
+
+def verify() -> bool:
+    """Compare every stored file with its recorded checksum."""
+    ok = True
+    for name, entry in sorted(load_manifest()["artifacts"].items()):
+        for relative, info in entry["files"].items():
+            full = os.path.join(MODEL_ROOT, relative)
+            try:
+                good = _sha256(full) == info["sha256"]
+            except OSError:
+                good = False
+            if not good:
+                print(f"{name}: {relative} is missing or corrupt")
+                ok = False
+    return ok
+
+
+def main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="model_store.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prefetch = sub.add_parser("prefetch", help="Download and checksum models")
+    prefetch.add_argument("--whisper", nargs="*", default=None, metavar="MODEL",
+                          help="Whisper models (default: the regular and draft models)")
+    prefetch.add_argument("--lang", nargs="*", default=None, metavar="CODE",
+                          help="Source languages to translate to Russian (default: en)")
+    prefetch.add_argument("--no-tts", action="store_true", help="Skip the Silero model")
+    sub.add_parser("list", help="List stored models")
+    sub.add_parser("verify", help="Check stored files against their checksums")
+    args = parser.parse_args(argv)
+
+    if args.command == "prefetch":
+        from transcribe import DEFAULT_MODEL, DRAFT_MODEL
+        from translate import DEFAULT_SOURCE_LANG, TARGET_LANG
+
+        for model_name in args.whisper if args.whisper is not None else [DEFAULT_MODEL, DRAFT_MODEL]:
+            print(f"whisper/{model_name}: {whisper_model_path(model_name, download=True)}")
+        for lang in args.lang if args.lang is not None else [DEFAULT_SOURCE_LANG]:
+            print(f"argos/{lang}-{TARGET_LANG}: {argos_package_path(lang, TARGET_LANG, download=True)}")
+        if not args.no_tts:
+            from tts import SILERO_MODEL
+            print(f"silero/{SILERO_MODEL}: {silero_model_path(SILERO_MODEL, download=True)}")
+    elif args.command == "list":
+        print(f"Directory: {MODEL_ROOT}")
+        for name, entry in sorted(load_manifest()["artifacts"].items()):
+            size = sum(info["size"] for info in entry["files"].values())
+            print(f"{name:<20} {format_size(size):>10}  {entry['fetched']}")
+    elif args.command == "verify":
+        if not verify():
+            sys.exit(1)
+        print("All models OK")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
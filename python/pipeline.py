@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Streaming helpers for the processing pipeline.
+
+Each stage (transcribe, translate, synthesize) runs on its own thread and
+hands items to the next one through a bounded queue. A full queue blocks the
+producer (backpressure), and because every stage is a single FIFO thread,
+items leave the pipeline in the order they entered it. Stages that finish
+items out of order (a process pool) restore the order with ordered().
+"""
+
+import queue
+import threading
+import time
+from typing import Iterable, Iterator, List, Any, Optional, Callable
+
+# Default capacity of the queue between two stages
+STAGE_QUEUE_SIZE = 16
+
+# Sentinel marking the end of a stream
+_END = object()
+
+
+class _Failure:
+    """Exception raised by a producer thread, re-raised on the consumer side."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the consumer has gone away."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class BackgroundIterator:
+    """
+    Runs an iterable on a worker thread and hands its items over through a
+    bounded queue.
+
+    Exceptions raised by the source are re-raised in the consuming thread.
+    Closing the iterator stops the worker and closes the source. That only
+    reaches earlier stages if the source closes its own input (as
+    micro_batches() does); a plain generator reading a stage does not, so
+    whoever builds a chain closes each of its stages. A get() waiting on a
+    closed stage returns StopIteration instead of blocking forever.
+    """
+
+    def __init__(self, source: Iterable[Any], maxsize: int = STAGE_QUEUE_SIZE, name: str = "stage"):
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._run, args=(source,), name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self, source: Iterable[Any]):
+        try:
+            for item in source:
+                if not _put(self._queue, item, self._stop):
+                    return
+        except BaseException as e:
+            _put(self._queue, _Failure(e), self._stop)
+            return
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+        _put(self._queue, _END, self._stop)
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Return the next item.
+
+        Raises:
+            queue.Empty: No item arrived within timeout
+            StopIteration: The source is exhausted
+        """
+        if self._done:
+            raise StopIteration
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1 if deadline is None else min(0.1, max(0.0, deadline - time.monotonic()))
+            try:
+                item = self._queue.get(timeout=wait)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    self._done = True
+                    raise StopIteration
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+        if item is _END:
+            self._done = True
+            raise StopIteration
+        if isinstance(item, _Failure):
+            self._done = True
+            raise item.error
+        return item
+
+    def qsize(self) -> int:
+        """Number of items waiting in the queue."""
+        return self._queue.qsize()
+
+    def close(self):
+        """Stop the worker thread; pending items are dropped."""
+        self._done = True
+        self._stop.set()
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        return self.get()
+
+
+def micro_batches(
+    source: Iterable[Any],
+    max_items: int,
+    max_wait_ms: float
+) -> Iterator[List[Any]]:
+    """
+    Group items from a blocking iterator into small batches.
+
+    The source is consumed on a background thread (a BackgroundIterator is
+    used as is). A batch is flushed when it holds max_items items or when
+    max_wait_ms have passed since its first item arrived, so batching never
+    delays an item by more than max_wait_ms.
+
+    Args:
+        source: Iterable producing items (e.g. transcription segments)
+        max_items: Maximum batch size
+        max_wait_ms: Maximum time an item waits for its batch to fill
+
+    Yields:
+        Non-empty lists of items in source order
+    """
+    if isinstance(source, BackgroundIterator):
+        items = source
+    else:
+        items = BackgroundIterator(source, max(1, max_items) * 4, "micro-batch-source")
+
+    batch: List[Any] = []
+    deadline = 0.0
+
+    try:
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, deadline - time.monotonic())
+
+            try:
+                item = items.get(timeout=timeout)
+            except queue.Empty:
+                yield batch
+                batch = []
+                continue
+            except StopIteration:
+                break
+            except Exception:
+                # Deliver what was collected before the source failed
+                if batch:
+                    yield batch
+                raise
+
+            if not batch:
+                deadline = time.monotonic() + max_wait_ms / 1000
+            batch.append(item)
+
+            if len(batch) >= max_items:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        # Unblock the producer if the consumer stopped early
+        items.close()
+
+
+def ordered(items: Iterable[Any], index: Callable[[Any], int], start: int = 0) -> Iterator[Any]:
+    """
+    Re-emit items that complete out of order by consecutive index.
+
+    Args:
+        items: Items in completion order
+        index: Returns the position of an item (start, start + 1, ...)
+        start: Index of the first item
+
+    Yields:
+        Items in index order, each as soon as all earlier ones are out
+    """
+    buffered = {}
+    expected = start
+
+    for item in items:
+        buffered[index(item)] = item
+        while expected in buffered:
+            yield buffered.pop(expected)
+            expected += 1
+
+    # Gaps (e.g. dropped items) must not hold back the rest
+    for i in sorted(buffered):
+        yield buffered[i]
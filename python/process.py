@@ -2,27 +2,93 @@
 """
 Main processing script for SubPlayer with streaming and TTS support.
 Outputs subtitles as they are ready, with optional voice-over generation.
+Runs either once per video or as a persistent worker (--server) that keeps
+models loaded between jobs.
 """
 
 import sys
 import json
+import importlib.util
 import os
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 
 # Add current directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from transcribe import transcribe_audio_streaming
-from translate import translate_text_single, ensure_translation_ready
+from transcribe import (
+    transcribe_audio_streaming, transcribe_scheduled, has_cached_transcript,
+    store_complete_transcript, get_transcription_settings, get_tuning,
+    preload_model as preload_whisper,
+    DEFAULT_MODE, MODE_LATENCY, DEFAULT_MODEL, DRAFT_MODEL, DRAFT_BEAM_SIZE, SAMPLE_RATE
+)
+from progressive import Refiner
+from journal import JobJournal
+from subtitle_store import SubtitleList, SubtitleStore
+from tts_track import PackedTrack
+from scheduler import RegionScheduler, split_windows
+from audio_decode import decode_media
+from audio_mixer import IncrementalDubber
+from translate import translate_batch, ensure_translation_ready, prepare_language
+from translation_memo import get_memo
+from pipeline import BackgroundIterator, micro_batches, ordered, STAGE_QUEUE_SIZE
+from warmup import WarmUp
+from metrics import JobMetrics, write_summary
+import resources
 
-# TTS is optional - only import if needed
-TTS_AVAILABLE = False
-try:
-    from tts import generate_speech_to_file, preload_model as preload_tts
-    TTS_AVAILABLE = True
-except ImportError:
-    pass
+# TTS is optional; the tts module (and torch) is only imported by jobs that
+# use it
+TTS_AVAILABLE = importlib.util.find_spec("torch") is not None
+
+
+# Maximum number of jobs a server-mode worker runs at the same time.
+# Extra jobs are queued; models are shared between all of them. Two lets a
+# newly opened video start while the job it replaces is being cancelled.
+DEFAULT_MAX_JOBS = 2
+
+# Translation micro-batching: segments are translated together once this many
+# have been collected or the oldest one has waited this long
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_BATCH_WAIT_MS = 500
+
+# Serializes writes to stdout so lines from concurrent jobs never interleave
+_output_lock = threading.Lock()
+
+# Job id of the server-mode job running on the current thread (None in CLI mode)
+_job_context = threading.local()
+
+# Region schedulers of running seekable jobs, by job id (for "seek" hints)
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+# Cancellation flags of queued and running server-mode jobs, by job id
+_cancel_events = {}
+_cancel_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Raised in a server-mode job after a "cancel" request for it."""
+
+
+def _raise_if_cancelled(cancelled):
+    if cancelled is not None and cancelled.is_set():
+        raise JobCancelled("Cancelled")
+
+
+def send_message(kind: str, data: dict):
+    """
+    Write a single protocol line to stdout.
+    In server mode the current job id is attached to the payload.
+    """
+    job_id = getattr(_job_context, "job_id", None)
+    if job_id is not None:
+        data = {"job": job_id, **data}
+    line = f"{kind}:{json.dumps(data)}"
+    with _output_lock:
+        print(line, flush=True)
 
 
 def send_progress(stage: str, progress: float, message: str):
@@ -32,119 +98,720 @@ def send_progress(stage: str, progress: float, message: str):
         "progress": progress,
         "message": message
     }
-    print(f"PROGRESS:{json.dumps(data)}", flush=True)
+    send_message("PROGRESS", data)
 
 
 def send_subtitle(subtitle: dict):
     """Send a single subtitle to Electron (streaming mode)."""
-    print(f"SUBTITLE:{json.dumps(subtitle)}", flush=True)
+    send_message("SUBTITLE", subtitle)
 
 
-def send_result(subtitles: list):
-    """Send final result to Electron."""
-    data = {"subtitles": subtitles}
-    print(f"RESULT:{json.dumps(data)}", flush=True)
+def send_subtitle_update(subtitle: dict):
+    """Send a refined version of an already sent subtitle (same id)."""
+    send_message("SUBTITLE_UPDATE", subtitle)
 
 
-def process_video_streaming(video_path: str, enable_tts: bool = False) -> list:
+def send_dub_progress(dubber: IncrementalDubber, final: bool = False):
+    """
+    Report how much of the dubbed track can be played already; final marks
+    a track that was encoded to the end.
+    """
+    data = {"path": dubber.output_path, "duration": round(dubber.position, 3)}
+    if final:
+        data["final"] = True
+    send_message("DUB", data)
+
+
+def send_metrics(metrics: dict):
+    """Send a telemetry snapshot (or the final summary) to Electron."""
+    send_message("METRICS", metrics)
+
+
+def send_result(subtitles):
+    """
+    Send final result to Electron: the subtitles themselves, or only the
+    path and counts when they were streamed to a file.
+    """
+    send_message("RESULT", subtitles.result())
+
+
+def _speech_seconds(segment: dict) -> float:
+    return segment["end"] - segment["start"]
+
+
+def _translate_stage(batches, source_lang: str, metrics: JobMetrics, first_id: int = 1):
+    """
+    Pipeline stage: translate batches of segments and build subtitles.
+    Each segment is translated from the language Whisper detected for it
+    (source_lang for segments without one). Yields (subtitle, segment)
+    tuples in transcription order; ids are consecutive from first_id.
+    """
+    subtitle_id = first_id - 1
+    
+    for batch in batches:
+        languages = [segment.get("language") or source_lang for segment in batch]
+        with metrics.measure("translate", sum(map(_speech_seconds, batch))):
+            translations = translate_batch([segment["text"] for segment in batch], source_lang, languages)
+        
+        for segment, translated, language in zip(batch, translations, languages):
+            subtitle_id += 1
+            metrics.count(f"language.{language}")
+            
+            subtitle = {
+                "id": subtitle_id,
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"],
+                "translatedText": translated,
+                "language": language,
+                "audioFile": None
+            }
+            yield subtitle, segment
+
+
+def _preload_tts() -> bool:
+    from tts import preload_model
+    return preload_model()
+
+
+def _tts_stage(items, track: PackedTrack, warmup: WarmUp, metrics: JobMetrics, first_id: int = 1):
+    """
+    Pipeline stage: synthesize voice-over for translated subtitles.
+    Lines voiced before come from the TTS cache; short new lines are batched
+    and may be spread over a process pool. Clips are appended to the job's
+    packed track and the (subtitle, segment) tuples are passed on in their
+    original order. Without a TTS model (see warm-up) subtitles pass through
+    unvoiced.
+    """
+    if not warmup.ok("tts"):
+        yield from items
+        return
+    
+    from tts import get_synthesis_engine
+    
+    engine = get_synthesis_engine()
+    metrics.track_source("tts", engine.stats)
+    pending = {}
+    
+    def on_group(clips: int, wall: float, cpu: float):
+        metrics.record("tts", wall, cpu, calls=clips)
+    
+    def jobs():
+        for subtitle, segment in items:
+            pending[subtitle["id"]] = (subtitle, segment)
+            yield subtitle["id"], subtitle["translatedText"]
+    
+    def completed():
+        for subtitle_id, audio_path in engine.synthesize(jobs(), on_group):
+            subtitle, segment = pending.pop(subtitle_id)
+            audio = track.append(audio_path) if audio_path else None
+            if audio:
+                subtitle.update(audio)
+                # Seconds of speech voiced, for the stage's real-time factor
+                metrics.record("tts", 0.0, 0.0, audio["audioLength"] / 2 / audio["audioRate"], calls=0)
+            elif subtitle["translatedText"].strip():
+                print(f"TTS generation failed for segment {subtitle_id}", file=sys.stderr)
+            yield subtitle, segment
+    
+    # Subtitle ids are consecutive from first_id
+    yield from ordered(completed(), lambda item: item[0]["id"], start=first_id)
+
+
+def _voice_resumed(resumed: list, track: PackedTrack, warmup: WarmUp):
+    """
+    Voice journaled subtitles into the job's packed track; their clips were
+    in the interrupted job's track. Lines voiced before are TTS cache hits.
+    """
+    if not warmup.ok("tts"):
+        return
+    
+    from tts import get_synthesis_engine
+    
+    by_id = {subtitle["id"]: subtitle for subtitle in resumed}
+    jobs = [(subtitle["id"], subtitle["translatedText"]) for subtitle in resumed]
+    for subtitle_id, audio_path in get_synthesis_engine().synthesize(jobs):
+        audio = track.append(audio_path) if audio_path else None
+        if audio:
+            by_id[subtitle_id].update(audio)
+
+
+def process_video_streaming(
+    video_path: str,
+    enable_tts: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_wait_ms: float = DEFAULT_BATCH_WAIT_MS,
+    mode: str = DEFAULT_MODE,
+    whisper_overrides: dict = None,
+    progressive: bool = False,
+    seekable: bool = False,
+    start_at: float = None,
+    output_path: str = None,
+    dub_path: str = None,
+    cancelled: threading.Event = None
+):
     """
     Process video file with streaming output.
     Subtitles are sent to UI as soon as they are ready.
     
+    Finished subtitles are written to a job journal; if the same file was
+    interrupted earlier with the same settings, its subtitles are replayed
+    and transcription continues after the audio they cover.
+    
     Args:
         video_path: Path to the video file
         enable_tts: Whether to generate TTS audio for each subtitle
+        batch_size: Maximum number of segments translated together
+        batch_wait_ms: Maximum time a segment waits for its batch to fill
+        mode: Transcription mode ("latency" streaming or "throughput" batched)
+        whisper_overrides: batch_size / cpu_threads / num_workers for Whisper
+        progressive: Stream fast drafts from DRAFT_MODEL and refine them with
+            the full model in the background (SUBTITLE_UPDATE messages)
+        seekable: Transcribe in windows ordered by playback position; in
+            server mode "seek" requests move the priority while the job runs
+        start_at: Initial playback position for seekable jobs (seconds)
+        output_path: Stream subtitles to this JSONL file instead of keeping
+            them in memory (bounded memory for very long recordings)
+        dub_path: Encode the dubbed track (ducked original + TTS) here while
+            the job runs; .ogg/.opus or .m4a can be played up to the
+            processing point (DUB messages report how far)
+        cancelled: Set to stop the job; checked after decoding and after
+            every subtitle, then JobCancelled is raised (the journal is kept,
+            so the same file resumes later)
         
     Returns:
-        List of all subtitle dictionaries
+        SubtitleList or SubtitleStore with all subtitles in time order
     """
     
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video file not found: {video_path}")
     
+    metrics = JobMetrics()
     send_progress("extracting", 10, "Подготовка файла...")
     
-    # Pre-load translation model
-    send_progress("extracting", 30, "Загрузка модели перевода...")
-    source_lang = ensure_translation_ready()
+    enable_tts = enable_tts and TTS_AVAILABLE
+    dub_path = dub_path if enable_tts else None
+    # Seekable jobs cache their transcript under the windowed settings
+    # (progressive ones store the refined transcript as the regular one)
+    windowed = seekable and mode == MODE_LATENCY and not progressive
+    transcript_cached = has_cached_transcript(video_path, mode, whisper_overrides, windowed)
+    metrics.count("transcript_cache_hits" if transcript_cached else "transcript_cache_misses")
+    metrics.track_source("memo", lambda: get_memo().stats())
     
-    # Pre-load TTS model if enabled
-    tts_dir = None
-    if enable_tts and TTS_AVAILABLE:
-        send_progress("extracting", 50, "Загрузка модели озвучки...")
-        try:
-            preload_tts()
-            # Create temp directory for TTS audio files
-            tts_dir = tempfile.mkdtemp(prefix="subplayer_tts_")
-        except Exception as e:
-            print(f"TTS preload failed: {e}", file=sys.stderr)
-            enable_tts = False
-    
-    send_progress("transcribing", 0, "Запуск распознавания речи...")
-    
-    all_subtitles = []
-    subtitle_id = 0
-    
-    # Stream transcription results
-    for segment in transcribe_audio_streaming(video_path):
-        subtitle_id += 1
-        
-        # Translate immediately
-        translated = translate_text_single(segment["text"], source_lang)
-        
-        subtitle = {
-            "id": subtitle_id,
-            "start": segment["start"],
-            "end": segment["end"],
-            "text": segment["text"],
-            "translatedText": translated,
-            "audioFile": None
-        }
-        
-        # Generate TTS if enabled
-        if enable_tts and tts_dir and translated.strip():
+    # Models load on background threads while the audio is decoded; the TTS
+    # stage and Whisper wait for theirs only when they first need them
+    warmup = WarmUp()
+    warmup.start("translation", ensure_translation_ready)
+    if enable_tts:
+        warmup.start("tts", _preload_tts)
+    if not transcript_cached:
+        latency = mode == MODE_LATENCY
+        warmup.start(
+            "whisper",
+            preload_whisper,
+            mode,
+            whisper_overrides,
+            DRAFT_MODEL if progressive and latency else DEFAULT_MODEL,
+            windowed=seekable and latency
+        )
+    
+    # Temp PCM of recordings too long for the cache is deleted with the job
+    with ExitStack() as cleanup:
+        # Decode the audio once; Whisper reads the 16 kHz view of the shared
+        # PCM cache instead of decoding the container itself
+        decoded = None
+        speech_audio = None
+        if dub_path or not transcript_cached:
+            send_progress("extracting", 30, "Загрузка моделей и декодирование аудио...")
+            with metrics.measure("decode"):
+                decoded = decode_media(video_path, need_mix=bool(dub_path))
+            if decoded is not None:
+                cleanup.callback(decoded.close)
+            if decoded is not None and not transcript_cached:
+                speech_audio = decoded.speech
+        _raise_if_cancelled(cancelled)
+        
+        # The default language is only a guess loaded ahead; translators for the
+        # languages Whisper detects are prepared as soon as they show up
+        send_progress("extracting", 70, "Загрузка модели перевода...")
+        source_lang = warmup.result("translation")
+        
+        progressive = progressive and speech_audio is not None and mode == MODE_LATENCY
+        seekable = seekable and speech_audio is not None and mode == MODE_LATENCY
+        
+        # Closes what the job opened if setup or emission fails; a finished
+        # job completes its journal and store below instead
+        on_failure = cleanup.enter_context(ExitStack())
+        
+        # Jobs that actually run Whisper keep a journal so they can be resumed;
+        # anything else replays from the transcript cache in seconds
+        journal = None
+        resumed = []
+        if speech_audio is not None:
+            journal = JobJournal(video_path, {
+                "mode": mode,
+                "tts": enable_tts,
+                "progressive": progressive,
+                "seekable": seekable,
+                "source_lang": source_lang
+            })
+            on_failure.callback(journal.close)
+            resumed = journal.subtitles()
+        
+        subtitles = SubtitleStore(output_path) if output_path else SubtitleList()
+        on_failure.callback(subtitles.close)
+        
+        # All clips of the job go into one packed PCM file (next to the
+        # subtitle file if there is one); the player reads byte ranges of it
+        track = None
+        if enable_tts:
+            if output_path:
+                track_path = os.path.splitext(output_path)[0] + ".pcm"
+            else:
+                fd, track_path = tempfile.mkstemp(prefix="subplayer_tts_", suffix=".pcm")
+                os.close(fd)
+            track = PackedTrack(track_path)
+            on_failure.callback(track.close)
+        
+        # Progressive drafts need the decoded audio to re-transcribe regions;
+        # a cached full-quality transcript makes them pointless
+        job_id = getattr(_job_context, "job_id", None)
+        refiner = None
+        model_options = {}
+        if progressive:
+            def on_update(subtitle: dict):
+                # Called on the refinement thread
+                _job_context.job_id = job_id
+                send_subtitle_update(subtitle)
+                subtitles.update(subtitle)
+                add_dub(subtitle)
+                journal.record_update(subtitle)
+            
+            refiner = Refiner(speech_audio, source_lang, on_update, track)
+            on_failure.callback(refiner.cancel)
+            model_options = {"model_name": DRAFT_MODEL, "beam_size": DRAFT_BEAM_SIZE}
+        
+        # Seekable jobs follow the playhead: windows around the latest hint first
+        scheduler = None
+        if seekable:
+            scheduler = RegionScheduler(
+                split_windows(speech_audio, SAMPLE_RATE),
+                done=journal.windows_done
+            )
+            if start_at:
+                scheduler.hint(start_at)
+            if job_id is not None:
+                _register_scheduler(job_id, scheduler)
+                cleanup.callback(_unregister_scheduler, job_id)
+        
+        # The dubbed track is mixed and encoded as subtitles arrive, up to the
+        # point before which nothing can change any more: the latest subtitle
+        # start, or for seekable jobs the end of the leading finished windows
+        dubber = None
+        if dub_path and decoded is not None:
+            try:
+                dubber = IncrementalDubber(decoded.mix, dub_path, decoded.mix_sample_rate)
+                on_failure.callback(lambda: dubber is not None and dubber.close())
+            except (OSError, ValueError) as e:
+                print(f"Dubbed track disabled: {e}", file=sys.stderr)
+        
+        # Encoder failures (no ffmpeg/libopus, a broken pipe) only stop the dubbed
+        # track, as in IncrementalDubber.finish(); subtitles keep streaming
+        def stop_dub(error: Exception):
+            nonlocal dubber
+            current, dubber = dubber, None
+            print(f"Dubbed track stopped: {error}", file=sys.stderr)
+            if current is not None:
+                try:
+                    current.close()
+                except (OSError, ValueError):
+                    pass
+        
+        def add_dub(subtitle: dict):
+            # Also called on the refinement thread
+            current = dubber
+            if current is None:
+                return
+            try:
+                current.add(subtitle)
+            except (OSError, ValueError) as e:
+                stop_dub(e)
+        
+        def advance_dub(until: float):
+            current = dubber
+            if current is None:
+                return
+            position = current.position
             try:
-                audio_path = os.path.join(tts_dir, f"tts_{subtitle_id}.wav")
-                print(f"DEBUG: Generating TTS to {audio_path}", file=sys.stderr)
-                if generate_speech_to_file(translated, audio_path):
-                    subtitle["audioFile"] = audio_path
-                    print(f"DEBUG: TTS saved, audioFile={audio_path}", file=sys.stderr)
-                else:
-                    print(f"DEBUG: TTS generation returned False", file=sys.stderr)
-            except Exception as e:
-                print(f"TTS generation failed for segment {subtitle_id}: {e}", file=sys.stderr)
-        
-        all_subtitles.append(subtitle)
-        
-        # Send subtitle immediately to UI
-        send_subtitle(subtitle)
-        
-        # Update progress
-        send_progress(
-            "transcribing",
-            min(95, segment.get("progress", 50)),
-            f"Обработано: {segment['end']:.1f}s" + (" (с озвучкой)" if enable_tts else "")
+                with metrics.measure("mix") as measurement:
+                    advanced = current.advance(until)
+                    measurement.audio_seconds = current.position - position
+            except (OSError, ValueError) as e:
+                stop_dub(e)
+                return
+            if advanced:
+                send_dub_progress(current)
+        
+        if resumed:
+            send_progress("transcribing", 0, f"Продолжение с {journal.resume_time:.1f}s...")
+            if track is not None:
+                _voice_resumed(resumed, track, warmup)
+            for subtitle in resumed:
+                subtitles.add(subtitle)
+                add_dub(subtitle)
+                send_subtitle(subtitle)
+                metrics.emitted(subtitle["end"])
+                if refiner is not None and not journal.is_refined(subtitle["id"]):
+                    refiner.add(subtitle)
+        else:
+            send_progress("transcribing", 0, "Запуск распознавания речи...")
+        
+        def on_language(language: str, probability: float):
+            # Called on the transcription thread before the language's first segment
+            prepare_language(language)
+        
+        # Transcription, translation and TTS run concurrently, each on its own
+        # thread, connected by bounded queues. Stages are FIFO, so subtitles are
+        # emitted in transcription order.
+        if scheduler is not None:
+            transcription = transcribe_scheduled(
+                video_path,
+                speech_audio,
+                scheduler,
+                known_segments=resumed,
+                on_language=on_language,
+                on_empty_window=journal.record_window,
+                **model_options
+            )
+        else:
+            transcription = transcribe_audio_streaming(
+                video_path,
+                audio=speech_audio,
+                mode=mode,
+                overrides=whisper_overrides,
+                start=journal.resume_time if resumed else 0.0,
+                on_language=on_language,
+                windowed=windowed,
+                **model_options
+            )
+        first_id = journal.next_id if journal is not None else 1
+        segments = BackgroundIterator(
+            metrics.instrument("transcribe", transcription, _speech_seconds),
+            STAGE_QUEUE_SIZE,
+            "transcribe"
+        )
+        results = BackgroundIterator(
+            _translate_stage(micro_batches(segments, batch_size, batch_wait_ms), source_lang, metrics, first_id),
+            STAGE_QUEUE_SIZE,
+            "translate"
+        )
+        metrics.track_queue("transcribed", segments)
+        metrics.track_queue("translated", results)
+        # The TTS stage reads the translate stage through a plain generator,
+        # so closing it would not reach the earlier stages
+        stages = [segments, results]
+        if enable_tts:
+            results = BackgroundIterator(
+                _tts_stage(results, track, warmup, metrics, first_id),
+                STAGE_QUEUE_SIZE,
+                "tts"
+            )
+            metrics.track_queue("voiced", results)
+            stages.append(results)
+        
+        def report(snapshot: dict):
+            # Called on the reporting thread
+            _job_context.job_id = job_id
+            send_metrics(snapshot)
+        
+        metrics.start_reporting(report)
+        try:
+            for subtitle, segment in results:
+                _raise_if_cancelled(cancelled)
+                subtitles.add(subtitle)
+                
+                # Send subtitle immediately to UI
+                send_subtitle(subtitle)
+                metrics.emitted(subtitle["end"])
+                if journal is not None:
+                    journal.record(subtitle, segment.get("window"), segment.get("window_done", False))
+                if refiner is not None:
+                    refiner.add(subtitle)
+                if scheduler is not None and segment.get("window_done"):
+                    scheduler.finish(segment["window"])
+                add_dub(subtitle)
+                advance_dub(scheduler.done_until if scheduler is not None else subtitle["start"])
+                
+                # Update progress
+                send_progress(
+                    "transcribing",
+                    min(95, segment.get("progress", 50)),
+                    f"Обработано: {subtitle['end']:.1f}s" + (" (с озвучкой)" if enable_tts else "")
+                )
+            
+            if refiner is not None:
+                send_progress("transcribing", 96, "Уточнение субтитров...")
+                refiner.finish(cancelled)
+                _raise_if_cancelled(cancelled)
+        except BaseException:
+            # Cancel the refiner before the track it voices into is closed
+            on_failure.close()
+            raise
+        finally:
+            metrics.stop_reporting()
+            # Stops every stage if emission was interrupted, last one first
+            for stage in reversed(stages):
+                stage.close()
+            if track is not None:
+                track.close()
+        
+        # Seekable jobs emit windows out of order
+        subtitles.finish()
+        
+        if dubber is not None:
+            send_progress("transcribing", 98, "Сведение озвучки...")
+            position = dubber.position
+            with metrics.measure("mix") as measurement:
+                finished = dubber.finish()
+                measurement.audio_seconds = dubber.position - position
+            if finished:
+                send_dub_progress(dubber, final=True)
+            else:
+                print(f"Dubbed track failed: {dub_path}", file=sys.stderr)
+        
+        # Transcripts assembled here instead of by the transcription generator:
+        # refined drafts (stored as the regular transcript) and resumed jobs
+        if refiner is not None:
+            store_complete_transcript(video_path, decoded.duration, subtitles)
+        elif resumed:
+            tuning = None if seekable else get_tuning(mode, whisper_overrides)
+            settings = get_transcription_settings(mode, tuning, windowed=seekable)
+            store_complete_transcript(video_path, decoded.duration, subtitles, settings)
+        if journal is not None:
+            journal.complete()
+        on_failure.pop_all()
+        
+        summary = metrics.summary(
+            warmup=dict(warmup.timings),
+            threads={
+                "budget": resources.budget(),
+                "whisper": get_tuning(mode, whisper_overrides)["cpu_threads"] or resources.threads("whisper"),
+                "translate": resources.threads("translate"),
+                "tts": resources.threads("tts")
+            }
+        )
+        print(f"Metrics: {json.dumps(summary)}", file=sys.stderr)
+        send_metrics(summary)
+        write_summary(summary, Path(video_path).stem)
+        send_progress("done", 100, f"Готово! {len(subtitles)} субтитров")
+        
+        return subtitles
+
+
+def _register_scheduler(job_id: str, scheduler: RegionScheduler):
+    with _schedulers_lock:
+        _schedulers[job_id] = scheduler
+
+
+def _unregister_scheduler(job_id: str):
+    with _schedulers_lock:
+        _schedulers.pop(job_id, None)
+
+
+def prioritize(job_id: str, time: float):
+    """Move a running seekable job's transcription to playback position `time`."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(job_id)
+    if scheduler is not None:
+        scheduler.hint(time)
+
+
+def cancel_job(job_id: str):
+    """Cancel a queued or running server-mode job; unknown ids are ignored."""
+    with _cancel_lock:
+        cancelled = _cancel_events.get(job_id)
+    if cancelled is not None:
+        cancelled.set()
+
+
+def run_job(request: dict, cancelled: threading.Event = None):
+    """
+    Run a single server-mode job and report its outcome.
+    All messages written by this thread are tagged with the job id.
+    A job cancelled while queued or running ends with DONE and
+    "cancelled": true.
+    
+    Args:
+        request: Decoded "process" request with id, video_path, tts and
+            optional batch_size / batch_wait_ms / mode / whisper_batch_size /
+            cpu_threads / num_workers / progressive / seekable / start_at /
+            output_path / dub_path
+        cancelled: Set by cancel_job() for this job
+    """
+    job_id = str(request.get("id"))
+    _job_context.job_id = job_id
+    
+    try:
+        _raise_if_cancelled(cancelled)
+        subtitles = process_video_streaming(
+            request["video_path"],
+            bool(request.get("tts", False)),
+            batch_size=int(request.get("batch_size", DEFAULT_BATCH_SIZE)),
+            batch_wait_ms=float(request.get("batch_wait_ms", DEFAULT_BATCH_WAIT_MS)),
+            mode=request.get("mode", DEFAULT_MODE),
+            whisper_overrides={
+                "batch_size": request.get("whisper_batch_size"),
+                "cpu_threads": request.get("cpu_threads"),
+                "num_workers": request.get("num_workers")
+            },
+            progressive=bool(request.get("progressive", False)),
+            seekable=bool(request.get("seekable", False)),
+            start_at=request.get("start_at"),
+            output_path=request.get("output_path"),
+            dub_path=request.get("dub_path"),
+            cancelled=cancelled
         )
+        send_result(subtitles)
+        send_message("DONE", {"ok": True})
+    except JobCancelled as e:
+        send_message("DONE", {"ok": False, "cancelled": True, "error": str(e)})
+        print(f"Job {job_id} cancelled", file=sys.stderr)
+    except Exception as e:
+        send_progress("error", 0, str(e))
+        send_message("DONE", {"ok": False, "error": str(e)})
+        print(f"Job {job_id} failed: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc(file=sys.stderr)
+    finally:
+        with _cancel_lock:
+            _cancel_events.pop(job_id, None)
+        get_memo().flush()
+        _job_context.job_id = None
+
+
+def serve(max_jobs: int = DEFAULT_MAX_JOBS):
+    """
+    Run as a long-lived worker process.
+    
+    Requests are read from stdin as JSON lines:
+        {"cmd": "process", "id": "1", "video_path": "...", "tts": false}
+        {"cmd": "seek", "id": "1", "time": 2700.0}
+        {"cmd": "cancel", "id": "1"}
+        {"cmd": "ping", "id": "2"}
+        {"cmd": "shutdown"}
+    
+    Responses use the same PREFIX:{json} lines as the one-shot mode, with a
+    "job" field added to every payload. Each job ends with a DONE line.
+    Loaded models stay cached in this process between jobs.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_jobs)
+    send_message("READY", {"pid": os.getpid(), "tts": TTS_AVAILABLE})
     
-    send_progress("done", 100, f"Готово! {len(all_subtitles)} субтитров")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Invalid request: {line}", file=sys.stderr)
+            continue
+        
+        cmd = request.get("cmd")
+        if cmd == "process":
+            # Registered before the job is queued, so it can be cancelled
+            # while it waits for a free slot
+            cancelled = threading.Event()
+            with _cancel_lock:
+                _cancel_events[str(request.get("id"))] = cancelled
+            executor.submit(run_job, request, cancelled)
+        elif cmd == "seek":
+            try:
+                prioritize(str(request.get("id")), float(request.get("time", 0)))
+            except (TypeError, ValueError):
+                print(f"Invalid seek request: {line}", file=sys.stderr)
+        elif cmd == "cancel":
+            cancel_job(str(request.get("id")))
+        elif cmd == "ping":
+            send_message("PONG", {"id": request.get("id")})
+        elif cmd == "shutdown":
+            break
+        else:
+            print(f"Unknown command: {cmd}", file=sys.stderr)
     
-    return all_subtitles
+    # stdin closed or shutdown requested - let queued jobs finish
+    executor.shutdown(wait=True)
+    get_memo().close()
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python process.py <video_path> [--tts]", file=sys.stderr)
-        sys.exit(1)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="SubPlayer video processing")
+    parser.add_argument("video_path", nargs="?", help="Video file to process")
+    parser.add_argument("--tts", action="store_true", help="Generate voice-over")
+    parser.add_argument("--server", action="store_true",
+                        help="Run as a persistent worker reading jobs from stdin")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS,
+                        help="Concurrent jobs in server mode")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Maximum segments per translation batch")
+    parser.add_argument("--batch-wait-ms", type=float, default=DEFAULT_BATCH_WAIT_MS,
+                        help="Maximum wait before a partial batch is translated")
+    parser.add_argument("--mode", choices=["latency", "throughput"], default=DEFAULT_MODE,
+                        help="Streaming (latency) or batched Whisper decoding (throughput)")
+    parser.add_argument("--whisper-batch-size", type=int, default=None,
+                        help="Override the auto-tuned Whisper batch size")
+    parser.add_argument("--cpu-threads", type=int, default=None,
+                        help="Override Whisper cpu_threads")
+    parser.add_argument("--num-workers", type=int, default=None,
+                        help="Override Whisper num_workers")
+    parser.add_argument("--progressive", action="store_true",
+                        help="Fast draft subtitles first, refined in the background")
+    parser.add_argument("--seekable", action="store_true",
+                        help="Transcribe in windows ordered by playback position")
+    parser.add_argument("--start-at", type=float, default=None,
+                        help="Transcribe from this position (seconds) first, then fill the gaps (implies --seekable)")
+    parser.add_argument("--output", default=None,
+                        help="Stream subtitles to this JSONL file; RESULT then carries only its path")
+    parser.add_argument("--dub", default=None,
+                        help="Encode the dubbed track here while processing (.ogg, .m4a, ...; needs --tts)")
+    args = parser.parse_args()
     
-    video_path = sys.argv[1]
-    enable_tts = "--tts" in sys.argv
+    # Before any model or stage thread starts; they inherit the core set
+    resources.apply_process_affinity()
+    
+    if args.server:
+        serve(args.max_jobs)
+        sys.exit(0)
+    
+    if not args.video_path:
+        parser.print_usage(sys.stderr)
+        sys.exit(1)
     
     # Debug logging
     print(f"DEBUG: args={sys.argv}", file=sys.stderr)
-    print(f"DEBUG: enable_tts={enable_tts}, TTS_AVAILABLE={TTS_AVAILABLE}", file=sys.stderr)
+    print(f"DEBUG: enable_tts={args.tts}, TTS_AVAILABLE={TTS_AVAILABLE}", file=sys.stderr)
     
     try:
-        subtitles = process_video_streaming(video_path, enable_tts)
+        subtitles = process_video_streaming(
+            args.video_path,
+            args.tts,
+            batch_size=args.batch_size,
+            batch_wait_ms=args.batch_wait_ms,
+            mode=args.mode,
+            whisper_overrides={
+                "batch_size": args.whisper_batch_size,
+                "cpu_threads": args.cpu_threads,
+                "num_workers": args.num_workers
+            },
+            progressive=args.progressive,
+            seekable=args.seekable or args.start_at is not None,
+            start_at=args.start_at,
+            output_path=args.output,
+            dub_path=args.dub
+        )
+        get_memo().close()
         send_result(subtitles)
         sys.exit(0)
     except Exception as e:
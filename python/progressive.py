@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Background refinement for progressive transcription.
+
+Draft subtitles come from a small greedy model. The Refiner re-transcribes
+the same speech regions with the full model on a background thread and
+reports every subtitle whose text changed, keyed by its id.
+"""
+
+import queue
+import sys
+import threading
+from typing import Callable, Dict, List, Any, Optional
+
+from transcribe import transcribe_region, DEFAULT_MODEL
+from translate import translate_batch
+from tts_track import PackedTrack
+
+# Drafts closer than this (seconds) are refined together
+MAX_REGION_GAP = 1.0
+# Upper bound for one refinement region (one Whisper window)
+MAX_REGION_SECONDS = 28.0
+# Audio added around a region so words at its edges are not cut
+REGION_PADDING = 0.2
+# How often finish() checks whether the job was cancelled (seconds)
+FINISH_POLL_SECONDS = 0.2
+
+
+def assign_segments(drafts: List[Dict[str, Any]], refined: List[Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Map refined segments onto draft subtitles by largest time overlap.
+
+    Returns:
+        {draft id: refined text} for drafts that received at least one segment
+    """
+    texts: Dict[int, List[str]] = {}
+
+    for segment in refined:
+        best_id, best_overlap = None, 0.0
+        for draft in drafts:
+            overlap = min(segment["end"], draft["end"]) - max(segment["start"], draft["start"])
+            if overlap > best_overlap:
+                best_id, best_overlap = draft["id"], overlap
+        if best_id is not None and segment["text"]:
+            texts.setdefault(best_id, []).append(segment["text"])
+
+    return {draft_id: " ".join(parts) for draft_id, parts in texts.items()}
+
+
+class Refiner:
+    """
+    Re-transcribes draft regions with the full model on a background thread.
+
+    Drafts are usually added in time order. Consecutive drafts are grouped into
+    regions; each region is transcribed once, translated (and voiced into
+    the job's packed track when one is given) and changed subtitles are
+    passed to on_update.
+    """
+
+    def __init__(
+        self,
+        audio,
+        source_lang: str,
+        on_update: Callable[[Dict[str, Any]], None],
+        track: Optional[PackedTrack] = None,
+        model_name: str = DEFAULT_MODEL
+    ):
+        self.audio = audio
+        self.source_lang = source_lang
+        self.on_update = on_update
+        self.track = track
+        self.model_name = model_name
+        self._cancelled = threading.Event()
+        self._drafts: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="refine", daemon=True)
+        self._thread.start()
+
+    def add(self, subtitle: Dict[str, Any]):
+        """Queue a draft subtitle for refinement."""
+        self._drafts.put(subtitle)
+
+    def finish(self, stop: Optional[threading.Event] = None):
+        """
+        Wait until every queued draft has been refined, or until `stop` is
+        set; the remaining drafts are then dropped.
+        """
+        self._drafts.put(None)
+        if stop is None:
+            self._thread.join()
+            return
+        while self._thread.is_alive():
+            if stop.is_set():
+                self.cancel()
+                return
+            self._thread.join(FINISH_POLL_SECONDS)
+
+    def cancel(self):
+        """Stop refining; queued drafts are dropped."""
+        self._cancelled.set()
+        self._drafts.put(None)
+
+    def _run(self):
+        region: List[Dict[str, Any]] = []
+
+        while True:
+            draft = self._drafts.get()
+            if self._cancelled.is_set():
+                return
+            if draft is None:
+                break
+
+            # Drafts jump backwards when transcription follows the playhead
+            if region and (
+                draft["start"] < region[-1]["start"]
+                or draft["start"] - region[-1]["end"] > MAX_REGION_GAP
+                or draft["end"] - region[0]["start"] > MAX_REGION_SECONDS
+            ):
+                self._refine(region)
+                region = []
+            region.append(draft)
+
+        if region:
+            self._refine(region)
+
+    def _refine(self, drafts: List[Dict[str, Any]]):
+        try:
+            segments = transcribe_region(
+                self.audio,
+                drafts[0]["start"] - REGION_PADDING,
+                drafts[-1]["end"] + REGION_PADDING,
+                self.model_name
+            )
+        except Exception as e:
+            # Drafts that cannot be refined are kept as they are
+            print(f"Refinement failed: {e}", file=sys.stderr)
+            return
+
+        texts = assign_segments(drafts, segments)
+        changed = [
+            d for d in drafts
+            if d["id"] in texts and " ".join(texts[d["id"]].split()) != " ".join(d["text"].split())
+        ]
+        translations = translate_batch(
+            [texts[d["id"]] for d in changed],
+            self.source_lang,
+            [d.get("language") for d in changed]
+        )
+
+        for draft, translated in zip(changed, translations):
+            update = {
+                **draft,
+                "text": texts[draft["id"]],
+                "translatedText": translated
+            }
+            if self.track is not None and draft.get("audioFile"):
+                update.update(self._synthesize(draft["id"], translated) or {"audioFile": None})
+
+            # Drafts are updated in place, so the job's subtitle list
+            # ends up holding the refined versions
+            draft.update(update)
+            self.on_update(update)
+
+    def _synthesize(self, subtitle_id: int, text: str) -> Optional[Dict[str, Any]]:
+        """Voice a refined text; returns the subtitle's packed-track audio fields."""
+        from tts import get_synthesis_engine
+
+        # The clip is appended, so the draft audio that may be playing right
+        # now is left alone
+        for _, audio_path in get_synthesis_engine().synthesize([(subtitle_id, text)]):
+            return self.track.append(audio_path) if audio_path else None
+        return None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+CPU thread budget shared by the models of a process.
+
+Whisper and Argos (both CTranslate2) and Silero (torch) each size their
+thread pools for the whole machine by default, so as soon as the pipeline
+stages run side by side they oversubscribe the cores. Instead, every model
+loader asks here for its share of one budget (the usable cores, or
+SUBPLAYER_CPU_BUDGET), split by a preset:
+
+    latency     Whisper gets half; translation and TTS a quarter each, so
+                the first subtitles are not held up by the later stages
+    throughput  Whisper gets the largest share for batched decoding
+
+Shares are fixed per preset (not per job) so that models cached between
+server-mode jobs keep their threading. The process can be confined to a set
+of cores with SUBPLAYER_CPU_CORES (e.g. "0-3,8"); with
+SUBPLAYER_CPU_AFFINITY=1 the CTranslate2 thread pools are also pinned to
+disjoint slices of it.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+PRESET_LATENCY = "latency"
+PRESET_THROUGHPUT = "throughput"
+
+# Fraction of the budget per stage
+PRESETS = {
+    PRESET_LATENCY: {"whisper": 0.5, "translate": 0.25, "tts": 0.25},
+    PRESET_THROUGHPUT: {"whisper": 0.6, "translate": 0.15, "tts": 0.25}
+}
+
+# Preset for translation and TTS (Whisper follows the job's mode)
+DEFAULT_PRESET = os.environ.get(
+    "SUBPLAYER_CPU_PRESET",
+    os.environ.get("SUBPLAYER_TRANSCRIBE_MODE", PRESET_LATENCY)
+)
+
+# Pin CTranslate2 thread pools to per-stage cores
+STAGE_AFFINITY = os.environ.get("SUBPLAYER_CPU_AFFINITY", "0") == "1"
+
+
+def parse_cores(spec: str) -> List[int]:
+    """Parse a core list such as "0-3,8"."""
+    cores = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cores.update(range(int(first), int(last or first) + 1))
+    return sorted(cores)
+
+
+def usable_cores() -> List[int]:
+    """Cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 4))
+
+
+def apply_process_affinity():
+    """
+    Confine the process to SUBPLAYER_CPU_CORES (where supported). Call it
+    before other threads start; they inherit the setting.
+    """
+    spec = os.environ.get("SUBPLAYER_CPU_CORES")
+    if not spec or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, parse_cores(spec))
+    except (OSError, ValueError) as e:
+        print(f"Ignoring SUBPLAYER_CPU_CORES={spec}: {e}", file=__import__('sys').stderr)
+
+
+def budget() -> int:
+    """Total number of threads the models of this process may use."""
+    value = os.environ.get("SUBPLAYER_CPU_BUDGET")
+    if value:
+        return max(1, int(value))
+    return len(usable_cores())
+
+
+def _preset(name: Optional[str]) -> Dict[str, float]:
+    return PRESETS.get(name or DEFAULT_PRESET, PRESETS[PRESET_LATENCY])
+
+
+def threads(stage: str, preset: Optional[str] = None) -> int:
+    """Threads for one stage ("whisper", "translate" or "tts")."""
+    return max(1, int(budget() * _preset(preset)[stage]))
+
+
+def stage_cores(stage: str, preset: Optional[str] = None) -> List[int]:
+    """Slice of the usable cores for a stage, in preset order."""
+    cores = usable_cores()
+    shares = _preset(preset)
+    start = 0
+    for name, share in shares.items():
+        count = max(1, int(len(cores) * share))
+        if name == stage:
+            # Small machines: stages share the last cores rather than none
+            return cores[start:start + count] or cores[-count:]
+        start += count
+    return cores
+
+
+@contextmanager
+def pinned(stage: str, preset: Optional[str] = None) -> Iterator[None]:
+    """
+    Run a model load with the calling thread pinned to the stage's cores.
+    Threads the library starts meanwhile inherit the affinity (Linux); the
+    calling thread gets its previous affinity back afterwards.
+    """
+    if not STAGE_AFFINITY or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+
+    # On Linux pid 0 is the calling thread, so concurrent loads on other
+    # threads are not affected
+    previous = os.sched_getaffinity(0)
+    try:
+        os.sched_setaffinity(0, stage_cores(stage, preset))
+    except OSError:
+        previous = None
+    try:
+        yield
+    finally:
+        if previous is not None:
+            os.sched_setaffinity(0, previous)
+
+
+def summary(preset: Optional[str] = None) -> Dict[str, int]:
+    """Threads per stage under a preset (for logs and metrics)."""
+    return {stage: threads(stage, preset) for stage in _preset(preset)}
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Seek-aware scheduling of transcription regions.
+
+The decoded speech track is split into windows of about WINDOW_SECONDS,
+with each boundary moved to the quietest point nearby so words are not cut
+in half. The player can send "priority at time T" hints; the window under
+the playhead and the ones after it are transcribed first, then the gaps
+before it are filled in. Segments an interrupted run already delivered for
+a window are not repeated.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+import numpy as np
+
+# Target window length (seconds)
+WINDOW_SECONDS = 30.0
+# How far a window boundary may move to land on silence (seconds)
+SNAP_SECONDS = 3.0
+# Frame used to measure loudness when snapping (seconds)
+SNAP_FRAME_SECONDS = 0.02
+
+
+def _quietest_point(audio: np.ndarray, sample_rate: int, around: float) -> float:
+    """Time of the quietest frame within SNAP_SECONDS of a boundary."""
+    frame = max(1, int(SNAP_FRAME_SECONDS * sample_rate))
+    first = max(0, int((around - SNAP_SECONDS) * sample_rate))
+    last = min(len(audio), int((around + SNAP_SECONDS) * sample_rate))
+    frames = (last - first) // frame
+    if frames <= 1:
+        return around
+
+    chunk = np.asarray(audio[first:first + frames * frame], dtype=np.float32).reshape(frames, frame)
+    energy = np.einsum("ij,ij->i", chunk, chunk)
+    return (first + int(np.argmin(energy)) * frame + frame // 2) / sample_rate
+
+
+def split_windows(
+    audio: np.ndarray,
+    sample_rate: int,
+    window_seconds: float = WINDOW_SECONDS
+) -> List[Tuple[float, float]]:
+    """
+    Split a mono track into consecutive windows that end on silence.
+
+    Only a few seconds around each boundary are read, so this is cheap even
+    for a memory-mapped track of several hours.
+
+    Returns:
+        [(start, end), ...] in seconds, covering the whole track
+    """
+    duration = len(audio) / sample_rate
+    windows = []
+    start = 0.0
+
+    while duration - start > window_seconds + SNAP_SECONDS:
+        end = _quietest_point(audio, sample_rate, start + window_seconds)
+        windows.append((start, end))
+        start = end
+
+    if duration > start:
+        windows.append((start, duration))
+    return windows
+
+
+class RegionScheduler:
+    """
+    Hands out windows in playback-priority order.
+
+    Without hints windows are returned in time order. After hint(T) the
+    window containing T comes next, followed by the rest of the pending
+    windows after it, and only then the gaps before T. Windows that are
+    done or running are never handed out twice; `done` lists windows
+    finished by an earlier, interrupted run.
+
+    finish() records completed windows, so done_until tells how far the
+    start of the track is fully transcribed.
+    """
+
+    def __init__(self, windows: List[Tuple[float, float]], done: Iterable[int] = ()):
+        self.windows = windows
+        self._starts = [start for start, _ in windows]
+        self._pending = set(range(len(windows))) - set(done)
+        self._done = set(done)
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def hint(self, time: float):
+        """Prioritize the windows from playback position `time` on."""
+        with self._lock:
+            self._position = max(0, bisect.bisect_right(self._starts, time) - 1)
+
+    def next(self) -> Optional[int]:
+        """Index of the next window to transcribe, or None when all are taken."""
+        with self._lock:
+            if not self._pending:
+                return None
+            after = [i for i in self._pending if i >= self._position]
+            index = min(after) if after else min(self._pending)
+            self._pending.discard(index)
+            return index
+
+    def finish(self, index: int):
+        """Record that all segments of a window have been delivered."""
+        with self._lock:
+            self._done.add(index)
+
+    @property
+    def done_until(self) -> float:
+        """End of the leading run of finished windows (seconds)."""
+        with self._lock:
+            end = 0.0
+            for index, (_, window_end) in enumerate(self.windows):
+                if index not in self._done:
+                    break
+                end = window_end
+            return end
+
+    @property
+    def remaining(self) -> int:
+        """Number of windows not handed out yet."""
+        with self._lock:
+            return len(self._pending)
+
+
+class SegmentTimeline:
+    """
+    Time-ordered segments of one transcription window, including those an
+    interrupted run already delivered for it.
+
+    A segment that mostly overlaps one already accepted (the same words
+    recognized again) is rejected. Windows do not overlap, so only the
+    current window's segments need to be kept.
+    """
+
+    def __init__(self):
+        self.segments: List[Dict[str, Any]] = []
+        self._starts: List[float] = []
+
+    def add(self, segment: Dict[str, Any]) -> bool:
+        """Insert a segment in time order; returns False for a duplicate."""
+        index = bisect.bisect_left(self._starts, segment["start"])
+        length = max(segment["end"] - segment["start"], 1e-3)
+
+        for neighbour in self.segments[max(0, index - 1):index + 1]:
+            overlap = min(segment["end"], neighbour["end"]) - max(segment["start"], neighbour["start"])
+            shorter = min(length, max(neighbour["end"] - neighbour["start"], 1e-3))
+            if overlap > shorter / 2:
+                return False
+
+        self.segments.insert(index, segment)
+        self._starts.insert(index, segment["start"])
+        return True
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Time-indexed subtitle store.
+
+Start and end times live in parallel float arrays sorted by start, with the
+text columns kept separately, so the cue under the playhead or the cues of
+a mixing window are found with a binary search instead of a walk over a
+list of dicts. The index can be written to a compact binary file that the
+Electron side loads (src/lib/subtitleIndex.ts).
+
+Binary layout (little-endian):
+    magic "SPSI", version u32, count u32, reserved u32
+    count fixed-size records in start order:
+        start f64, end f64, id i32,
+        audio offset i64 (-1: no packed clip), audio length u32, audio rate u32,
+        text, translatedText, audioFile, language: offset u32 and length u32
+        of the UTF-8 string in the text blob
+    text blob
+
+Fixed-size records let write_index() stream subtitles straight from a job's
+JSONL file without holding them in memory. Language is the source language
+Whisper detected (empty if unknown).
+"""
+
+import bisect
+import os
+import shutil
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Any, Optional
+
+MAGIC = b"SPSI"
+VERSION = 4
+_HEADER = struct.Struct("<4sIII")
+
+# String fields of a record, in file order
+STRING_FIELDS = ("text", "translatedText", "audioFile", "language")
+_RECORD = struct.Struct("<ddiqII" + "II" * len(STRING_FIELDS))
+
+
+def write_index(path: str, subtitles: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write an index file from subtitles in start order, one at a time; the
+    strings are spooled to a side file and appended after the records.
+
+    Returns:
+        Number of subtitles written
+    """
+    blob_path = path + ".blob"
+    count = 0
+    try:
+        with open(path, "wb") as f, open(blob_path, "w+b") as blob:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, 0))
+            for subtitle in subtitles:
+                strings = []
+                for name in STRING_FIELDS:
+                    value = (subtitle.get(name) or "").encode("utf-8")
+                    strings += (blob.tell(), len(value))
+                    blob.write(value)
+                offset = subtitle.get("audioOffset")
+                f.write(_RECORD.pack(
+                    float(subtitle["start"]),
+                    float(subtitle["end"]),
+                    int(subtitle["id"]),
+                    -1 if offset is None else int(offset),
+                    int(subtitle.get("audioLength") or 0),
+                    int(subtitle.get("audioRate") or 0),
+                    *strings
+                ))
+                count += 1
+
+            blob.seek(0)
+            shutil.copyfileobj(blob, f)
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, VERSION, count, 0))
+    finally:
+        if os.path.exists(blob_path):
+            os.remove(blob_path)
+    return count
+
+
+class SubtitleIndex:
+    """
+    Subtitles ordered by start time with O(log n) time lookups.
+
+    Subtitles can be added one at a time as they stream in (out of order is
+    fine); adding a subtitle with an existing id replaces it.
+    """
+
+    def __init__(self):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.ids = array("i")
+        self.texts: List[str] = []
+        self.translations: List[str] = []
+        self.audio_files: List[Optional[str]] = []
+        self.languages: List[Optional[str]] = []
+        # Clip position in a packed TTS track (see tts_track.py)
+        self.audio_offsets = array("q")
+        self.audio_lengths = array("I")
+        self.audio_rates = array("I")
+        self._start_by_id: Dict[int, float] = {}
+        # Longest cue, bounds how far back a lookup has to look
+        self._max_duration = 0.0
+
+    @classmethod
+    def from_subtitles(cls, subtitles: Iterable[Dict[str, Any]]) -> "SubtitleIndex":
+        index = cls()
+        for subtitle in subtitles:
+            index.add(subtitle)
+        return index
+
+    def _position(self, subtitle_id: int, start: float) -> Optional[int]:
+        """Position of a subtitle with a known start time, or None."""
+        i = bisect.bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ids[i] == subtitle_id:
+                return i
+            i += 1
+        return None
+
+    def _remove(self, position: int):
+        for column in self._columns():
+            del column[position]
+    
+    def _columns(self) -> tuple:
+        return (
+            self.starts, self.ends, self.ids,
+            self.audio_offsets, self.audio_lengths, self.audio_rates,
+            self.texts, self.translations, self.audio_files, self.languages
+        )
+
+    def add(self, subtitle: Dict[str, Any]):
+        """Insert a subtitle in start order, replacing one with the same id."""
+        start = float(subtitle["start"])
+        end = float(subtitle["end"])
+
+        subtitle_id = int(subtitle["id"])
+        if subtitle_id in self._start_by_id:
+            existing = self._position(subtitle_id, self._start_by_id[subtitle_id])
+            if existing is not None:
+                self._remove(existing)
+        self._start_by_id[subtitle_id] = start
+
+        position = bisect.bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, subtitle_id)
+        self.texts.insert(position, subtitle.get("text", ""))
+        self.translations.insert(position, subtitle.get("translatedText", ""))
+        self.audio_files.insert(position, subtitle.get("audioFile"))
+        self.languages.insert(position, subtitle.get("language"))
+        offset = subtitle.get("audioOffset")
+        self.audio_offsets.insert(position, -1 if offset is None else int(offset))
+        self.audio_lengths.insert(position, int(subtitle.get("audioLength") or 0))
+        self.audio_rates.insert(position, int(subtitle.get("audioRate") or 0))
+        self._max_duration = max(self._max_duration, end - start)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        subtitle = {
+            "id": self.ids[position],
+            "start": self.starts[position],
+            "end": self.ends[position],
+            "text": self.texts[position],
+            "translatedText": self.translations[position],
+            "audioFile": self.audio_files[position]
+        }
+        if self.languages[position]:
+            subtitle["language"] = self.languages[position]
+        if self.audio_offsets[position] >= 0:
+            subtitle["audioOffset"] = self.audio_offsets[position]
+            subtitle["audioLength"] = self.audio_lengths[position]
+            subtitle["audioRate"] = self.audio_rates[position]
+        return subtitle
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self.starts)):
+            yield self[position]
+
+    def at(self, time: float) -> Optional[Dict[str, Any]]:
+        """The cue shown at `time` (the latest-starting one if cues overlap)."""
+        position = bisect.bisect_right(self.starts, time) - 1
+        earliest = time - self._max_duration
+        while position >= 0 and self.starts[position] >= earliest:
+            if self.ends[position] >= time:
+                return self[position]
+            position -= 1
+        return None
+
+    def range(self, start: float, end: float, extend: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Cues that overlap [start, end), in start order.
+
+        Args:
+            extend: Treat each cue as lasting `extend` times its duration
+                (e.g. 1.2 for TTS clips that may run past their subtitle)
+        """
+        first = bisect.bisect_left(self.starts, start - self._max_duration * extend)
+        last = bisect.bisect_left(self.starts, end)
+        return [
+            self[position]
+            for position in range(first, last)
+            if self.starts[position] + (self.ends[position] - self.starts[position]) * extend > start
+        ]
+
+    def prune(self, before: float, extend: float = 1.0):
+        """
+        Drop cues that end (treating each as lasting `extend` times its
+        duration) by `before`, e.g. once that part of a track is written.
+        """
+        last = bisect.bisect_left(self.starts, before)
+        stale = [
+            position for position in range(last)
+            if self.starts[position] + (self.ends[position] - self.starts[position]) * extend <= before
+        ]
+        for position in reversed(stale):
+            self._start_by_id.pop(self.ids[position], None)
+            self._remove(position)
+
+    def save(self, path: str):
+        """Write the binary index file."""
+        write_index(path, iter(self))
+
+    @classmethod
+    def load(cls, path: str) -> "SubtitleIndex":
+        """Read a binary index file written by save() or write_index()."""
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, count, _ = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a subtitle index file: {path}")
+
+        blob_start = _HEADER.size + _RECORD.size * count
+        index = cls()
+        for record in _RECORD.iter_unpack(data[_HEADER.size:blob_start]):
+            start, end, subtitle_id, audio_offset, audio_length, audio_rate = record[:6]
+            text, translation, audio_file, language = (
+                data[blob_start + offset:blob_start + offset + length].decode("utf-8")
+                for offset, length in zip(record[6::2], record[7::2])
+            )
+            index.starts.append(start)
+            index.ends.append(end)
+            index.ids.append(subtitle_id)
+            index.audio_offsets.append(audio_offset)
+            index.audio_lengths.append(audio_length)
+            index.audio_rates.append(audio_rate)
+            index.texts.append(text)
+            index.translations.append(translation)
+            index.audio_files.append(audio_file or None)
+            index.languages.append(language or None)
+
+        index._start_by_id = dict(zip(index.ids, index.starts))
+        index._max_duration = max(
+            (end - start for start, end in zip(index.starts, index.ends)),
+            default=0.0
+        )
+        return index
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Collections for the subtitles produced by a job.
+
+SubtitleList keeps everything in memory and reports it in the RESULT
+message, which is fine for ordinary videos. SubtitleStore streams every
+subtitle to a JSONL file and keeps only a small (start, offset) index per
+subtitle, so a 10-hour recording does not hold its subtitles in memory and
+the RESULT message carries just the path and counts. Once the job is done
+a binary subtitle index is written next to the file for the player.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterator, List, Any, Tuple
+
+from subtitle_index import write_index
+
+
+class SubtitleList:
+    """In-memory subtitles, sent whole in the RESULT message."""
+
+    def __init__(self):
+        self._items: List[Dict[str, Any]] = []
+        self._index: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, subtitle: Dict[str, Any]):
+        with self._lock:
+            self._index[subtitle["id"]] = len(self._items)
+            self._items.append(subtitle)
+
+    def update(self, subtitle: Dict[str, Any]):
+        """Replace a subtitle with a refined version (same id)."""
+        with self._lock:
+            position = self._index.get(subtitle["id"])
+            if position is not None:
+                self._items[position] = subtitle
+
+    def finish(self):
+        """Order subtitles by start time (seekable jobs add them out of order)."""
+        with self._lock:
+            self._items.sort(key=lambda subtitle: subtitle["start"])
+            self._index = {subtitle["id"]: i for i, subtitle in enumerate(self._items)}
+
+    def close(self):
+        pass
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._items))
+
+    def result(self) -> Dict[str, Any]:
+        """Payload of the RESULT message."""
+        return {"subtitles": list(self._items)}
+
+
+class SubtitleStore:
+    """
+    Subtitles written to a JSONL file as they arrive.
+
+    Refined versions are appended as well; finish() rewrites the file once,
+    in time order and with only the latest version of each subtitle, if
+    anything arrived out of order or was updated, and saves the binary
+    index (same name, .spsi) that the player loads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".spsi"
+        # id -> (start, offset, length) of the latest version in the file
+        self._index: Dict[int, Tuple[float, int, int]] = {}
+        self._in_order = True
+        self._last_start = float("-inf")
+        self._updates = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "wb")
+
+    def _write(self, subtitle: Dict[str, Any]):
+        line = (json.dumps(subtitle, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._file.tell()
+        self._file.write(line)
+        self._index[subtitle["id"]] = (subtitle["start"], offset, len(line))
+
+    def add(self, subtitle: Dict[str, Any]):
+        with self._lock:
+            if subtitle["start"] < self._last_start:
+                self._in_order = False
+            self._last_start = max(self._last_start, subtitle["start"])
+            self._write(subtitle)
+            self._file.flush()
+
+    def update(self, subtitle: Dict[str, Any]):
+        """Append a refined version of a subtitle (same id)."""
+        with self._lock:
+            if subtitle["id"] not in self._index:
+                return
+            self._updates += 1
+            self._write(subtitle)
+            self._file.flush()
+
+    def finish(self):
+        """Rewrite the file in time order if needed, stop writing and save the index."""
+        with self._lock:
+            self._file.close()
+            if not self._in_order or self._updates:
+                self._compact()
+        # Streamed from the (time-ordered) file, one subtitle at a time
+        write_index(self.index_path, iter_subtitles(self.path))
+
+    def _compact(self):
+        """Keep only the latest version of each subtitle, in time order."""
+        entries = sorted(self._index.values())
+        temp_path = self.path + ".tmp"
+        with open(self.path, "rb") as source, open(temp_path, "wb") as target:
+            for start, offset, length in entries:
+                source.seek(offset)
+                target.write(source.read(length))
+        os.replace(temp_path, self.path)
+
+        # Offsets of the compacted file
+        offset = 0
+        for subtitle_id, (start, _, length) in sorted(self._index.items(), key=lambda item: item[1]):
+            self._index[subtitle_id] = (start, offset, length)
+            offset += length
+        self._in_order = True
+        self._updates = 0
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Subtitles in time order (call finish() first)."""
+        return iter_subtitles(self.path)
+
+    def result(self) -> Dict[str, Any]:
+        """Payload of the RESULT message."""
+        return {
+            "path": self.path,
+            "count": len(self._index),
+            "bytes": os.path.getsize(self.path),
+            "index": self.index_path if os.path.exists(self.index_path) else None
+        }
+
+
+def iter_subtitles(path: str) -> Iterator[Dict[str, Any]]:
+    """Read a subtitle JSONL file one line at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,16 @@
+"""Shared setup: tests import the worker modules from python/ directly."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+@pytest.fixture
+def media(tmp_path):
+    """A small file standing in for a video (fingerprints hash its bytes)."""
+    path = tmp_path / "lecture.mp4"
+    path.write_bytes(os.urandom(4096))
+    return str(path)
@@ -0,0 +1,45 @@
+"""The full-rate mix is decoded only for jobs that need it, or on first use."""
+
+import pytest
+
+import audio_decode
+
+SPEECH_BYTES = 16000 * 4
+MIX_BYTES = 48000 * 4
+
+
+@pytest.fixture
+def ffmpeg_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_decode._cache, "directory", str(tmp_path / "pcm"))
+    monkeypatch.setattr(audio_decode._cache, "_size", None)
+    runs = []
+
+    def run(cmd, **kwargs):
+        # One second of silence for every requested output
+        outputs = [cmd[i + 2] for i, arg in enumerate(cmd) if arg == "-ac"]
+        runs.append(outputs)
+        for output in outputs:
+            with open(output, "wb") as f:
+                f.write(bytes(MIX_BYTES if output.endswith(audio_decode.MIX_SUFFIX) else SPEECH_BYTES))
+
+    monkeypatch.setattr(audio_decode.subprocess, "run", run)
+    return runs
+
+
+def test_speech_only_until_mix_is_read(media, ffmpeg_runs):
+    decoded = audio_decode.decode_media(media, need_mix=False)
+
+    assert decoded.duration == 1.0
+    assert decoded.mix_path is None
+    assert [len(outputs) for outputs in ffmpeg_runs] == [1]
+    assert not audio_decode._cache.get(decoded.key + audio_decode.MIX_SUFFIX)
+
+    assert decoded.mix.shape == (48000, 2)
+    assert decoded.mix_path == audio_decode._cache.get(decoded.key + audio_decode.MIX_SUFFIX)
+    assert len(ffmpeg_runs) == 2
+    decoded.close()
+
+    # Both tracks are cached now
+    again = audio_decode.decode_media(media)
+    assert again.mix.shape == (48000, 2)
+    assert len(ffmpeg_runs) == 2
@@ -0,0 +1,60 @@
+"""Batch runs keep only complete dubbed tracks and skip finished videos."""
+
+import json
+
+import batch
+
+
+class FakeWorker:
+    """Stands in for a process.py --server worker: writes the job's files."""
+
+    def __init__(self, tts=True, dub_finished=True):
+        self.tts = tts
+        self.dub_finished = dub_finished
+
+    def run(self, request):
+        with open(request["output_path"], "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": 1, "start": 0.5, "end": 2.0, "text": "Hi.", "translatedText": "Привет."}) + "\n")
+        dub = None
+        if self.tts and request["dub_path"]:
+            with open(request["dub_path"], "wb") as f:
+                f.write(b"OggS")
+            if self.dub_finished:
+                dub = {"path": request["dub_path"], "duration": 2.0, "final": True}
+        return {"ok": True, "metrics": None, "dub": dub}
+
+
+def run(media, worker):
+    outputs = batch.output_paths(media, ["srt"], "ogg", "ru")
+    result = batch.process_item(worker, media, outputs, {"tts": True})
+    return outputs, result
+
+
+def test_finished_dub_is_renamed(media, tmp_path):
+    outputs, result = run(media, FakeWorker())
+
+    assert result["ok"]
+    assert open(outputs["dub"], "rb").read() == b"OggS"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "lecture.mp4", "lecture.ru.manifest.json", "lecture.ru.ogg", "lecture.ru.srt"
+    ]
+    assert batch.is_complete(media, outputs)
+
+
+def test_partial_dub_is_discarded(media, tmp_path):
+    outputs, result = run(media, FakeWorker(dub_finished=False))
+
+    assert not result["ok"]
+    assert result["error"] == "dubbed track failed"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["lecture.mp4"]
+    assert not batch.is_complete(media, outputs)
+
+
+def test_dub_not_required_without_tts(media):
+    outputs, result = run(media, FakeWorker(tts=False))
+
+    assert result["ok"]
+    assert batch.is_complete(media, outputs)
+    # Once TTS is available the same run would have to produce the track
+    batch.write_manifest(outputs, tts=True)
+    assert not batch.is_complete(media, outputs)
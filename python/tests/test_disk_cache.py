@@ -0,0 +1,50 @@
+"""DiskCache evicts least recently used entries, but never the kept ones."""
+
+import os
+import time
+
+from disk_cache import DiskCache
+
+
+def make_cache(tmp_path, max_bytes):
+    cache = DiskCache("test", max_bytes, suffix=".bin")
+    cache.directory = str(tmp_path / "cache")
+    return cache
+
+
+def age(cache, key, seconds):
+    past = time.time() - seconds
+    os.utime(cache.path_for(key), (past, past))
+
+
+def test_lru_eviction(tmp_path):
+    cache = make_cache(tmp_path, 250)
+    cache.put_bytes("aa01", b"x" * 100)
+    cache.put_bytes("bb02", b"x" * 100)
+    age(cache, "aa01", 20)
+    age(cache, "bb02", 30)
+    # Reading refreshes an entry
+    assert cache.get("bb02") is not None
+
+    cache.put_bytes("cc03", b"x" * 100)
+
+    assert cache.get("aa01") is None
+    assert cache.get("bb02") is not None
+    assert cache.read_bytes("cc03") == b"x" * 100
+    assert cache.total_size() == 200
+
+
+def test_keep_protects_entries(tmp_path):
+    cache = make_cache(tmp_path, 150)
+    cache.put_bytes("aa01", b"x" * 100)
+    age(cache, "aa01", 30)
+    source = tmp_path / "speech.pcm"
+    source.write_bytes(b"y" * 100)
+
+    cache.put_file("bb02", str(source), keep=("aa01",))
+
+    # Both stay although the cache is over its limit
+    assert cache.get("aa01") is not None
+    assert cache.get("bb02") is not None
+    assert cache.evict(keep=("bb02",)) == 1
+    assert cache.get("aa01") is None
@@ -0,0 +1,93 @@
+"""Job journals resume after a crash and are not shared between jobs."""
+
+import os
+
+import pytest
+
+import journal
+from journal import JobJournal
+
+SETTINGS = {"mode": "latency", "tts": False, "progressive": False, "seekable": True, "source_lang": "en"}
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "JOURNAL_DIR", str(tmp_path / "journals"))
+
+
+def subtitle(subtitle_id, start):
+    return {"id": subtitle_id, "start": start, "end": start + 1.0, "text": f"Line {subtitle_id}.",
+            "translatedText": f"Строка {subtitle_id}.", "audioFile": "/tmp/track.pcm",
+            "audioOffset": 0, "audioLength": 100, "audioRate": 48000}
+
+
+def test_resume(media):
+    first = JobJournal(media, SETTINGS)
+    first.record(subtitle(1, 0.0), window=0, window_done=False)
+    first.record(subtitle(2, 1.5), window=0, window_done=True)
+    first.record_window(1)
+    first.record_update({**subtitle(1, 0.0), "translatedText": "Первая строка."})
+    first.close()
+
+    resumed = JobJournal(media, SETTINGS)
+
+    assert [s["id"] for s in resumed.subtitles()] == [1, 2]
+    assert resumed.subtitles()[0]["translatedText"] == "Первая строка."
+    assert resumed.is_refined(1) and not resumed.is_refined(2)
+    assert resumed.windows_done == {0, 1}
+    assert resumed.next_id == 3
+    assert resumed.resume_time == 2.5
+    # Packed clips belong to the interrupted job's track
+    assert all(s["audioFile"] is None and "audioOffset" not in s for s in resumed.subtitles())
+    resumed.close()
+
+
+def test_torn_last_line(media):
+    first = JobJournal(media, SETTINGS)
+    first.record(subtitle(1, 0.0))
+    first.close()
+    with open(first.path, "a", encoding="utf-8") as f:
+        f.write('{"subtitle": {"id": 2, "sta')
+
+    resumed = JobJournal(media, SETTINGS)
+    assert [s["id"] for s in resumed.subtitles()] == [1]
+    resumed.record(subtitle(2, 1.5))
+    resumed.close()
+
+    again = JobJournal(media, SETTINGS)
+    assert [s["id"] for s in again.subtitles()] == [1, 2]
+    again.complete()
+    assert not os.path.exists(again.path)
+
+
+def test_other_settings_start_fresh(media):
+    first = JobJournal(media, SETTINGS)
+    first.record(subtitle(1, 0.0))
+    first.close()
+
+    other = JobJournal(media, {**SETTINGS, "tts": True})
+    assert other.subtitles() == []
+    assert other.path != first.path
+    other.close()
+
+    # The first journal is still there to resume
+    again = JobJournal(media, SETTINGS)
+    assert [s["id"] for s in again.subtitles()] == [1]
+    again.close()
+
+
+@pytest.mark.skipif(journal.fcntl is None, reason="journals are not locked on this platform")
+def test_concurrent_job_gets_private_journal(media):
+    running = JobJournal(media, SETTINGS)
+    running.record(subtitle(1, 0.0))
+
+    second = JobJournal(media, SETTINGS)
+    assert second.path != running.path
+    assert second.subtitles() == []
+    second.complete()
+
+    running.record(subtitle(2, 1.5))
+    running.close()
+    again = JobJournal(media, SETTINGS)
+    assert [s["id"] for s in again.subtitles()] == [1, 2]
+    again.close()
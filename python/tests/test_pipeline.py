@@ -0,0 +1,99 @@
+"""Pipeline stages hand over items in order and re-raise producer errors."""
+
+import threading
+
+import pytest
+
+from pipeline import BackgroundIterator, micro_batches, ordered
+
+
+def failing(items, error):
+    yield from items
+    raise error
+
+
+def test_background_iterator_reraises_after_items():
+    stage = BackgroundIterator(failing([1, 2, 3], ValueError("decode failed")), maxsize=1)
+
+    received = []
+    with pytest.raises(ValueError, match="decode failed"):
+        for item in stage:
+            received.append(item)
+
+    assert received == [1, 2, 3]
+    # The stage stays finished
+    with pytest.raises(StopIteration):
+        next(stage)
+
+
+def test_chained_stages_propagate_errors():
+    first = BackgroundIterator(failing(range(5), RuntimeError("whisper")), maxsize=2)
+    second = BackgroundIterator((item * 10 for item in first), maxsize=2)
+
+    received = []
+    with pytest.raises(RuntimeError, match="whisper"):
+        for item in second:
+            received.append(item)
+
+    assert received == [0, 10, 20, 30, 40]
+
+
+def test_close_stops_the_source():
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.set()
+
+    stage = BackgroundIterator(endless(), maxsize=1)
+    assert next(stage) == 1
+    stage.close()
+
+    assert closed.wait(2.0)
+
+
+def test_close_releases_a_waiting_consumer():
+    release = threading.Event()
+
+    def idle():
+        release.wait(5.0)
+        yield 1
+
+    stage = BackgroundIterator(idle(), maxsize=1)
+    threading.Timer(0.1, stage.close).start()
+
+    with pytest.raises(StopIteration):
+        next(stage)
+    release.set()
+
+
+def test_micro_batches_deliver_collected_items_before_error():
+    batches = micro_batches(failing([1, 2, 3], ValueError("boom")), max_items=10, max_wait_ms=10000)
+
+    assert next(batches) == [1, 2, 3]
+    with pytest.raises(ValueError, match="boom"):
+        next(batches)
+
+
+def test_ordered_restores_index_order():
+    items = [(2, "c"), (0, "a"), (3, "d"), (1, "b")]
+
+    assert [value for _, value in ordered(items, lambda item: item[0])] == ["a", "b", "c", "d"]
+
+
+def test_ordered_flushes_gaps_at_the_end():
+    items = [(1, "b"), (3, "d"), (4, "e")]
+
+    assert [value for _, value in ordered(items, lambda item: item[0])] == ["b", "d", "e"]
+
+
+def test_ordered_propagates_errors():
+    emitted = []
+    with pytest.raises(OSError, match="pool died"):
+        for _, value in ordered(failing([(0, "a"), (2, "c")], OSError("pool died")), lambda item: item[0]):
+            emitted.append(value)
+
+    assert emitted == ["a"]
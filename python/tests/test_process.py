@@ -0,0 +1,61 @@
+"""A cancelled job stops every pipeline stage, not just the last one."""
+
+import itertools
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import process
+
+STAGES = {"transcribe", "translate", "tts"}
+
+
+class FakeEngine:
+    """Voices nothing; cancels the job after a few subtitles."""
+
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+
+    def stats(self):
+        return {}
+
+    def synthesize(self, jobs, on_group=None):
+        for key, text in jobs:
+            if key >= 3:
+                self.cancelled.set()
+            yield key, None
+
+
+def endless_transcription(video_path, **options):
+    for i in itertools.count():
+        time.sleep(0.001)
+        yield {"start": float(i), "end": i + 1.0, "text": f"line {i}", "progress": 50}
+
+
+def test_cancelled_tts_job_stops_every_stage(monkeypatch, media, tmp_path):
+    cancelled = threading.Event()
+    fake_tts = types.ModuleType("tts")
+    fake_tts.get_synthesis_engine = lambda: FakeEngine(cancelled)
+    monkeypatch.setitem(sys.modules, "tts", fake_tts)
+    monkeypatch.setattr(process, "TTS_AVAILABLE", True)
+    monkeypatch.setattr(process, "_preload_tts", lambda: True)
+    monkeypatch.setattr(process, "ensure_translation_ready", lambda: "en")
+    monkeypatch.setattr(process, "has_cached_transcript", lambda *args: True)
+    monkeypatch.setattr(process, "transcribe_audio_streaming", endless_transcription)
+    monkeypatch.setattr(process, "translate_batch", lambda texts, *args: list(texts))
+
+    with pytest.raises(process.JobCancelled):
+        process.process_video_streaming(
+            media, True, output_path=str(tmp_path / "subtitles.jsonl"), cancelled=cancelled
+        )
+
+    deadline = time.monotonic() + 2.0
+    while time.monotonic() < deadline:
+        alive = {thread.name for thread in threading.enumerate()} & STAGES
+        if not alive:
+            break
+        time.sleep(0.05)
+    assert not alive
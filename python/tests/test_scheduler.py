@@ -0,0 +1,36 @@
+"""RegionScheduler follows playback hints and tracks the finished prefix."""
+
+from scheduler import RegionScheduler
+
+WINDOWS = [(0.0, 30.0), (30.0, 60.0), (60.0, 90.0), (90.0, 120.0)]
+
+
+def drain(scheduler):
+    order = []
+    index = scheduler.next()
+    while index is not None:
+        order.append(index)
+        index = scheduler.next()
+    return order
+
+
+def test_time_order_without_hints():
+    assert drain(RegionScheduler(WINDOWS)) == [0, 1, 2, 3]
+
+
+def test_hint_jumps_ahead_then_fills_gaps():
+    scheduler = RegionScheduler(WINDOWS)
+    assert scheduler.next() == 0
+
+    scheduler.hint(75.0)
+
+    assert drain(scheduler) == [2, 3, 1]
+
+
+def test_done_windows_are_skipped():
+    scheduler = RegionScheduler(WINDOWS, done=[0, 2])
+
+    assert drain(scheduler) == [1, 3]
+    assert scheduler.done_until == 30.0
+    scheduler.finish(1)
+    assert scheduler.done_until == 90.0
@@ -0,0 +1,90 @@
+"""Server-mode requests reach the job they name while it is running."""
+
+import json
+import os
+import sys
+import threading
+
+import process
+from scheduler import RegionScheduler
+from subtitle_store import SubtitleList
+
+WINDOWS = [(0.0, 30.0), (30.0, 60.0), (60.0, 90.0), (90.0, 120.0)]
+
+
+def start_server(monkeypatch):
+    """Run serve() on a thread; returns it and a function sending one request."""
+    read_fd, write_fd = os.pipe()
+    monkeypatch.setattr(sys, "stdin", os.fdopen(read_fd, "r"))
+    requests = os.fdopen(write_fd, "w")
+    server = threading.Thread(target=process.serve)
+    server.start()
+
+    def send(request):
+        requests.write(json.dumps(request) + "\n")
+        requests.flush()
+        if request["cmd"] == "shutdown":
+            requests.close()
+
+    return server, send
+
+
+def test_seek_during_processing_reaches_scheduler(monkeypatch):
+    scheduler = RegionScheduler(WINDOWS)
+    registered = threading.Event()
+    hinted = threading.Event()
+    prioritize = process.prioritize
+
+    def hint(job_id, time):
+        prioritize(job_id, time)
+        hinted.set()
+
+    def fake_process(video_path, enable_tts, seekable=False, **options):
+        assert seekable
+        # What process_video_streaming does for seekable server jobs
+        job_id = process._job_context.job_id
+        process._register_scheduler(job_id, scheduler)
+        try:
+            registered.set()
+            assert hinted.wait(5.0)
+            return SubtitleList()
+        finally:
+            process._unregister_scheduler(job_id)
+
+    monkeypatch.setattr(process, "process_video_streaming", fake_process)
+    monkeypatch.setattr(process, "prioritize", hint)
+    server, send = start_server(monkeypatch)
+
+    send({"cmd": "process", "id": "7", "video_path": "lecture.mp4", "seekable": True})
+    assert registered.wait(5.0)
+    send({"cmd": "seek", "id": "7", "time": 75.0})
+    assert hinted.wait(5.0)
+    send({"cmd": "shutdown"})
+    server.join(5.0)
+
+    assert not server.is_alive()
+    assert scheduler.next() == 2
+
+
+def test_cancel_stops_running_job(monkeypatch, capsys):
+    started = threading.Event()
+
+    def fake_process(video_path, enable_tts, cancelled=None, **options):
+        started.set()
+        # What process_video_streaming does between subtitles
+        assert cancelled.wait(5.0)
+        process._raise_if_cancelled(cancelled)
+
+    monkeypatch.setattr(process, "process_video_streaming", fake_process)
+    server, send = start_server(monkeypatch)
+
+    send({"cmd": "process", "id": "3", "video_path": "lecture.mp4"})
+    assert started.wait(5.0)
+    send({"cmd": "cancel", "id": "3"})
+    send({"cmd": "shutdown"})
+    server.join(5.0)
+
+    assert not server.is_alive()
+    done = [line for line in capsys.readouterr().out.splitlines() if line.startswith("DONE:")]
+    assert json.loads(done[0][len("DONE:"):]) == {"job": "3", "ok": False, "cancelled": True, "error": "Cancelled"}
+    assert process._cancel_events == {}
@@ -0,0 +1,68 @@
+"""SPSI index files round-trip, including subtitles that arrive out of order."""
+
+import os
+
+from subtitle_index import SubtitleIndex, write_index
+from subtitle_store import SubtitleStore
+
+SUBTITLES = [
+    {"id": 1, "start": 0.5, "end": 2.0, "text": "Hello.", "translatedText": "Привет.", "language": "en",
+     "audioFile": "/tmp/track.pcm", "audioOffset": 0, "audioLength": 9600, "audioRate": 48000},
+    {"id": 2, "start": 2.5, "end": 4.0, "text": "Ça va ?", "translatedText": "Как дела?", "language": "fr",
+     "audioFile": None},
+    {"id": 3, "start": 5.0, "end": 9.0, "text": "", "translatedText": "", "audioFile": None}
+]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "subtitles.spsi")
+    assert write_index(path, iter(SUBTITLES)) == 3
+
+    index = SubtitleIndex.load(path)
+
+    assert list(index) == SUBTITLES
+    assert index.at(3.0)["translatedText"] == "Как дела?"
+    assert index.at(4.5) is None
+    assert [s["id"] for s in index.range(1.0, 5.5)] == [1, 2, 3]
+    assert not os.path.exists(path + ".blob")
+
+
+def test_out_of_order_adds_and_updates(tmp_path):
+    index = SubtitleIndex()
+    for subtitle in reversed(SUBTITLES):
+        index.add(subtitle)
+    index.add({**SUBTITLES[0], "translatedText": "Здравствуйте."})
+
+    path = str(tmp_path / "subtitles.spsi")
+    index.save(path)
+    loaded = SubtitleIndex.load(path)
+
+    assert [s["id"] for s in loaded] == [1, 2, 3]
+    assert loaded.at(1.0)["translatedText"] == "Здравствуйте."
+    assert len(loaded) == 3
+
+
+def test_store_finish_compacts_and_indexes(tmp_path):
+    store = SubtitleStore(str(tmp_path / "job.jsonl"))
+    store.add(SUBTITLES[1])
+    store.add(SUBTITLES[0])
+    store.update({**SUBTITLES[1], "translatedText": "Как ты?"})
+    store.add(SUBTITLES[2])
+    store.finish()
+
+    assert [s["id"] for s in store] == [1, 2, 3]
+    loaded = SubtitleIndex.load(store.index_path)
+    assert [s["translatedText"] for s in loaded] == ["Привет.", "Как ты?", ""]
+    assert store.result()["index"] == store.index_path
+
+
+
+def test_prune_drops_finished_cues():
+    index = SubtitleIndex.from_subtitles(SUBTITLES)
+
+    index.prune(4.5, extend=1.2)
+
+    assert [s["id"] for s in index] == [3]
+    # A pruned id can be added again
+    index.add(SUBTITLES[0])
+    assert [s["id"] for s in index] == [1, 3]
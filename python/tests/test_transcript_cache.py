@@ -0,0 +1,64 @@
+"""Cached transcripts are written as they stream and keep each segment's language."""
+
+import os
+
+import pytest
+
+import transcribe
+import transcript_cache
+from scheduler import RegionScheduler
+
+SEGMENTS = [
+    {"id": 1, "start": 0.5, "end": 2.5, "text": "Bonjour à tous.", "translatedText": "Всем привет.", "language": "fr"},
+    {"id": 2, "start": 3.0, "end": 5.0, "text": "On commence.", "translatedText": "Начинаем.", "language": "fr"}
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_cache._cache, "directory", str(tmp_path / "transcripts"))
+    monkeypatch.setattr(transcript_cache._cache, "_size", None)
+
+
+def test_streaming_replay_keeps_language(media):
+    transcribe.store_complete_transcript(media, 6.0, SEGMENTS)
+
+    detected = []
+    segments = list(transcribe.transcribe_audio_streaming(
+        media, on_language=lambda language, probability: detected.append(language)
+    ))
+
+    assert [s["language"] for s in segments] == ["fr", "fr"]
+    assert detected == ["fr"]
+
+
+def test_scheduled_replay_keeps_language(media):
+    settings = transcribe.get_transcription_settings(windowed=True)
+    transcribe.store_complete_transcript(media, 6.0, SEGMENTS, settings)
+
+    detected = []
+    segments = list(transcribe.transcribe_scheduled(
+        media, None, RegionScheduler([(0.0, 6.0)]),
+        on_language=lambda language, probability: detected.append(language)
+    ))
+
+    assert [s["language"] for s in segments] == ["fr", "fr"]
+    assert detected == ["fr"]
+
+
+def test_writer_stores_parts_in_order(media):
+    key = transcript_cache.cache_key(media, {"windowed": True})
+    writer = transcript_cache.TranscriptWriter(key)
+    # Windows transcribed around a seek: the later one first
+    writer.add(SEGMENTS[1], part=1)
+    writer.add(SEGMENTS[0], part=0)
+    writer.finish(6.0)
+
+    transcript = transcript_cache.load_transcript(key)
+
+    assert transcript["duration"] == 6.0
+    assert [s["text"] for s in transcript["segments"]] == ["Bonjour à tous.", "On commence."]
+    assert transcript["segments"][0] == {"start": 0.5, "end": 2.5, "text": "Bonjour à tous.", "language": "fr"}
+    # Only the stored entry is left in the cache directory
+    assert [e["key"] for e in transcript_cache._cache.entries()] == [key]
+    assert all(name.endswith(".json") for _, _, names in os.walk(transcript_cache._cache.directory) for name in names)
@@ -0,0 +1,84 @@
+"""TranslationMemo keeps the SQLite tier bounded and batches used_at refreshes."""
+
+import sqlite3
+import time
+
+from translation_memo import TranslationMemo
+
+
+def rows(path):
+    db = sqlite3.connect(path)
+    try:
+        return dict(db.execute("SELECT text, used_at FROM translations").fetchall())
+    finally:
+        db.close()
+
+
+def test_lru_row_cap(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    memo = TranslationMemo(path, lru_size=1, max_rows=2)
+    memo.put("en", "ru", "1", "one", "один")
+    time.sleep(0.01)
+    memo.put("en", "ru", "1", "two", "два")
+    time.sleep(0.01)
+    # Disk hit (the LRU only holds "two"): "one" becomes the most recent
+    assert memo.get("en", "ru", "1", "one") == "один"
+    memo.put("en", "ru", "1", "three", "три")
+    memo.close()
+
+    assert set(rows(path)) == {"one", "three"}
+
+
+def test_replacing_a_row_does_not_count_twice(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    memo = TranslationMemo(path, max_rows=2)
+    memo.put("en", "ru", "1", "one", "один")
+    memo.put("en", "ru", "1", "one", "раз")
+    memo.put("en", "ru", "1", "two", "два")
+    memo.close()
+
+    assert set(rows(path)) == {"one", "two"}
+
+
+def test_cap_holds_with_two_processes(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    # Two batch workers share the store
+    first = TranslationMemo(path, max_rows=4, recount_puts=2)
+    second = TranslationMemo(path, max_rows=4, recount_puts=2)
+    first.put("en", "ru", "1", "a1", "а1")
+    for text in ("b1", "b2", "b3"):
+        second.put("en", "ru", "1", text, text)
+    # The first memo's own count is 2 here; the recount sees all six rows
+    first.put("en", "ru", "1", "a2", "а2")
+    first.put("en", "ru", "1", "a3", "а3")
+    first.close()
+    second.close()
+
+    stored = rows(path)
+    assert len(stored) == 4
+    assert "a3" in stored
+
+
+def test_hits_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    memo = TranslationMemo(path, lru_size=1, touch_batch=3)
+    memo.put("en", "ru", "1", "one", "один")
+    memo.put("en", "ru", "1", "two", "два")
+    written = rows(path)
+    time.sleep(0.01)
+
+    memo.get("en", "ru", "1", "one")
+    memo.get("en", "ru", "1", "two")
+    assert rows(path) == written
+
+    # The third hit fills the batch
+    memo.get("en", "ru", "1", "one")
+    refreshed = rows(path)
+    assert refreshed["one"] > written["one"]
+    assert refreshed["two"] > written["two"]
+
+    time.sleep(0.01)
+    memo.get("en", "ru", "1", "two")
+    memo.flush()
+    assert rows(path)["two"] > refreshed["two"]
+    memo.close()
@@ -3,103 +3,709 @@
 Audio transcription using Faster Whisper with streaming support.
 """
 
-from typing import Iterator, Dict, Any
+from typing import Callable, Iterable, Iterator, Dict, Any, Tuple, Optional, List
+import bisect
+import importlib.util
 import os
+import sys
+import threading
 
-# Try to import faster_whisper
-try:
-    from faster_whisper import WhisperModel
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
+import numpy as np
+
+from model_store import whisper_model_path
+import resources
+from transcript_cache import cache_key, load_transcript, store_transcript, TranscriptWriter
+from scheduler import RegionScheduler, SegmentTimeline, WINDOW_SECONDS
+
+# faster_whisper is imported when the first model loads, which the job
+# warm-up does on a background thread
+WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+if not WHISPER_AVAILABLE:
     print("Warning: faster-whisper not installed. Run: pip install faster-whisper", file=__import__('sys').stderr)
 
 
 # Model configuration
 DEFAULT_MODEL = "base"  # Options: tiny, base, small, medium, large-v2, large-v3
 COMPUTE_TYPE = "int8"   # Use int8 for CPU, float16 for GPU
+BEAM_SIZE = 5
+SAMPLE_RATE = 16000     # Whisper input rate
+
+# Progressive mode: a small greedy model streams drafts that are refined later
+DRAFT_MODEL = "tiny"
+DRAFT_BEAM_SIZE = 1
+
+# Languages: Whisper detects one per file from its first 30 seconds. If the
+# runner-up language is this likely, the file is treated as mixed and every
+# segment of at least MIN_LANGUAGE_SECONDS gets its own detection
+LANGUAGE_MIX_THRESHOLD = 0.2
+MIN_LANGUAGE_SECONDS = 2.0
+# Decode every 30-second chunk in its own language (faster-whisper >= 1.1;
+# part of the transcript cache key)
+MULTILINGUAL = os.environ.get("SUBPLAYER_WHISPER_MULTILINGUAL", "0") == "1"
+
+# Called with (language, probability) when a language first shows up
+LanguageCallback = Callable[[str, float], None]
+
+VAD_PARAMETERS = dict(
+    min_silence_duration_ms=300,  # Shorter silence = faster segments
+    speech_pad_ms=200
+)
+
+# Transcription modes:
+#   latency    - sequential decoding, first segments appear as soon as possible
+#   throughput - batched decoding of VAD chunks for offline/batch jobs
+MODE_LATENCY = "latency"
+MODE_THROUGHPUT = "throughput"
+DEFAULT_MODE = os.environ.get("SUBPLAYER_TRANSCRIBE_MODE", MODE_LATENCY)
+
+# Approximate memory needed per item of a decoding batch (MB, int8 on CPU)
+BATCH_ITEM_MEMORY_MB = {
+    "tiny": 60,
+    "base": 100,
+    "small": 250,
+    "medium": 600,
+    "large-v2": 1200,
+    "large-v3": 1200
+}
+MAX_BATCH_SIZE = 16
 
-# Global model cache
-_model = None
+# Global model cache, keyed by (model name, cpu_threads, num_workers)
+_models = {}
+# Held while a model loads, so a warm-up and a job never load one twice
+_models_lock = threading.Lock()
+_device = None
 
 
-def get_model() -> "WhisperModel":
+def get_device() -> Tuple[str, str]:
     """
-    Load and return the Whisper model.
-    Model is cached after first load.
+    Pick the device and compute type for Whisper.
+    Result is cached after first call.
     """
-    global _model
+    global _device
     
-    if _model is not None:
-        return _model
-    
-    if not WHISPER_AVAILABLE:
-        raise ImportError("faster-whisper is not installed")
+    if _device is not None:
+        return _device
     
     # Check for GPU availability
     device = "cpu"
-    compute_type = "int8"
+    compute_type = COMPUTE_TYPE
     
+    # Asked from CTranslate2 rather than torch, so jobs without TTS never
+    # import torch (Apple Silicon runs on the CPU either way)
     try:
-        import torch
-        if torch.cuda.is_available():
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
             device = "cuda"
             compute_type = "float16"
-        elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-            # Apple Silicon - use CPU with optimizations
-            device = "cpu"
-            compute_type = "int8"
     except ImportError:
         pass
     
-    _model = WhisperModel(
-        DEFAULT_MODEL,
-        device=device,
-        compute_type=compute_type,
-        download_root=os.path.join(os.path.dirname(__file__), "models")
+    _device = (device, compute_type)
+    return _device
+
+
+def _available_memory_mb() -> int:
+    """Physical memory in MB (8 GB if it cannot be determined)."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+
+def get_tuning(mode: str = DEFAULT_MODE, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Choose batch size and CTranslate2 threading for a transcription mode.
+    
+    Latency mode decodes sequentially with Whisper's share of the default CPU
+    budget (cpu_threads 0, see get_model). Throughput mode uses the share of
+    the throughput preset and sizes the batch to half of the physical memory.
+    Values in overrides (or SUBPLAYER_WHISPER_BATCH_SIZE / _CPU_THREADS /
+    _NUM_WORKERS) take precedence.
+    
+    Returns:
+        Dict with batch_size, cpu_threads, num_workers
+    """
+    cores = resources.budget()
+    
+    if mode == MODE_THROUGHPUT:
+        per_item = BATCH_ITEM_MEMORY_MB.get(DEFAULT_MODEL, 250)
+        by_memory = (_available_memory_mb() // 2) // per_item
+        tuning = {
+            "batch_size": int(max(1, min(MAX_BATCH_SIZE, max(4, cores), by_memory))),
+            "cpu_threads": resources.threads("whisper", resources.PRESET_THROUGHPUT),
+            "num_workers": 1
+        }
+    else:
+        tuning = {
+            "batch_size": 1,
+            "cpu_threads": 0,  # budget share, see get_model
+            "num_workers": 1
+        }
+    
+    env_overrides = {
+        "batch_size": os.environ.get("SUBPLAYER_WHISPER_BATCH_SIZE"),
+        "cpu_threads": os.environ.get("SUBPLAYER_WHISPER_CPU_THREADS"),
+        "num_workers": os.environ.get("SUBPLAYER_WHISPER_NUM_WORKERS")
+    }
+    for name, value in env_overrides.items():
+        if value:
+            tuning[name] = int(value)
+    
+    for name, value in (overrides or {}).items():
+        if name in tuning and value is not None:
+            tuning[name] = int(value)
+    
+    return tuning
+
+
+def get_transcription_settings(
+    mode: str = DEFAULT_MODE,
+    tuning: Optional[Dict[str, int]] = None,
+    model_name: str = DEFAULT_MODEL,
+    beam_size: int = BEAM_SIZE,
+    windowed: bool = False
+) -> Dict[str, Any]:
+    """Settings that affect transcription output (used as part of cache keys)."""
+    device, compute_type = get_device()
+    settings = {
+        "model": model_name,
+        "device": device,
+        "compute_type": compute_type,
+        "beam_size": beam_size,
+        "vad_parameters": VAD_PARAMETERS
+    }
+    
+    if MULTILINGUAL:
+        settings["multilingual"] = True
+    
+    # Batched decoding chunks audio differently, so it gets its own entries
+    if mode == MODE_THROUGHPUT:
+        settings["mode"] = mode
+        settings["batch_size"] = (tuning or get_tuning(mode))["batch_size"]
+    
+    # Windows are decoded without context from the previous one
+    if windowed:
+        settings["window_seconds"] = WINDOW_SECONDS
+    
+    return settings
+
+
+def get_model(
+    model_name: str = DEFAULT_MODEL,
+    cpu_threads: int = 0,
+    num_workers: int = 1
+) -> "WhisperModel":
+    """
+    Load and return a Whisper model.
+    Models are cached after first load.
+    
+    Args:
+        cpu_threads: CTranslate2 threads; 0 for Whisper's share of the
+            process CPU budget (see resources.py)
+    """
+    cpu_threads = cpu_threads or resources.threads("whisper")
+    key = (model_name, cpu_threads, num_workers)
+    if key in _models:
+        return _models[key]
+    
+    if not WHISPER_AVAILABLE:
+        raise ImportError("faster-whisper is not installed")
+    
+    with _models_lock:
+        if key in _models:
+            return _models[key]
+        
+        from faster_whisper import WhisperModel
+        
+        device, compute_type = get_device()
+        
+        # A local directory from the model store: no Hugging Face lookup
+        with resources.pinned("whisper"):
+            model = WhisperModel(
+                whisper_model_path(model_name),
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers
+            )
+        _models[key] = model
+    
+    return model
+
+
+def preload_model(
+    mode: str = DEFAULT_MODE,
+    overrides: Optional[Dict[str, int]] = None,
+    model_name: str = DEFAULT_MODEL,
+    windowed: bool = False
+):
+    """
+    Load the Whisper model that a transcription with these settings uses.
+    
+    Args:
+        windowed: For transcribe_scheduled (default threading)
+    """
+    if windowed:
+        return get_model(model_name)
+    tuning = get_tuning(mode, overrides)
+    return get_model(model_name, tuning["cpu_threads"], tuning["num_workers"])
+
+
+def _decode_options() -> Dict[str, Any]:
+    """Options only passed when enabled (older faster-whisper lacks them)."""
+    return {"multilingual": True} if MULTILINGUAL else {}
+
+
+def _is_mixed(info) -> bool:
+    """Whether Whisper's file-level probabilities suggest several languages."""
+    probabilities = getattr(info, "all_language_probs", None) or []
+    ranked = sorted((p for _, p in probabilities), reverse=True)
+    return len(ranked) > 1 and ranked[1] >= LANGUAGE_MIX_THRESHOLD
+
+
+class LanguageTagger:
+    """Language of each segment: the file's, or detected per segment in mixed files."""
+    
+    def __init__(self, model, audio: Optional["np.ndarray"], on_language: Optional[LanguageCallback] = None):
+        self.model = model
+        self.audio = audio
+        self.on_language = on_language
+        self.language = None
+        self.mixed = False
+        self._seen = set()
+    
+    def start(self, info):
+        """Take the detection result of a transcribe() call."""
+        if info.language and info.language != self.language:
+            probability = getattr(info, "language_probability", 0.0) or 0.0
+            if self.language is None:
+                print(f"Detected language: {info.language} ({probability:.2f})", file=sys.stderr)
+            self.language = info.language
+            self._report(info.language, probability)
+        # Windows after the first are decoded with the language pinned
+        self.mixed = self.mixed or (self.audio is not None and _is_mixed(info))
+    
+    def _report(self, language: str, probability: float):
+        if language not in self._seen:
+            self._seen.add(language)
+            if self.on_language is not None:
+                self.on_language(language, probability)
+    
+    def tag(self, start: float, end: float) -> Optional[str]:
+        """
+        Language of a segment at [start, end) seconds of the audio passed in
+        (falls back to the file's language).
+        """
+        detect = getattr(self.model, "detect_language", None)
+        if not self.mixed or detect is None or end - start < MIN_LANGUAGE_SECONDS:
+            return self.language
+        region = self.audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        try:
+            language, probability, _ = detect(np.ascontiguousarray(region, dtype=np.float32))
+        except Exception:
+            return self.language
+        if probability < 0.5:
+            return self.language
+        self._report(language, probability)
+        return language
+
+
+def _replay_settings(
+    mode: str,
+    tuning: Dict[str, int],
+    model_name: str,
+    beam_size: int,
+    windowed: bool
+) -> List[Dict[str, Any]]:
+    """
+    Settings of the cache entries a job may replay, in order of preference:
+    seekable jobs first look for the windowed transcript transcribe_scheduled
+    stores, then for the regular one.
+    """
+    regular = get_transcription_settings(mode, tuning, model_name, beam_size)
+    if not windowed:
+        return [regular]
+    return [
+        get_transcription_settings(MODE_LATENCY, None, model_name, beam_size, windowed=True),
+        regular
+    ]
+
+
+def has_cached_transcript(
+    audio_path: str,
+    mode: str = DEFAULT_MODE,
+    overrides: Optional[Dict[str, int]] = None,
+    windowed: bool = False
+) -> bool:
+    """
+    Whether a transcript for this file and the current settings is cached
+    (with windowed, also the one a seekable job stored).
+    """
+    try:
+        return any(
+            load_transcript(cache_key(audio_path, settings)) is not None
+            for settings in _replay_settings(mode, get_tuning(mode, overrides), DEFAULT_MODEL, BEAM_SIZE, windowed)
+        )
+    except OSError:
+        return False
+
+
+def _open_writer(key: Optional[str]) -> Optional[TranscriptWriter]:
+    """Start writing a transcript for the cache (None without a key or on error)."""
+    if key is None:
+        return None
+    try:
+        return TranscriptWriter(key)
+    except OSError as e:
+        print(f"Failed to cache transcript: {e}", file=sys.stderr)
+        return None
+
+
+def store_complete_transcript(
+    audio_path: str,
+    duration: float,
+    segments: Iterable[Dict[str, Any]],
+    settings: Optional[Dict[str, Any]] = None
+):
+    """
+    Cache a transcript assembled outside the transcription generators
+    (progressive refinement, resumed jobs).
+    
+    Args:
+        segments: Segments in time order (e.g. a finished SubtitleStore),
+            read one at a time
+        settings: Transcription settings of the cache entry; defaults to the
+            regular (DEFAULT_MODEL, latency mode) transcript of the file
+    """
+    try:
+        key = cache_key(audio_path, settings or get_transcription_settings())
+        store_transcript(key, duration, segments)
+    except OSError as e:
+        print(f"Failed to cache transcript: {e}", file=sys.stderr)
+
+
+def transcribe_region(
+    audio: "np.ndarray",
+    start: float,
+    end: float,
+    model_name: str = DEFAULT_MODEL,
+    language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe one region of decoded 16 kHz audio with full beam search.
+    
+    Args:
+        audio: 16 kHz mono float32 samples of the whole file
+        start: Region start in seconds
+        end: Region end in seconds
+        model_name: Whisper model to use
+        language: Language code, or None to detect
+        
+    Returns:
+        Segments with start/end on the file timeline
+    """
+    start = max(0.0, start)
+    region = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+    if len(region) == 0:
+        return []
+    
+    model = get_model(model_name)
+    segments_generator, _ = model.transcribe(
+        np.ascontiguousarray(region, dtype=np.float32),
+        beam_size=BEAM_SIZE,
+        language=language,
+        vad_filter=False,  # Regions already come from VAD segments
+        condition_on_previous_text=False
     )
     
-    return _model
+    return [
+        {
+            "start": start + segment.start,
+            "end": start + segment.end,
+            "text": segment.text.strip()
+        }
+        for segment in segments_generator
+    ]
 
 
-def transcribe_audio_streaming(audio_path: str) -> Iterator[Dict[str, Any]]:
+def transcribe_audio_streaming(
+    audio_path: str,
+    use_cache: bool = True,
+    audio: Optional["np.ndarray"] = None,
+    mode: str = DEFAULT_MODE,
+    overrides: Optional[Dict[str, int]] = None,
+    model_name: str = DEFAULT_MODEL,
+    beam_size: int = BEAM_SIZE,
+    start: float = 0.0,
+    on_language: Optional[LanguageCallback] = None,
+    windowed: bool = False
+) -> Iterator[Dict[str, Any]]:
     """
     Transcribe audio/video file using Faster Whisper with streaming output.
     Yields segments as they become available.
     
+    Completed transcripts are stored in the transcript cache; a cache hit
+    replays the stored segments without loading the model.
+    
     Args:
-        audio_path: Path to audio or video file
+        audio_path: Path to audio or video file (also identifies the cache entry)
+        use_cache: Read and write the transcript cache
+        audio: Already decoded 16 kHz mono float32 samples of audio_path;
+            if omitted, faster-whisper decodes the file itself
+        mode: MODE_LATENCY (streaming) or MODE_THROUGHPUT (batched)
+        overrides: batch_size / cpu_threads / num_workers instead of auto-tuning
+        model_name: Whisper model (DRAFT_MODEL for progressive drafts)
+        beam_size: Beam size (1 = greedy)
+        start: Skip the audio before this time (seconds) when resuming an
+            interrupted job; requires audio. A partial transcript is not cached.
+        on_language: Called as soon as a language is detected (before the
+            first segment of it is decoded), e.g. to load its translator
+        windowed: Also replay the transcript of a seekable job
+            (transcribe_scheduled); a new transcript is still cached under
+            the regular key
         
     Yields:
-        Segment dictionaries with start, end, text, progress
+        Segment dictionaries with start, end, text, language, progress
     """
+    tuning = get_tuning(mode, overrides)
+    
+    offset = 0.0
+    if start > 0 and audio is not None:
+        offset = start
+        audio = audio[int(start * SAMPLE_RATE):]
+        use_cache = False
+    
+    key = None
+    if use_cache:
+        try:
+            keys = [
+                cache_key(audio_path, settings)
+                for settings in _replay_settings(mode, tuning, model_name, beam_size, windowed)
+            ]
+            # A new transcript is stored under the regular key (the last one)
+            key = keys[-1]
+            cached = next((t for t in map(load_transcript, keys) if t is not None), None)
+        except OSError as e:
+            print(f"Transcript cache lookup failed: {e}", file=sys.stderr)
+            cached = None
+        
+        if cached is not None:
+            total_duration = cached["duration"] or 1
+            languages = set()
+            for segment in cached["segments"]:
+                language = segment.get("language")
+                if on_language is not None and language and language not in languages:
+                    languages.add(language)
+                    on_language(language, 1.0)
+                yield {
+                    **segment,
+                    "progress": min(95, (segment["end"] / total_duration) * 100)
+                }
+            return
     
-    model = get_model()
+    model = get_model(model_name, tuning["cpu_threads"], tuning["num_workers"])
+    source = audio if audio is not None else audio_path
     
-    # Transcribe with VAD for better segmentation
-    segments_generator, info = model.transcribe(
-        audio_path,
-        beam_size=5,
-        language=None,  # Auto-detect language
-        vad_filter=True,  # Voice activity detection for streaming
-        vad_parameters=dict(
-            min_silence_duration_ms=300,  # Shorter silence = faster segments
-            speech_pad_ms=200
+    if mode == MODE_THROUGHPUT:
+        from faster_whisper import BatchedInferencePipeline
+        
+        # Batched decoding of VAD chunks; segments still stream batch by batch
+        segments_generator, info = BatchedInferencePipeline(model=model).transcribe(
+            source,
+            batch_size=tuning["batch_size"],
+            beam_size=beam_size,
+            language=None,
+            vad_filter=True,
+            vad_parameters=VAD_PARAMETERS,
+            **_decode_options()
         )
-    )
+    else:
+        # Transcribe with VAD for better segmentation
+        segments_generator, info = model.transcribe(
+            source,
+            beam_size=beam_size,
+            language=None,  # Auto-detect language
+            vad_filter=True,  # Voice activity detection for streaming
+            vad_parameters=VAD_PARAMETERS,
+            **_decode_options()
+        )
+    
+    # Known before any segment is decoded
+    languages = LanguageTagger(model, audio, on_language)
+    languages.start(info)
     
-    total_duration = info.duration if info.duration else 1
+    total_duration = offset + info.duration if info.duration else 1
+    # Segments go to disk as they are produced instead of piling up here
+    writer = _open_writer(key)
     
-    # Yield segments as they are generated
-    for segment in segments_generator:
-        progress = min(95, (segment.end / total_duration) * 100) if total_duration > 0 else 50
+    try:
+        # Yield segments as they are generated
+        for segment in segments_generator:
+            progress = min(95, ((offset + segment.end) / total_duration) * 100) if total_duration > 0 else 50
+            
+            result = {
+                "start": offset + segment.start,
+                "end": offset + segment.end,
+                "text": segment.text.strip(),
+                "language": languages.tag(segment.start, segment.end),
+                "progress": progress
+            }
+            if writer is not None:
+                writer.add(result)
+            yield result
         
-        yield {
-            "start": segment.start,
-            "end": segment.end,
-            "text": segment.text.strip(),
-            "progress": progress
-        }
+        # Only complete transcripts are cached
+        if writer is not None:
+            writer.finish(info.duration)
+            writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def transcribe_scheduled(
+    audio_path: str,
+    audio: "np.ndarray",
+    scheduler: RegionScheduler,
+    use_cache: bool = True,
+    model_name: str = DEFAULT_MODEL,
+    beam_size: int = BEAM_SIZE,
+    known_segments: Optional[List[Dict[str, Any]]] = None,
+    on_language: Optional[LanguageCallback] = None,
+    on_empty_window: Optional[Callable[[int], None]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transcribe decoded audio window by window in the order chosen by a
+    RegionScheduler, so playback hints take effect after the current window.
+    
+    Segments are yielded as their window completes (not in time order);
+    segments repeating known ones in the same window are dropped. Every segment carries its
+    "window" index and the last one of a window has "window_done" set.
+    Windows without new segments (silence, or only duplicates) have no
+    segment to carry the flag, so they are finished in the scheduler here.
+    The complete transcript is cached in time order.
+    
+    Args:
+        audio_path: Media file (identifies the cache entry)
+        audio: 16 kHz mono float32 samples of audio_path
+        scheduler: Scheduler over windows of audio
+        use_cache: Read and write the transcript cache
+        model_name: Whisper model (DRAFT_MODEL for progressive drafts)
+        beam_size: Beam size (1 = greedy)
+        known_segments: Segments already delivered by an interrupted run;
+            new ones overlapping them are dropped and nothing is cached
+        on_language: See transcribe_audio_streaming
+        on_empty_window: Called with the index of a window finished without
+            yielding a segment (e.g. to journal it)
+        
+    Yields:
+        Segment dictionaries with start, end, text, language, progress, window
+    """
+    # Only the current window's segments are kept for deduplication; known
+    # segments are looked up by the window they fall into
+    known: Dict[int, List[Dict[str, Any]]] = {}
+    window_starts = [start for start, _ in scheduler.windows]
+    for segment in known_segments or []:
+        window = max(0, bisect.bisect_right(window_starts, segment["start"]) - 1)
+        known.setdefault(window, []).append(segment)
+        use_cache = False
+    
+    key = None
+    if use_cache:
+        try:
+            key = cache_key(
+                audio_path,
+                get_transcription_settings(MODE_LATENCY, None, model_name, beam_size, windowed=True)
+            )
+            cached = load_transcript(key)
+        except OSError as e:
+            print(f"Transcript cache lookup failed: {e}", file=sys.stderr)
+            cached = None
+        
+        if cached is not None:
+            total_duration = cached["duration"] or 1
+            languages = set()
+            for segment in cached["segments"]:
+                language = segment.get("language")
+                if on_language is not None and language and language not in languages:
+                    languages.add(language)
+                    on_language(language, 1.0)
+                yield {
+                    **segment,
+                    "progress": min(95, (segment["end"] / total_duration) * 100)
+                }
+            return
+    
+    model = get_model(model_name)
+    total_windows = len(scheduler.windows)
+    languages = LanguageTagger(model, audio, on_language)
+    language = None
+    completed = 0
+    # Windows are written as parts and stored in time order at the end
+    writer = _open_writer(key)
+    
+    try:
+        while True:
+            index = scheduler.next()
+            if index is None:
+                break
+            
+            start, end = scheduler.windows[index]
+            timeline = SegmentTimeline()
+            for segment in known.pop(index, []):
+                timeline.add(segment)
+            region = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+            segments_generator, info = model.transcribe(
+                np.ascontiguousarray(region, dtype=np.float32),
+                beam_size=beam_size,
+                language=language,
+                vad_filter=True,
+                vad_parameters=VAD_PARAMETERS,
+                **_decode_options()
+            )
+            languages.start(info)
+            
+            # Held back by one segment so the last one of the window can be marked
+            previous = None
+            for segment in segments_generator:
+                result = {
+                    "start": start + segment.start,
+                    "end": min(end, start + segment.end),
+                    "text": segment.text.strip(),
+                    "language": languages.tag(start + segment.start, start + segment.end)
+                }
+                if not timeline.add(result):
+                    continue
+                if writer is not None:
+                    writer.add(result, index)
+                within = segment.end / max(end - start, 1e-3)
+                if previous is not None:
+                    yield previous
+                previous = {
+                    **result,
+                    "progress": min(95, (completed + min(1.0, within)) / total_windows * 100),
+                    "window": index
+                }
+            if previous is not None:
+                yield {**previous, "window_done": True}
+            else:
+                # Nothing of it can still be in flight downstream
+                scheduler.finish(index)
+                if on_empty_window is not None:
+                    on_empty_window(index)
+            
+            # Detect the language once instead of on every window (unless
+            # every chunk is decoded in its own language)
+            if not MULTILINGUAL:
+                language = language or info.language
+            completed += 1
+        
+        if writer is not None:
+            writer.finish(len(audio) / SAMPLE_RATE)
+            writer = None
+    finally:
+        if writer is not None:
+            writer.close()
 
 
 # For testing
@@ -107,9 +713,10 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python transcribe.py <audio_path>")
+        print("Usage: python transcribe.py <audio_path> [latency|throughput]")
         sys.exit(1)
     
-    print("Starting streaming transcription...")
-    for seg in transcribe_audio_streaming(sys.argv[1]):
+    mode = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MODE
+    print(f"Starting {mode} transcription with {get_tuning(mode)}...")
+    for seg in transcribe_audio_streaming(sys.argv[1], mode=mode):
         print(f"[{seg['start']:.2f} - {seg['end']:.2f}] {seg['text']}")
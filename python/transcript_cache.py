@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of transcription segments.
+Keyed by the media fingerprint and every setting that affects decoding,
+so reopening the same video replays its segments without running Whisper.
+
+Usage:
+    python transcript_cache.py stats
+    python transcript_cache.py list
+    python transcript_cache.py purge [--older-than DAYS]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Optional, Iterable, Dict, Any, Tuple
+
+from disk_cache import DiskCache, run_cache_cli
+from fingerprint import media_fingerprint
+
+# Size limit for cached transcripts (override with SUBPLAYER_TRANSCRIPT_CACHE_MB)
+MAX_CACHE_BYTES = int(os.environ.get("SUBPLAYER_TRANSCRIPT_CACHE_MB", "256")) * 1024 * 1024
+
+_cache = DiskCache("transcripts", MAX_CACHE_BYTES, suffix=".json")
+
+
+def cache_key(audio_path: str, settings: Dict[str, Any]) -> str:
+    """
+    Build the cache key for a media file and transcription settings.
+
+    Args:
+        audio_path: Path to audio or video file
+        settings: Model name, compute type, beam size, VAD parameters, ...
+
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps(
+        {"media": media_fingerprint(audio_path), "settings": settings},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_transcript(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached transcript ({"duration", "segments"}) or None on a miss.
+    """
+    data = _cache.read_bytes(key)
+    if data is None:
+        return None
+
+    try:
+        return json.loads(data)
+    except ValueError:
+        print(f"Corrupt transcript cache entry: {key}", file=sys.stderr)
+        return None
+
+
+def _cached_segment(segment: Dict[str, Any]) -> Dict[str, Any]:
+    cached = {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+    if segment.get("language"):
+        cached["language"] = segment["language"]
+    return cached
+
+
+class TranscriptWriter:
+    """
+    Writes a transcript to disk segment by segment, so memory does not grow
+    with the length of the recording.
+
+    Segments are added in parts (windows transcribed out of order); the
+    segments of one part must be added one after another. finish() stores
+    the parts in part order. Only the byte range of each part is kept in
+    memory.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        directory = os.path.dirname(_cache.path_for(key))
+        os.makedirs(directory, exist_ok=True)
+        # .tmp files are not cache entries
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        self._target = self.path[:-len(".tmp")] + ".json.tmp"
+        self._file = os.fdopen(fd, "wb")
+        # part -> (first byte, end byte) of its segments in the file
+        self._parts: Dict[int, Tuple[int, int]] = {}
+
+    def add(self, segment: Dict[str, Any], part: int = 0):
+        """Append a segment (its start, end, text and language)."""
+        offset = self._file.tell()
+        self._file.write((json.dumps(_cached_segment(segment), ensure_ascii=False) + "\n").encode("utf-8"))
+        first, _ = self._parts.get(part, (offset, offset))
+        self._parts[part] = (first, self._file.tell())
+
+    def finish(self, duration: float):
+        """Save the complete transcript under the writer's key."""
+        try:
+            self._file.close()
+            with open(self.path, "rb") as source, open(self._target, "wb") as out:
+                out.write(b'{"duration": ' + json.dumps(duration).encode() + b', "segments": [')
+                separator = b""
+                for part in sorted(self._parts):
+                    first, end = self._parts[part]
+                    source.seek(first)
+                    while source.tell() < end:
+                        out.write(separator + source.readline().rstrip(b"\n"))
+                        separator = b", "
+                out.write(b"]}")
+            _cache.put_file(self.key, self._target)
+        except OSError as e:
+            print(f"Failed to cache transcript: {e}", file=sys.stderr)
+        finally:
+            self.close()
+
+    def close(self):
+        """Discard what was written (an incomplete transcript is not cached)."""
+        self._file.close()
+        for path in (self.path, self._target):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def store_transcript(key: str, duration: float, segments: Iterable[Dict[str, Any]]):
+    """
+    Save a complete transcript under the given key. Each segment keeps its
+    start, end, text and (when known) the language Whisper detected for it.
+    Segments are read one at a time, in the order given.
+    """
+    try:
+        writer = TranscriptWriter(key)
+    except OSError as e:
+        print(f"Failed to cache transcript: {e}", file=sys.stderr)
+        return
+    try:
+        for segment in segments:
+            writer.add(segment)
+    except OSError as e:
+        print(f"Failed to cache transcript: {e}", file=sys.stderr)
+        writer.close()
+        return
+    except BaseException:
+        writer.close()
+        raise
+    writer.finish(duration)
+
+
+if __name__ == "__main__":
+    run_cache_cli(_cache, sys.argv[1:], prog="transcript_cache.py")
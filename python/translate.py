@@ -2,18 +2,28 @@
 """
 Translation module using Argos Translate with streaming support.
 Translates subtitles to Russian one at a time for low latency.
+
+Loaded translators are kept in a small LRU pool by source language, so
+videos that switch languages do not reload models on every switch.
+prepare_language() installs and loads a language on a background thread as
+soon as transcription detects it, ahead of its first translation.
 """
 
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, List, Dict
+import importlib.util
 import os
+import threading
 
-# Try to import argostranslate
-try:
-    import argostranslate.package
-    import argostranslate.translate
-    ARGOS_AVAILABLE = True
-except ImportError:
-    ARGOS_AVAILABLE = False
+from model_store import ModelMissingError, argos_package_path
+import resources
+from translation_memo import get_memo
+
+# argostranslate (and CTranslate2 behind it) is imported on first use, so
+# importing this module does not hold up process start
+ARGOS_AVAILABLE = importlib.util.find_spec("argostranslate") is not None
+if not ARGOS_AVAILABLE:
     print("Warning: argostranslate not installed. Run: pip install argostranslate", file=__import__('sys').stderr)
 
 
@@ -21,9 +31,20 @@ except ImportError:
 TARGET_LANG = "ru"
 DEFAULT_SOURCE_LANG = "en"
 
-# Global translation cache
-_translator = None
-_source_lang = None
+# Load recently used memo entries into memory when the translator is prepared
+PRELOAD_MEMO = os.environ.get("SUBPLAYER_PRELOAD_MEMO", "1") == "1"
+
+# Loaded translators kept at most (SUBPLAYER_TRANSLATOR_POOL)
+TRANSLATOR_POOL_SIZE = max(1, int(os.environ.get("SUBPLAYER_TRANSLATOR_POOL", "3")))
+
+# Translator pool: source language -> translator, least recently used first
+_translators = OrderedDict()
+_translators_lock = threading.Lock()
+# Languages being prepared: code -> Future of the translator (or None)
+_preparing: Dict[str, Future] = {}
+_package_versions = {}
+# Language pairs reported missing from the model store (reported once)
+_missing_packages = set()
 
 
 def detect_language(text: str) -> str:
@@ -54,11 +75,15 @@ def detect_language(text: str) -> str:
 def ensure_language_package(from_code: str, to_code: str) -> bool:
     """
     Ensure the translation package is installed.
-    Downloads if necessary.
+    Installs it from the local model store only: nothing is downloaded and
+    the package index is never refreshed here (see model_store.py prefetch).
     """
     if not ARGOS_AVAILABLE:
         return False
     
+    import argostranslate.package
+    import argostranslate.translate
+    
     # Check if already installed
     installed = argostranslate.translate.get_installed_languages()
     from_lang = next((l for l in installed if l.code == from_code), None)
@@ -69,19 +94,13 @@ def ensure_language_package(from_code: str, to_code: str) -> bool:
         if translation:
             return True
     
-    # Try to download and install
     try:
-        argostranslate.package.update_package_index()
-        available = argostranslate.package.get_available_packages()
-        
-        package = next(
-            (p for p in available if p.from_code == from_code and p.to_code == to_code),
-            None
-        )
-        
-        if package:
-            argostranslate.package.install_from_path(package.download())
-            return True
+        argostranslate.package.install_from_path(argos_package_path(from_code, to_code))
+        return True
+    except ModelMissingError as e:
+        if (from_code, to_code) not in _missing_packages:
+            _missing_packages.add((from_code, to_code))
+            print(f"No {from_code}->{to_code} translation: {e}", file=__import__('sys').stderr)
     except Exception as e:
         print(f"Failed to install language package: {e}", file=__import__('sys').stderr)
     
@@ -89,11 +108,12 @@ def ensure_language_package(from_code: str, to_code: str) -> bool:
 
 
 def get_translator(from_code: str):
-    """Get or create translator for the given source language."""
-    global _translator, _source_lang
-    
-    if _translator is not None and _source_lang == from_code:
-        return _translator
+    """Get or create translator for the given source language (pooled)."""
+    with _translators_lock:
+        translator = _translators.get(from_code)
+        if translator is not None:
+            _translators.move_to_end(from_code)
+            return translator
     
     if not ARGOS_AVAILABLE:
         return None
@@ -101,22 +121,114 @@ def get_translator(from_code: str):
     if from_code == TARGET_LANG:
         return None  # No translation needed
     
+    import argostranslate.translate
+    
     installed = argostranslate.translate.get_installed_languages()
     from_lang = next((l for l in installed if l.code == from_code), None)
     to_lang = next((l for l in installed if l.code == TARGET_LANG), None)
     
     if from_lang and to_lang:
-        _translator = from_lang.get_translation(to_lang)
-        _source_lang = from_code
-        return _translator
+        translator = from_lang.get_translation(to_lang)
+        # Load the CTranslate2 model now with our thread budget; Argos would
+        # otherwise create it lazily with its own settings
+        try:
+            _load_ctranslate2_model(translator)
+        except Exception as e:
+            # Pivot translations have no single model; they load on first use
+            print(f"Translation model preload skipped: {e}", file=__import__('sys').stderr)
+        
+        with _translators_lock:
+            # Another thread may have loaded it meanwhile
+            translator = _translators.setdefault(from_code, translator)
+            _translators.move_to_end(from_code)
+            while len(_translators) > TRANSLATOR_POOL_SIZE:
+                _translators.popitem(last=False)
+        return translator
     
     return None
 
 
-def ensure_translation_ready(source_lang: str = DEFAULT_SOURCE_LANG) -> str:
+def prepare_language(from_code: str) -> Future:
+    """
+    Install (from the model store) and load a source language on a
+    background thread; translate_batch waits for it if it gets there first.
+    
+    Returns:
+        Future of the translator (None if there is none for this language)
+    """
+    with _translators_lock:
+        future = _preparing.get(from_code)
+        if future is not None:
+            return future
+        future = Future()
+        _preparing[from_code] = future
+    
+    def run():
+        try:
+            translator = get_translator(from_code)
+            if translator is None and ensure_language_package(from_code, TARGET_LANG):
+                translator = get_translator(from_code)
+            future.set_result(translator)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # Evicted languages are prepared again next time
+            with _translators_lock:
+                _preparing.pop(from_code, None)
+    
+    threading.Thread(target=run, name=f"prepare-{from_code}", daemon=True).start()
+    return future
+
+
+def _translator_for(from_code: str):
+    """Translator for a language, preparing it if needed (waits)."""
+    translator = get_translator(from_code)
+    if translator is not None or from_code == TARGET_LANG:
+        return translator
+    try:
+        return prepare_language(from_code).result()
+    except Exception as e:
+        print(f"Failed to prepare {from_code} translation: {e}", file=__import__('sys').stderr)
+        return None
+
+
+def get_package_version(from_code: str) -> str:
+    """
+    Version of the installed Argos package for from_code -> TARGET_LANG.
+    Part of the translation memo key, so upgrading a package invalidates it.
+    """
+    if from_code in _package_versions:
+        return _package_versions[from_code]
+    
+    version = "none"
+    if ARGOS_AVAILABLE:
+        import argostranslate.package
+        try:
+            for package in argostranslate.package.get_installed_packages():
+                if package.from_code == from_code and package.to_code == TARGET_LANG:
+                    version = str(getattr(package, "package_version", "unknown"))
+                    break
+        except Exception as e:
+            print(f"Failed to read package version: {e}", file=__import__('sys').stderr)
+            return version
+    
+    # Only cache versions of installed packages - "none" may change after install
+    if version != "none":
+        _package_versions[from_code] = version
+    return version
+
+
+def ensure_translation_ready(
+    source_lang: str = DEFAULT_SOURCE_LANG,
+    preload_memo: bool = PRELOAD_MEMO
+) -> str:
     """
     Pre-load translation model for faster first translation.
     Returns detected/default source language.
+    
+    Args:
+        source_lang: Source language code
+        preload_memo: Load recently used translations into memory
     """
     if not ARGOS_AVAILABLE:
         return source_lang
@@ -124,9 +236,12 @@ def ensure_translation_ready(source_lang: str = DEFAULT_SOURCE_LANG) -> str:
     # Ensure package is installed
     ensure_language_package(source_lang, TARGET_LANG)
     
-    # Pre-load translator
+    # Pre-load translator, including its CTranslate2 model
     get_translator(source_lang)
     
+    if preload_memo:
+        get_memo().preload(source_lang, TARGET_LANG, get_package_version(source_lang))
+    
     return source_lang
 
 
@@ -153,23 +268,163 @@ def translate_text_single(text: str, source_lang: Optional[str] = None) -> str:
     if source_lang == TARGET_LANG:
         return text
     
-    # Get translator
-    translator = get_translator(source_lang)
+    # Repeated lines are served from the memo
+    memo = get_memo()
+    version = get_package_version(source_lang)
+    cached = memo.get(source_lang, TARGET_LANG, version, text)
+    if cached is not None:
+        return cached
     
-    if translator is None:
-        # Try to install package on-the-fly
-        if ensure_language_package(source_lang, TARGET_LANG):
-            translator = get_translator(source_lang)
+    # Get translator (installs the package on the fly if needed)
+    translator = _translator_for(source_lang)
     
     if translator:
         try:
-            return translator.translate(text)
+            translated = translator.translate(text)
+            memo.put(source_lang, TARGET_LANG, get_package_version(source_lang), text, translated)
+            return translated
         except Exception as e:
             print(f"Translation error: {e}", file=__import__('sys').stderr)
     
     return text  # Return original on error
 
 
+def _load_ctranslate2_model(translator):
+    """
+    Load the CTranslate2 model behind an Argos translation (once).
+    
+    Returns:
+        The package translation holding the model
+    """
+    import ctranslate2
+    from argostranslate import settings
+    
+    # get_translation() wraps the package translation in a caching layer
+    translation = getattr(translator, "underlying", translator)
+    if translation.translator is None:
+        # One stage thread calls the model, so a single replica with the
+        # translation share of the CPU budget
+        with resources.pinned("translate"):
+            translation.translator = ctranslate2.Translator(
+                str(translation.pkg.package_path / "model"),
+                device=settings.device,
+                inter_threads=1,
+                intra_threads=resources.threads("translate")
+            )
+    return translation
+
+
+def _translate_batch_ctranslate2(translator, texts: List[str]) -> List[str]:
+    """
+    Translate several texts in one CTranslate2 call.
+    Uses the Argos package tokenizer and model directly; each text is
+    translated as a single sentence, which fits Whisper segments.
+    """
+    translation = _load_ctranslate2_model(translator)
+    pkg = translation.pkg
+    
+    tokenized = [pkg.tokenizer.encode(text) for text in texts]
+    target_prefix = None
+    if pkg.target_prefix:
+        target_prefix = [[pkg.target_prefix]] * len(tokenized)
+    
+    results = translation.translator.translate_batch(
+        tokenized,
+        target_prefix=target_prefix,
+        replace_unknowns=True,
+        max_batch_size=32,
+        beam_size=4,
+        num_hypotheses=1,
+        length_penalty=0.2
+    )
+    
+    translated = []
+    for result in results:
+        value = pkg.tokenizer.decode(result.hypotheses[0])
+        if pkg.target_prefix and value.startswith(pkg.target_prefix):
+            value = value[len(pkg.target_prefix):]
+        translated.append(value.strip())
+    return translated
+
+
+def translate_batch(
+    texts: List[str],
+    source_lang: Optional[str] = None,
+    languages: Optional[List[Optional[str]]] = None
+) -> List[str]:
+    """
+    Translate several texts to Russian at once.
+    Memoized lines are reused; the rest go through one batched model call
+    per language, which is much faster than translating them one by one.
+    
+    Args:
+        texts: Texts to translate
+        source_lang: Source language code (auto-detect per text if None)
+        languages: Per-text language codes (e.g. detected by Whisper); a
+            missing entry falls back to source_lang
+        
+    Returns:
+        Translated texts in the same order (originals on error)
+    """
+    results = list(texts)
+    
+    # Group texts that need translation by source language
+    groups: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if not text.strip():
+            continue
+        lang = (languages[i] if languages else None) or source_lang or detect_language(text)
+        if lang == TARGET_LANG:
+            continue
+        groups.setdefault(lang, []).append(i)
+    
+    memo = get_memo()
+    
+    for lang, indices in groups.items():
+        version = get_package_version(lang)
+        
+        # Serve repeated lines from the memo, translate each unique miss once
+        misses: Dict[str, List[int]] = {}
+        for i in indices:
+            cached = memo.get(lang, TARGET_LANG, version, texts[i])
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.setdefault(texts[i], []).append(i)
+        
+        if not misses:
+            continue
+        
+        translator = _translator_for(lang)
+        if translator is None:
+            continue
+        # The package may have been installed just now
+        version = get_package_version(lang)
+        
+        pending = list(misses)
+        try:
+            translated = _translate_batch_ctranslate2(translator, pending)
+        except Exception as e:
+            # Pivot translations and unexpected package layouts: one by one
+            print(f"Batch translation unavailable, translating one by one: {e}", file=__import__('sys').stderr)
+            translated = []
+            for text in pending:
+                try:
+                    translated.append(translator.translate(text))
+                except Exception as e:
+                    print(f"Translation error: {e}", file=__import__('sys').stderr)
+                    translated.append(None)
+        
+        for text, value in zip(pending, translated):
+            if value is None:
+                continue
+            memo.put(lang, TARGET_LANG, version, text, value)
+            for i in misses[text]:
+                results[i] = value
+    
+    return results
+
+
 # For testing
 if __name__ == "__main__":
     print("Testing translation...")
@@ -188,3 +443,7 @@ if __name__ == "__main__":
         print(f"EN: {text}")
         print(f"RU: {translated}")
         print()
+    
+    print("Batch:")
+    for text, translated in zip(test_texts, translate_batch(test_texts, "en")):
+        print(f"{text} -> {translated}")
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Two-tier translation memo: in-process LRU in front of a SQLite store.
+Repeated subtitle lines are translated once and reused across videos.
+The store is capped at a number of rows; the least recently used go first.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+
+from disk_cache import CACHE_ROOT
+
+# Number of translations kept in memory
+MEMO_LRU_SIZE = 4096
+
+MEMO_DB_PATH = os.path.join(CACHE_ROOT, "translations.sqlite3")
+
+# Row limit for the SQLite store (override with SUBPLAYER_MEMO_MAX_ROWS)
+MEMO_MAX_ROWS = int(os.environ.get("SUBPLAYER_MEMO_MAX_ROWS", "200000"))
+
+# Hits whose used_at refresh is buffered before it is written to disk
+MEMO_TOUCH_BATCH = 256
+
+# Puts between two recounts of the store; other processes (batch workers)
+# insert into the same file, so a count kept in memory drifts
+MEMO_RECOUNT_PUTS = 256
+
+MemoKey = Tuple[str, str, str, str]
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different lines share one entry."""
+    return " ".join(text.split())
+
+
+class TranslationMemo:
+    """
+    Translation lookup keyed by (source_lang, target_lang, package_version, text).
+    Memory hits cost a dict lookup; disk hits are promoted into memory.
+
+    Hits only record their time in memory. The used_at column is updated in
+    one transaction on the next put(), every touch_batch hits, and on
+    flush() / close(). The row count is tracked in memory and re-read inside
+    the write transaction every recount_puts puts, so the store exceeds
+    max_rows by at most what other processes insert in between.
+    """
+
+    def __init__(self, db_path: str = MEMO_DB_PATH, lru_size: int = MEMO_LRU_SIZE,
+                 max_rows: int = MEMO_MAX_ROWS, touch_batch: int = MEMO_TOUCH_BATCH,
+                 recount_puts: int = MEMO_RECOUNT_PUTS):
+        self.db_path = db_path
+        self.lru_size = lru_size
+        self.max_rows = max(1, max_rows)
+        self.touch_batch = max(1, touch_batch)
+        self.recount_puts = max(1, recount_puts)
+        self._lru: "OrderedDict[MemoKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._touched: Dict[MemoKey, float] = {}
+        self._touch_hits = 0
+        self._rows: Optional[int] = None
+        self._puts_since_count = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None:
+            return self._db
+
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                """CREATE TABLE IF NOT EXISTS translations (
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    used_at REAL NOT NULL,
+                    PRIMARY KEY (source_lang, target_lang, version, text)
+                )"""
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS translations_used_at ON translations (used_at)"
+            )
+            db.commit()
+            self._db = db
+        except sqlite3.Error as e:
+            # Keep working with the in-memory tier only
+            print(f"Translation memo unavailable: {e}", file=sys.stderr)
+            self.db_path = None
+        return self._db
+
+    def _remember(self, key: MemoKey, translation: str):
+        self._lru[key] = translation
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _drop_touches(self):
+        self._touched.clear()
+        self._touch_hits = 0
+
+    def _write_touches(self, db: sqlite3.Connection):
+        """Write buffered used_at refreshes (the caller commits)."""
+        if not self._touched:
+            return
+        db.executemany(
+            "UPDATE translations SET used_at=? "
+            "WHERE source_lang=? AND target_lang=? AND version=? AND text=?",
+            [(used_at, *key) for key, used_at in self._touched.items()]
+        )
+        self._drop_touches()
+
+    def _touch(self, key: MemoKey):
+        if not self.db_path:
+            return
+        self._touched[key] = time.time()
+        self._touch_hits += 1
+        if self._touch_hits < self.touch_batch:
+            return
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            self._write_touches(db)
+            db.commit()
+        except sqlite3.Error as e:
+            self._drop_touches()
+            print(f"Translation memo update failed: {e}", file=sys.stderr)
+
+    def _evict(self, db: sqlite3.Connection) -> int:
+        """Delete the least recently used rows above max_rows (the caller commits)."""
+        self._puts_since_count += 1
+        if self._rows is None or self._puts_since_count >= self.recount_puts:
+            # Inside the write transaction: no other process changes the count
+            self._rows = db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            self._puts_since_count = 0
+        excess = self._rows - self.max_rows
+        if excess <= 0:
+            return 0
+        db.execute(
+            "DELETE FROM translations WHERE rowid IN ("
+            "SELECT rowid FROM translations ORDER BY used_at LIMIT ?)",
+            (excess,)
+        )
+        self._rows -= excess
+        return excess
+
+    def get(self, source_lang: str, target_lang: str, version: str, text: str) -> Optional[str]:
+        """Return the memoized translation or None on a miss."""
+        key = (source_lang, target_lang, version, normalize_text(text))
+
+        with self._lock:
+            translation = self._lru.get(key)
+            if translation is not None:
+                self._lru.move_to_end(key)
+                self._touch(key)
+                self.memory_hits += 1
+                return translation
+
+            db = self._connect() if self.db_path else None
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT translation FROM translations "
+                        "WHERE source_lang=? AND target_lang=? AND version=? AND text=?",
+                        key
+                    ).fetchone()
+                    if row is not None:
+                        self._remember(key, row[0])
+                        self._touch(key)
+                        self.disk_hits += 1
+                        return row[0]
+                except sqlite3.Error as e:
+                    print(f"Translation memo read failed: {e}", file=sys.stderr)
+
+            self.misses += 1
+            return None
+
+    def put(self, source_lang: str, target_lang: str, version: str, text: str, translation: str):
+        """Store a translation in both tiers, evicting old rows over max_rows."""
+        key = (source_lang, target_lang, version, normalize_text(text))
+
+        with self._lock:
+            self._remember(key, translation)
+            self._touched.pop(key, None)
+
+            db = self._connect() if self.db_path else None
+            if db is not None:
+                try:
+                    self._write_touches(db)
+                    exists = db.execute(
+                        "SELECT 1 FROM translations "
+                        "WHERE source_lang=? AND target_lang=? AND version=? AND text=?",
+                        key
+                    ).fetchone() is not None
+                    db.execute(
+                        "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                        (*key, translation, time.time())
+                    )
+                    if self._rows is not None and not exists:
+                        self._rows += 1
+                    self._evict(db)
+                    db.commit()
+                except sqlite3.Error as e:
+                    self._drop_touches()
+                    print(f"Translation memo write failed: {e}", file=sys.stderr)
+
+    def flush(self):
+        """Write buffered used_at refreshes to disk."""
+        with self._lock:
+            db = self._db
+            if db is None:
+                self._drop_touches()
+                return
+            try:
+                self._write_touches(db)
+                db.commit()
+            except sqlite3.Error as e:
+                self._drop_touches()
+                print(f"Translation memo update failed: {e}", file=sys.stderr)
+
+    def close(self):
+        """Flush buffered refreshes and close the SQLite connection."""
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def preload(self, source_lang: str, target_lang: str, version: str) -> int:
+        """
+        Load the most recently used translations for a language pair into memory.
+
+        Returns:
+            Number of loaded entries
+        """
+        with self._lock:
+            db = self._connect() if self.db_path else None
+            if db is None:
+                return 0
+
+            try:
+                self._write_touches(db)
+                db.commit()
+                rows = db.execute(
+                    "SELECT text, translation FROM translations "
+                    "WHERE source_lang=? AND target_lang=? AND version=? "
+                    "ORDER BY used_at DESC LIMIT ?",
+                    (source_lang, target_lang, version, self.lru_size)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"Translation memo preload failed: {e}", file=sys.stderr)
+                return 0
+
+            # Oldest first so the most recent end up at the hot end of the LRU
+            for text, translation in reversed(rows):
+                self._remember((source_lang, target_lang, version, text), translation)
+            return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since the process started."""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._lru)
+        }
+
+
+# Shared memo instance
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_memo() -> TranslationMemo:
+    """Return the process-wide translation memo."""
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            _memo = TranslationMemo()
+        return _memo
@@ -5,13 +5,64 @@ Generates Russian voice-over for subtitles.
 """
 
 import os
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import torch
 import numpy as np
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+from pipeline import micro_batches
+from model_store import silero_model_path
+import resources
+import tts_cache
+
+# Silero model package; part of the TTS cache key
+SILERO_MODEL = 'v4_ru'
 
 # Global model cache
 _model = None
+_model_lock = threading.Lock()
 _sample_rate = 48000
+# torch threads of this process, once limited
+_torch_threads = None
+
+# Synthesis engine configuration
+# Number of worker processes (0 = synthesize in the calling process)
+TTS_WORKERS = int(os.environ.get("SUBPLAYER_TTS_WORKERS", "0"))
+# torch threads used by each worker process (default: the TTS share of the
+# CPU budget divided between the workers)
+TORCH_THREADS_PER_WORKER = int(os.environ.get("SUBPLAYER_TTS_THREADS", "0"))
+# Up to this many short texts go to a worker as one unit of work (Silero
+# v4_ru synthesizes one text per apply_tts call, so they run back to back)
+TTS_BATCH_SIZE = 4
+TTS_BATCH_WAIT_MS = 200
+# Texts longer than this are always synthesized on their own
+SHORT_TEXT_CHARS = 80
+
+# Shared engine (kept between jobs in server mode)
+_engine = None
+
+# A synthesis request: (key, text)
+TtsJob = Tuple[Any, str]
+# Internal unit of work: (clip key, text, output_path)
+_ClipJob = Tuple[str, str, str]
+
+
+def _limit_torch_threads(threads: int):
+    """Size torch's thread pools (process-wide, so only once)."""
+    global _torch_threads
+    
+    torch.set_num_threads(max(1, threads))
+    try:
+        # Synthesis runs one forward pass at a time
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before torch runs any parallel work
+        pass
+    _torch_threads = threads
 
 
 def get_tts_model():
@@ -21,17 +72,23 @@ def get_tts_model():
     if _model is not None:
         return _model
     
-    # Download and load Silero model
-    device = torch.device('cpu')
-    
-    # Use v4 model for better quality
-    _model, _ = torch.hub.load(
-        repo_or_dir='snakers4/silero-models',
-        model='silero_tts',
-        language='ru',
-        speaker='v4_ru'
-    )
-    _model.to(device)
+    # The warm-up thread and the TTS stage may ask at the same time
+    with _model_lock:
+        if _model is not None:
+            return _model
+        
+        # Pool workers were limited by their initializer already
+        if _torch_threads is None:
+            _limit_torch_threads(resources.threads("tts"))
+        
+        device = torch.device('cpu')
+        
+        # Standalone package from the model store instead of torch.hub,
+        # which contacts GitHub to resolve the repository
+        importer = torch.package.PackageImporter(silero_model_path(SILERO_MODEL))
+        model = importer.load_pickle('tts_models', 'model')
+        model.to(device)
+        _model = model
     
     return _model
 
@@ -95,6 +152,16 @@ def generate_speech_to_file(
     if audio is None:
         return False
     
+    return save_wav(audio, output_path, sample_rate)
+
+
+def save_wav(audio: torch.Tensor, output_path: str, sample_rate: int = 48000) -> bool:
+    """
+    Save a synthesized audio tensor as 16-bit WAV.
+    
+    Returns:
+        True if successful
+    """
     try:
         # Use scipy to save WAV (more reliable than torchaudio)
         from scipy.io import wavfile
@@ -114,9 +181,269 @@ def generate_speech_to_file(
         return False
 
 
+def _synthesize_group(group: List[_ClipJob], speaker: str, sample_rate: int) -> List[Tuple[Any, bool]]:
+    """
+    Synthesize a group of jobs one text at a time and write their WAV files.
+    Runs in the calling process or in a pool worker.
+    
+    Returns:
+        (key, success) for every job in the group
+    """
+    results = [(key, False) for key, _, _ in group]
+    todo = [(i, job) for i, job in enumerate(group) if job[1].strip()]
+    if not todo:
+        return results
+    
+    # A model that fails to load fails the whole group with one message
+    try:
+        get_tts_model()
+    except Exception as e:
+        print(f"TTS error: {e}", file=__import__('sys').stderr)
+        return results
+    
+    for i, (key, text, output_path) in todo:
+        audio = generate_speech(text, speaker, sample_rate)
+        if audio is not None:
+            results[i] = (key, save_wav(audio, output_path, sample_rate))
+    
+    return results
+
+
+def _init_pool_worker(torch_threads: int):
+    """Pool worker initializer: limit torch threads and load the model once."""
+    _limit_torch_threads(torch_threads)
+    preload_model()
+
+
+class SynthesisEngine:
+    """
+    Silero synthesis engine.
+    
+    Clips are looked up in the persistent TTS cache first; only texts that
+    were never voiced with the same speaker, rate and model are synthesized,
+    and a text repeated while its first copy is in flight waits for it.
+    Misses are grouped into batches of short texts, optionally spread over a
+    pool of worker processes, and results are yielded as soon as they
+    complete (which may be out of input order).
+    """
+    
+    def __init__(
+        self,
+        speaker: str = 'xenia',
+        sample_rate: int = 48000,
+        workers: int = TTS_WORKERS,
+        threads_per_worker: int = TORCH_THREADS_PER_WORKER,
+        batch_size: int = TTS_BATCH_SIZE,
+        batch_wait_ms: float = TTS_BATCH_WAIT_MS
+    ):
+        self.speaker = speaker
+        self.sample_rate = sample_rate
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self._executor = None
+        # Guards the clip -> waiting jobs maps, which the pool path fills on
+        # its input thread and answers on the caller's thread
+        self._waiting_lock = threading.Lock()
+        # Counters since the engine was created (see stats()); updated by the
+        # TTS stage, the pool input thread and the refiner, read by metrics
+        self._stats = {"cache_hits": 0, "shared": 0, "synthesized": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        
+        if workers > 0:
+            threads_per_worker = threads_per_worker or max(1, resources.threads("tts") // workers)
+            # spawn: forking a process that already runs torch threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pool_worker,
+                initargs=(threads_per_worker,)
+            )
+    
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+    
+    def _plan(self, jobs: Iterable[TtsJob], waiting: Dict[str, List[Any]]) -> Iterator[Any]:
+        """
+        Resolve jobs against the cache as they arrive.
+        
+        Yields (key, audio_path) results for empty texts and cache hits, and
+        lists of clip jobs to synthesize (short texts together, long ones
+        alone). `waiting` maps clip keys in flight to the job keys that
+        need them.
+        """
+        for batch in micro_batches(jobs, self.batch_size, self.batch_wait_ms):
+            group = []
+            for key, text in batch:
+                if not text.strip():
+                    yield key, None
+                    continue
+                
+                clip = tts_cache.clip_key(text, self.speaker, self.sample_rate, SILERO_MODEL)
+                with self._waiting_lock:
+                    if clip in waiting:
+                        waiting[clip].append(key)
+                        self._count("shared")
+                        continue
+                path = tts_cache.lookup(clip)
+                if path is not None:
+                    self._count("cache_hits")
+                    yield key, path
+                    continue
+                
+                with self._waiting_lock:
+                    waiting[clip] = [key]
+                job = (clip, text, tts_cache.staging_path(clip))
+                if len(text) > SHORT_TEXT_CHARS:
+                    yield [job]
+                else:
+                    group.append(job)
+            if group:
+                yield group
+    
+    def _finish(self, group: List[_ClipJob], results, waiting: Dict[str, List[Any]]) -> Iterator[Tuple[Any, Optional[str]]]:
+        """Move synthesized clips into the cache and answer every waiting job."""
+        staged = {clip: output_path for clip, _, output_path in group}
+        for clip, success in results:
+            path = None
+            self._count("synthesized" if success else "failed")
+            if success:
+                try:
+                    path = tts_cache.store(clip, staged[clip])
+                except OSError as e:
+                    print(f"Failed to cache TTS clip: {e}", file=__import__('sys').stderr)
+            elif os.path.exists(staged[clip]):
+                os.remove(staged[clip])
+            with self._waiting_lock:
+                keys = waiting.pop(clip, [])
+            for key in keys:
+                yield key, path
+    
+    def synthesize(
+        self,
+        jobs: Iterable[TtsJob],
+        on_group: Optional[Callable[[int, float, float], None]] = None
+    ) -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        Voice a stream of (key, text) jobs.
+        
+        Args:
+            jobs: (key, text) pairs
+            on_group: Called with (clips, wall seconds, CPU seconds) for every
+                synthesized group; CPU time is only known for in-process
+                synthesis (0 with a worker pool)
+        
+        Yields:
+            (key, audio_path) as each job completes; audio_path is a WAV file
+            in the TTS cache, or None if the text is empty or synthesis failed
+        """
+        waiting: Dict[str, List[Any]] = {}
+        
+        if self._executor is None:
+            for item in self._plan(jobs, waiting):
+                if isinstance(item, list):
+                    wall, cpu = time.perf_counter(), time.thread_time()
+                    results = _synthesize_group(item, self.speaker, self.sample_rate)
+                    if on_group is not None:
+                        on_group(len(item), time.perf_counter() - wall, time.thread_time() - cpu)
+                    yield from self._finish(item, results, waiting)
+                else:
+                    yield item
+            return
+        
+        # The input is read on its own thread, so clips finished by the pool
+        # are delivered while the next subtitle is still being transcribed
+        events: "queue.Queue" = queue.Queue()
+        # Keep the pool busy without queueing the whole video
+        slots = threading.Semaphore(self.workers * 2)
+        stopped = threading.Event()
+        
+        def feed():
+            submitted = 0
+            plan = self._plan(jobs, waiting)
+            try:
+                for item in plan:
+                    # The consumer is gone: stop pulling input (cache hits
+                    # never wait for a slot)
+                    if stopped.is_set():
+                        return
+                    if not isinstance(item, list):
+                        events.put(("result", item))
+                        continue
+                    while not slots.acquire(timeout=0.5):
+                        if stopped.is_set():
+                            return
+                    future = self._executor.submit(_synthesize_group, item, self.speaker, self.sample_rate)
+                    started = time.perf_counter()
+                    future.add_done_callback(
+                        lambda future, group=item, started=started: events.put(("group", (future, group, started)))
+                    )
+                    submitted += 1
+            except BaseException as e:
+                events.put(("error", e))
+            else:
+                events.put(("end", submitted))
+            finally:
+                # Stops micro-batching, which closes the job stream
+                plan.close()
+        
+        feeder = threading.Thread(target=feed, name="tts-input", daemon=True)
+        feeder.start()
+        
+        collected = 0
+        submitted = None
+        try:
+            while submitted is None or collected < submitted:
+                kind, payload = events.get()
+                if kind == "result":
+                    yield payload
+                elif kind == "group":
+                    future, group, started = payload
+                    collected += 1
+                    slots.release()
+                    if on_group is not None:
+                        on_group(len(group), time.perf_counter() - started, 0.0)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        print(f"TTS worker failed: {e}", file=__import__('sys').stderr)
+                        results = [(clip, False) for clip, _, _ in group]
+                    yield from self._finish(group, results, waiting)
+                elif kind == "error":
+                    raise payload
+                else:
+                    submitted = payload
+        finally:
+            stopped.set()
+    
+    def stats(self) -> Dict[str, int]:
+        """Clips served from the cache, shared with an identical line, synthesized or failed."""
+        with self._stats_lock:
+            return dict(self._stats)
+    
+    def close(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def get_synthesis_engine(speaker: str = 'xenia', sample_rate: int = 48000) -> SynthesisEngine:
+    """Return the shared synthesis engine, creating it on first use."""
+    global _engine
+    
+    if _engine is None or _engine.speaker != speaker or _engine.sample_rate != sample_rate:
+        if _engine is not None:
+            _engine.close()
+        _engine = SynthesisEngine(speaker, sample_rate)
+    
+    return _engine
+
+
 def generate_voiceover_for_subtitles(
     subtitles: List[Dict[str, Any]],
-    output_dir: str,
+    output_dir: Optional[str] = None,
     speaker: str = 'xenia',
     on_progress: callable = None
 ) -> List[Dict[str, Any]]:
@@ -125,38 +452,39 @@ def generate_voiceover_for_subtitles(
     
     Args:
         subtitles: List of subtitle dicts with 'translatedText', 'start', 'end'
-        output_dir: Directory to save audio files
+        output_dir: Copy the clips here as tts_{id}.wav; by default the
+            subtitles point at the clips in the TTS cache
         speaker: Voice to use
         on_progress: Progress callback (progress%, message)
         
     Returns:
         List of subtitles with added 'audioFile' field
     """
-    os.makedirs(output_dir, exist_ok=True)
+    import shutil
+    
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     
-    result = []
     total = len(subtitles)
+    jobs = [(i, sub.get('translatedText', '')) for i, sub in enumerate(subtitles)]
+    audio_files = [None] * total
     
-    for i, sub in enumerate(subtitles):
-        text = sub.get('translatedText', '')
-        
-        if text.strip():
-            audio_file = os.path.join(output_dir, f"tts_{sub['id']}.wav")
-            
-            if generate_speech_to_file(text, audio_file, speaker):
-                sub_with_audio = {**sub, 'audioFile': audio_file}
-            else:
-                sub_with_audio = {**sub, 'audioFile': None}
-        else:
-            sub_with_audio = {**sub, 'audioFile': None}
-        
-        result.append(sub_with_audio)
+    engine = get_synthesis_engine(speaker)
+    for done, (i, audio_path) in enumerate(engine.synthesize(jobs), start=1):
+        if audio_path and output_dir:
+            target = os.path.join(output_dir, f"tts_{subtitles[i]['id']}.wav")
+            shutil.copyfile(audio_path, target)
+            audio_path = target
+        audio_files[i] = audio_path
         
         if on_progress:
-            progress = (i + 1) / total * 100
-            on_progress(progress, f"Озвучено: {i + 1} / {total}")
+            progress = done / total * 100
+            on_progress(progress, f"Озвучено: {done} / {total}")
     
-    return result
+    return [
+        {**sub, 'audioFile': audio_file}
+        for sub, audio_file in zip(subtitles, audio_files)
+    ]
 
 
 def preload_model():
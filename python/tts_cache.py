@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of synthesized speech.
+Keyed by speaker, sample rate, Silero model version and the text, so a
+line that was already voiced (earlier in the video or in another session)
+is never synthesized again.
+
+Usage:
+    python tts_cache.py stats
+    python tts_cache.py list
+    python tts_cache.py purge [--older-than DAYS]
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Optional
+
+from disk_cache import DiskCache, run_cache_cli
+
+# Size limit for cached clips (override with SUBPLAYER_TTS_CACHE_MB)
+MAX_CACHE_BYTES = int(os.environ.get("SUBPLAYER_TTS_CACHE_MB", "1024")) * 1024 * 1024
+
+_cache = DiskCache("tts", MAX_CACHE_BYTES, suffix=".wav")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different lines share one clip."""
+    return " ".join(text.split())
+
+
+def clip_key(text: str, speaker: str, sample_rate: int, model_version: str) -> str:
+    """Cache key of the clip for a text and voice settings."""
+    payload = json.dumps(
+        {
+            "speaker": speaker,
+            "sample_rate": sample_rate,
+            "model": model_version,
+            "text": hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def lookup(key: str) -> Optional[str]:
+    """Path of a cached clip, or None on a miss."""
+    return _cache.get(key)
+
+
+def staging_path(key: str) -> str:
+    """
+    Where a clip for `key` is written before store() moves it into the
+    cache (same file system, ignored by eviction until then).
+    """
+    path = _cache.path_for(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return f"{path}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+
+
+def store(key: str, staged_path: str) -> str:
+    """Move a synthesized clip into the cache; returns its final path."""
+    return _cache.put_file(key, staged_path)
+
+
+if __name__ == "__main__":
+    run_cache_cli(_cache, sys.argv[1:], prog="tts_cache.py")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Packed TTS track of a job.
+
+Instead of one WAV per subtitle, every voiced line is appended as raw
+16-bit mono PCM to a single file per job. A subtitle points at its clip
+with audioFile (the packed file), audioOffset and audioLength (bytes) and
+audioRate (Hz); the player fetches exactly that byte range through the
+tts:// protocol in electron/main.ts, and the mixer reads it directly.
+"""
+
+import os
+import sys
+import threading
+import wave
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+class PackedTrack:
+    """
+    Append-only file of TTS clips.
+
+    Clips are read from the TTS cache and copied in once; a line voiced
+    twice in the same job points at the first copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        # clip path -> (offset, length, rate) in this track
+        self._spans: Dict[str, Tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def append(self, clip_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Copy a WAV clip into the track.
+
+        Returns:
+            audioFile / audioOffset / audioLength / audioRate fields for the
+            subtitle, or None if the clip cannot be read
+        """
+        with self._lock:
+            span = self._spans.get(clip_path)
+            if span is None:
+                if self._file.closed:
+                    return None
+                try:
+                    rate, pcm = _read_pcm16_mono(clip_path)
+                except (OSError, wave.Error, ValueError) as e:
+                    print(f"Failed to read TTS clip {clip_path}: {e}", file=sys.stderr)
+                    return None
+
+                self._file.seek(0, os.SEEK_END)
+                offset = self._file.tell()
+                self._file.write(pcm)
+                # Readers open the file while the job is still running
+                self._file.flush()
+                span = (offset, len(pcm), rate)
+                self._spans[clip_path] = span
+
+        offset, length, rate = span
+        return {
+            "audioFile": self.path,
+            "audioOffset": offset,
+            "audioLength": length,
+            "audioRate": rate
+        }
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def _read_pcm16_mono(path: str) -> Tuple[int, bytes]:
+    """Read a 16-bit WAV as little-endian mono PCM bytes."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"expected 16-bit PCM, got {8 * f.getsampwidth()}-bit")
+        rate = f.getframerate()
+        channels = f.getnchannels()
+        data = f.readframes(f.getnframes())
+
+    # WAV data is little-endian already
+    if channels == 1:
+        return rate, data
+    samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels)
+    return rate, samples.mean(axis=1).astype("<i2").tobytes()
+
+
+def read_clip(path: str, offset: int, length: int) -> np.ndarray:
+    """Samples of one packed clip as int16 (frames, 1)."""
+    return np.fromfile(path, dtype="<i2", count=length // 2, offset=offset).reshape(-1, 1)
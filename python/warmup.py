@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Concurrent model warm-up.
+
+Whisper (CTranslate2), Argos and Silero load independently, mostly in
+native code and file I/O, so a job starts all of them on background threads
+and decodes the audio in the meantime instead of loading them one after
+another. Whoever needs a model waits for its loader (or, for Whisper, on the
+model cache lock) only when it actually gets to use it.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class WarmUp:
+    """Loaders started for a job, by name, with their durations."""
+
+    def __init__(self):
+        self._futures: Dict[str, Future] = {}
+        # name -> seconds the loader took
+        self.timings: Dict[str, float] = {}
+
+    def start(self, name: str, loader: Callable[..., Any], *args, **kwargs):
+        """Run loader(*args, **kwargs) on a background thread."""
+        future: Future = Future()
+        self._futures[name] = future
+
+        def run():
+            started = time.perf_counter()
+            try:
+                result = loader(*args, **kwargs)
+            except BaseException as e:
+                self.timings[name] = round(time.perf_counter() - started, 3)
+                future.set_exception(e)
+                return
+            self.timings[name] = round(time.perf_counter() - started, 3)
+            future.set_result(result)
+
+        threading.Thread(target=run, name=f"warmup-{name}", daemon=True).start()
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Wait for a loader and return its result (re-raises its error)."""
+        return self._futures[name].result(timeout)
+
+    def ok(self, name: str) -> bool:
+        """Wait for a loader; False if it was not started, failed or returned False."""
+        future = self._futures.get(name)
+        if future is None:
+            return False
+        try:
+            return future.result() is not False
+        except Exception:
+            return False
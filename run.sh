@@ -68,11 +68,16 @@ else
     echo -e "${GREEN}✓${NC} Python зависимости установлены"
 fi
 
-# Check if TTS is installed (optional)
-if python -c "import torch; torch.hub.list('snakers4/silero-models')" 2>/dev/null; then
-    echo -e "${GREEN}✓${NC} Silero TTS доступен"
+# Models are downloaded only here; jobs never fetch them (prefetch skips
+# the ones already in the store). TTS is optional.
+PREFETCH_ARGS=""
+if ! python -c "import torch" 2>/dev/null; then
+    PREFETCH_ARGS="--no-tts"
+fi
+if (cd python && python model_store.py prefetch $PREFETCH_ARGS >/dev/null); then
+    echo -e "${GREEN}✓${NC} Модели загружены"
 else
-    echo -e "${YELLOW}⚠${NC} Silero TTS будет загружен при первом использовании (~100 МБ)"
+    echo -e "${YELLOW}⚠${NC} Не удалось загрузить модели: python python/model_store.py prefetch"
 fi
 
 deactivate
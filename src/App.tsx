@@ -10,7 +10,13 @@ export interface Subtitle {
   end: number
   text: string
   translatedText?: string
+  // Source language detected by Whisper
+  language?: string
   audioFile?: string | null
+  // Clip position in a packed TTS track (bytes, Hz)
+  audioOffset?: number
+  audioLength?: number
+  audioRate?: number
 }
 
 export interface ProcessingStatus {
@@ -31,7 +37,7 @@ function App() {
     clearSubtitles 
   } = useSubtitles()
 
-  const handleFileSelect = useCallback(async (filePath: string, withTts: boolean) => {
+  const handleFileSelect = useCallback(async (filePath: string, withTts: boolean, progressive: boolean, seekable: boolean) => {
     // Clear previous state
     clearSubtitles()
     setEnableTts(withTts)
@@ -41,8 +47,8 @@ function App() {
     const fileUrl = `file://${filePath}`
     setVideoSrc(fileUrl)
     
-    // Start processing with TTS option
-    await processVideo(filePath, withTts)
+    // Start processing with the options chosen on the upload screen
+    await processVideo(filePath, withTts, progressive, seekable)
   }, [processVideo, clearSubtitles])
 
   const handleReset = useCallback(() => {
@@ -1,12 +1,17 @@
 import { useState, useCallback } from 'react'
 
 interface FileUploadProps {
-  onFileSelect: (filePath: string, enableTts: boolean) => void
+  onFileSelect: (filePath: string, enableTts: boolean, progressive: boolean, seekable: boolean) => void
 }
 
 export default function FileUpload({ onFileSelect }: FileUploadProps) {
   const [isDragging, setIsDragging] = useState(false)
   const [enableTts, setEnableTts] = useState(false)
+  // Fast draft subtitles first, replaced by refined ones (opt-in)
+  const [progressive, setProgressive] = useState(false)
+  // Transcribe around the playhead first, following seeks (opt-in: windows
+  // are decoded without context from each other)
+  const [seekable, setSeekable] = useState(false)
 
   const handleDragOver = useCallback((e: React.DragEvent) => {
     e.preventDefault()
@@ -30,19 +35,19 @@ export default function FileUpload({ onFileSelect }: FileUploadProps) {
       const file = files[0]
       const filePath = (file as any).path
       if (filePath && isVideoFile(file.name)) {
-        onFileSelect(filePath, enableTts)
+        onFileSelect(filePath, enableTts, progressive, seekable)
       }
     }
-  }, [onFileSelect, enableTts])
+  }, [onFileSelect, enableTts, progressive, seekable])
 
   const handleOpenFile = useCallback(async () => {
     if (window.electron) {
       const filePath = await window.electron.openFile()
       if (filePath) {
-        onFileSelect(filePath, enableTts)
+        onFileSelect(filePath, enableTts, progressive, seekable)
       }
     }
-  }, [onFileSelect, enableTts])
+  }, [onFileSelect, enableTts, progressive, seekable])
 
   const isVideoFile = (filename: string): boolean => {
     const videoExtensions = ['.mp4', '.mkv', '.avi', '.mov', '.webm', '.m4v', '.wmv']
@@ -165,6 +170,66 @@ export default function FileUpload({ onFileSelect }: FileUploadProps) {
           </div>
         )}
       </div>
+
+      {/* Progressive subtitles toggle */}
+      <div className="flex items-center gap-4 p-4 rounded-xl bg-player-surface/50 border border-white/5">
+        <label className="flex items-center gap-3 cursor-pointer select-none">
+          <div className="relative">
+            <input
+              type="checkbox"
+              checked={progressive}
+              onChange={(e) => setProgressive(e.target.checked)}
+              className="sr-only peer"
+            />
+            <div className="
+              w-11 h-6 rounded-full transition-colors
+              bg-white/10 peer-checked:bg-player-accent
+            " />
+            <div className="
+              absolute top-0.5 left-0.5 w-5 h-5 rounded-full transition-transform
+              bg-white peer-checked:translate-x-5
+            " />
+          </div>
+          <div className="flex flex-col">
+            <span className="text-sm font-medium text-white/90">
+              Быстрые черновики
+            </span>
+            <span className="text-xs text-white/40">
+              Сначала черновые субтитры, затем уточнённые
+            </span>
+          </div>
+        </label>
+      </div>
+
+      {/* Seek-aware transcription toggle */}
+      <div className="flex items-center gap-4 p-4 rounded-xl bg-player-surface/50 border border-white/5">
+        <label className="flex items-center gap-3 cursor-pointer select-none">
+          <div className="relative">
+            <input
+              type="checkbox"
+              checked={seekable}
+              onChange={(e) => setSeekable(e.target.checked)}
+              className="sr-only peer"
+            />
+            <div className="
+              w-11 h-6 rounded-full transition-colors
+              bg-white/10 peer-checked:bg-player-accent
+            " />
+            <div className="
+              absolute top-0.5 left-0.5 w-5 h-5 rounded-full transition-transform
+              bg-white peer-checked:translate-x-5
+            " />
+          </div>
+          <div className="flex flex-col">
+            <span className="text-sm font-medium text-white/90">
+              Следовать за перемоткой
+            </span>
+            <span className="text-xs text-white/40">
+              Сначала распознаётся место воспроизведения
+            </span>
+          </div>
+        </label>
+      </div>
     </div>
   )
 }
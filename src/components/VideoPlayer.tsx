@@ -1,7 +1,9 @@
-import { useRef, useState, useEffect, useCallback } from 'react'
+import { useRef, useState, useEffect, useCallback, useMemo } from 'react'
 import Controls from './Controls'
 import Subtitles from './Subtitles'
 import type { Subtitle } from '../App'
+import { SubtitleIndex } from '../lib/subtitleIndex'
+import { ttsClipUrl } from '../lib/ttsClip'
 
 interface VideoPlayerProps {
   src: string
@@ -42,13 +44,13 @@ export default function VideoPlayer({
   const hideControlsTimeout = useRef<NodeJS.Timeout | null>(null)
   const lastPlayedSubtitleIdRef = useRef<number | null>(null)
 
+  // Time index over the subtitles, rebuilt only when the list changes
+  const subtitleIndex = useMemo(() => SubtitleIndex.fromSubtitles(subtitles), [subtitles])
+
   // Find current subtitle based on video time
   useEffect(() => {
-    const subtitle = subtitles.find(
-      sub => currentTime >= sub.start && currentTime <= sub.end
-    )
-    setCurrentSubtitle(subtitle || null)
-  }, [currentTime, subtitles])
+    setCurrentSubtitle(subtitleIndex.at(currentTime))
+  }, [currentTime, subtitleIndex])
 
   // Play TTS audio when subtitle changes (if TTS enabled)
   useEffect(() => {
@@ -61,20 +63,13 @@ export default function VideoPlayer({
       return
     }
 
-    const subtitleId = currentSubtitle.id
-    const audioFilePath = currentSubtitle.audioFile
-
-    // Load and play TTS audio through IPC
-    const loadTts = async () => {
-      const audioDataUrl = await window.electron?.readAudioFile(audioFilePath)
-      if (!audioDataUrl) return
-      
-      setTtsAudioSrc(audioDataUrl)
-      setPlayingTtsId(subtitleId)
-      lastPlayedSubtitleIdRef.current = subtitleId
-    }
+    // The audio element fetches just this clip's bytes from the packed track
+    const clipUrl = ttsClipUrl(currentSubtitle)
+    if (!clipUrl) return
 
-    loadTts()
+    setTtsAudioSrc(clipUrl)
+    setPlayingTtsId(currentSubtitle.id)
+    lastPlayedSubtitleIdRef.current = currentSubtitle.id
   }, [currentSubtitle, ttsEnabled, playingTtsId, isPlaying])
 
   // Handle TTS audio element events
@@ -219,6 +214,10 @@ export default function VideoPlayer({
     if (videoRef.current) {
       videoRef.current.currentTime = time
       setCurrentTime(time)
+      // Let processing catch up with the new position first
+      if (isProcessing) {
+        window.electron?.seekTo(time)
+      }
       // Stop current TTS on seek
       if (ttsAudioRef.current && ttsAudioSrc) {
         ttsAudioRef.current.pause()
@@ -227,7 +226,7 @@ export default function VideoPlayer({
       }
       lastPlayedSubtitleIdRef.current = null
     }
-  }, [ttsAudioSrc])
+  }, [ttsAudioSrc, isProcessing])
 
   const handleVolumeChange = useCallback((newVolume: number) => {
     if (videoRef.current) {
@@ -1,5 +1,9 @@
 import { useState, useCallback, useRef } from 'react'
 import type { Subtitle, ProcessingStatus } from '../App'
+import { SubtitleIndex } from '../lib/subtitleIndex'
+
+// Incoming subtitles are applied to state at most this often
+const FLUSH_INTERVAL_MS = 250
 
 const initialStatus: ProcessingStatus = {
   stage: 'idle',
@@ -7,13 +11,72 @@ const initialStatus: ProcessingStatus = {
   message: ''
 }
 
+// Merge a batch into a list ordered by start time (seekable jobs arrive out of order)
+function mergeByStart(subtitles: Subtitle[], batch: Subtitle[]): Subtitle[] {
+  const incoming = [...batch].sort((a, b) => a.start - b.start)
+  if (subtitles.length === 0 || incoming[0].start >= subtitles[subtitles.length - 1].start) {
+    return subtitles.concat(incoming)
+  }
+
+  const merged: Subtitle[] = []
+  let i = 0
+  let j = 0
+  while (i < subtitles.length || j < incoming.length) {
+    if (j >= incoming.length || (i < subtitles.length && subtitles[i].start <= incoming[j].start)) {
+      merged.push(subtitles[i++])
+    } else {
+      merged.push(incoming[j++])
+    }
+  }
+  return merged
+}
+
 export function useSubtitles() {
   const [subtitles, setSubtitles] = useState<Subtitle[]>([])
   const [processingStatus, setProcessingStatus] = useState<ProcessingStatus>(initialStatus)
   const [isStreaming, setIsStreaming] = useState(false)
   const subtitlesRef = useRef<Subtitle[]>([])
+  const pendingRef = useRef<Subtitle[]>([])
+  const updatesRef = useRef(new Map<number, Subtitle>())
+  const flushTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null)
+  // Bumped by every processVideo/clearSubtitles call; a run that has been
+  // replaced (its job is cancelled) leaves state and listeners alone
+  const runRef = useRef(0)
+
+  // Apply everything received since the last flush in one state update, so
+  // long videos cost one array copy per interval instead of one per subtitle
+  const flush = useCallback(() => {
+    flushTimerRef.current = null
+    let next = subtitlesRef.current
+
+    if (pendingRef.current.length > 0) {
+      next = mergeByStart(next, pendingRef.current)
+      pendingRef.current = []
+    }
+    if (updatesRef.current.size > 0) {
+      const updates = updatesRef.current
+      next = next.map(existing => updates.get(existing.id) ?? existing)
+      updatesRef.current = new Map()
+    }
+
+    if (next !== subtitlesRef.current) {
+      subtitlesRef.current = next
+      setSubtitles(next)
+    }
+  }, [])
 
-  const processVideo = useCallback(async (videoPath: string, enableTts: boolean = false) => {
+  const scheduleFlush = useCallback(() => {
+    if (flushTimerRef.current === null) {
+      flushTimerRef.current = setTimeout(flush, FLUSH_INTERVAL_MS)
+    }
+  }, [flush])
+
+  const processVideo = useCallback(async (
+    videoPath: string,
+    enableTts: boolean = false,
+    progressive: boolean = false,
+    seekable: boolean = false
+  ) => {
     if (!window.electron) {
       console.error('Electron API not available')
       setProcessingStatus({
@@ -24,8 +87,17 @@ export function useSubtitles() {
       return
     }
 
+    const run = ++runRef.current
+    const isCurrent = () => runRef.current === run
+
     try {
+      // Listeners of a replaced run would deliver into this one
+      window.electron.removeProcessingListener()
+      window.electron.removeSubtitleListener()
+
       // Reset state
+      pendingRef.current = []
+      updatesRef.current = new Map()
       subtitlesRef.current = []
       setSubtitles([])
       setIsStreaming(true)
@@ -39,10 +111,26 @@ export function useSubtitles() {
         })
       })
 
-      // Set up streaming subtitle listener - add subtitles as they arrive
+      // Set up streaming subtitle listener - subtitles are added in batches
       window.electron.onSubtitleReady((subtitle) => {
-        subtitlesRef.current = [...subtitlesRef.current, subtitle]
-        setSubtitles([...subtitlesRef.current])
+        pendingRef.current.push(subtitle)
+        // Show the first subtitle without waiting for the interval
+        if (subtitlesRef.current.length === 0) {
+          flush()
+        } else {
+          scheduleFlush()
+        }
+      })
+
+      // Progressive mode: refined subtitles replace drafts with the same id
+      window.electron.onSubtitleUpdate((subtitle) => {
+        const pendingIndex = pendingRef.current.findIndex(existing => existing.id === subtitle.id)
+        if (pendingIndex >= 0) {
+          pendingRef.current[pendingIndex] = subtitle
+        } else {
+          updatesRef.current.set(subtitle.id, subtitle)
+        }
+        scheduleFlush()
       })
 
       // Start processing
@@ -53,7 +141,25 @@ export function useSubtitles() {
       })
 
       // Process with TTS option
-      await window.electron.processVideo(videoPath, enableTts)
+      const { indexPath } = await window.electron.processVideo(videoPath, enableTts, progressive, seekable)
+      if (!isCurrent()) {
+        return
+      }
+
+      // The final index is authoritative (ordered, with refined versions)
+      if (indexPath) {
+        const buffer = await window.electron.readSubtitleIndex(indexPath)
+        if (buffer && isCurrent()) {
+          if (flushTimerRef.current !== null) {
+            clearTimeout(flushTimerRef.current)
+            flushTimerRef.current = null
+          }
+          pendingRef.current = []
+          updatesRef.current = new Map()
+          subtitlesRef.current = SubtitleIndex.fromBuffer(buffer).subtitles
+          setSubtitles(subtitlesRef.current)
+        }
+      }
 
       setProcessingStatus({
         stage: 'done',
@@ -62,6 +168,9 @@ export function useSubtitles() {
       })
 
     } catch (error) {
+      if (!isCurrent()) {
+        return
+      }
       console.error('Processing error:', error)
       setProcessingStatus({
         stage: 'error',
@@ -69,16 +178,36 @@ export function useSubtitles() {
         message: error instanceof Error ? error.message : 'Неизвестная ошибка'
       })
     } finally {
-      setIsStreaming(false)
-      // Clean up listeners
-      if (window.electron) {
-        window.electron.removeProcessingListener()
-        window.electron.removeSubtitleListener()
+      // A replaced run's state and listeners belong to the current one now
+      if (isCurrent()) {
+        // Deliver whatever arrived after the last flush
+        if (flushTimerRef.current !== null) {
+          clearTimeout(flushTimerRef.current)
+        }
+        flush()
+        setIsStreaming(false)
+        // Clean up listeners
+        if (window.electron) {
+          window.electron.removeProcessingListener()
+          window.electron.removeSubtitleListener()
+        }
       }
     }
-  }, [])
+  }, [flush, scheduleFlush])
 
   const clearSubtitles = useCallback(() => {
+    // The running job's messages no longer belong to anything on screen
+    runRef.current++
+    if (window.electron) {
+      window.electron.removeProcessingListener()
+      window.electron.removeSubtitleListener()
+    }
+    if (flushTimerRef.current !== null) {
+      clearTimeout(flushTimerRef.current)
+      flushTimerRef.current = null
+    }
+    pendingRef.current = []
+    updatesRef.current = new Map()
     subtitlesRef.current = []
     setSubtitles([])
     setProcessingStatus(initialStatus)
@@ -0,0 +1,121 @@
+import type { Subtitle } from '../App'
+
+// Binary index written by python/subtitle_index.py (see the layout there)
+const MAGIC = 'SPSI'
+const VERSION = 4
+const HEADER_BYTES = 16
+// start f64, end f64, id i32, audio offset i64, length u32, rate u32,
+// then (offset u32, length u32) of 4 strings
+const RECORD_BYTES = 68
+const STRINGS_OFFSET = 36
+
+// Subtitles ordered by start time with binary-search lookups
+export class SubtitleIndex {
+  private readonly starts: Float64Array
+  private readonly ends: Float64Array
+  private readonly maxDuration: number
+
+  private constructor(readonly subtitles: Subtitle[]) {
+    this.starts = Float64Array.from(subtitles, subtitle => subtitle.start)
+    this.ends = Float64Array.from(subtitles, subtitle => subtitle.end)
+    let maxDuration = 0
+    for (let i = 0; i < subtitles.length; i++) {
+      maxDuration = Math.max(maxDuration, this.ends[i] - this.starts[i])
+    }
+    this.maxDuration = maxDuration
+  }
+
+  static fromSubtitles(subtitles: Subtitle[]): SubtitleIndex {
+    let sorted = true
+    for (let i = 1; i < subtitles.length && sorted; i++) {
+      sorted = subtitles[i - 1].start <= subtitles[i].start
+    }
+    return new SubtitleIndex(sorted ? subtitles : [...subtitles].sort((a, b) => a.start - b.start))
+  }
+
+  static fromBuffer(buffer: ArrayBuffer): SubtitleIndex {
+    const view = new DataView(buffer)
+    const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4))
+    if (magic !== MAGIC || view.getUint32(4, true) !== VERSION) {
+      throw new Error('Not a subtitle index file')
+    }
+
+    const count = view.getUint32(8, true)
+    const blobStart = HEADER_BYTES + count * RECORD_BYTES
+    const decoder = new TextDecoder()
+    // String i of a record: offset and length into the text blob
+    const readString = (record: number, i: number) => {
+      const pos = record + STRINGS_OFFSET + i * 8
+      const offset = view.getUint32(pos, true)
+      const length = view.getUint32(pos + 4, true)
+      return decoder.decode(new Uint8Array(buffer, blobStart + offset, length))
+    }
+
+    const subtitles: Subtitle[] = Array.from({ length: count }, (_, i) => {
+      const record = HEADER_BYTES + i * RECORD_BYTES
+      const subtitle: Subtitle = {
+        id: view.getInt32(record + 16, true),
+        start: view.getFloat64(record, true),
+        end: view.getFloat64(record + 8, true),
+        text: readString(record, 0),
+        translatedText: readString(record, 1),
+        audioFile: readString(record, 2) || null
+      }
+      const language = readString(record, 3)
+      if (language) {
+        subtitle.language = language
+      }
+      // -1: the clip is a whole WAV file, not part of a packed track
+      const audioOffset = Number(view.getBigInt64(record + 20, true))
+      if (audioOffset >= 0) {
+        subtitle.audioOffset = audioOffset
+        subtitle.audioLength = view.getUint32(record + 28, true)
+        subtitle.audioRate = view.getUint32(record + 32, true)
+      }
+      return subtitle
+    })
+    return new SubtitleIndex(subtitles)
+  }
+
+  get length(): number {
+    return this.subtitles.length
+  }
+
+  // First position whose start is greater than (or equal to, with `left`) time
+  private bisect(time: number, left: boolean): number {
+    let low = 0
+    let high = this.starts.length
+    while (low < high) {
+      const mid = (low + high) >> 1
+      if (left ? this.starts[mid] < time : this.starts[mid] <= time) {
+        low = mid + 1
+      } else {
+        high = mid
+      }
+    }
+    return low
+  }
+
+  // Cue shown at `time` (the latest-starting one if cues overlap)
+  at(time: number): Subtitle | null {
+    const earliest = time - this.maxDuration
+    for (let i = this.bisect(time, false) - 1; i >= 0 && this.starts[i] >= earliest; i--) {
+      if (this.ends[i] >= time) {
+        return this.subtitles[i]
+      }
+    }
+    return null
+  }
+
+  // Cues overlapping [start, end), in start order
+  range(start: number, end: number): Subtitle[] {
+    const result: Subtitle[] = []
+    const last = this.bisect(end, true)
+    for (let i = this.bisect(start - this.maxDuration, true); i < last; i++) {
+      if (this.ends[i] > start) {
+        result.push(this.subtitles[i])
+      }
+    }
+    return result
+  }
+}
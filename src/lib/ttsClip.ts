@@ -0,0 +1,16 @@
+import type { Subtitle } from '../App'
+
+// URL of a subtitle's voice-over for the tts:// protocol in electron/main.ts
+export function ttsClipUrl(subtitle: Subtitle): string | null {
+  if (!subtitle.audioFile) {
+    return null
+  }
+
+  const params = new URLSearchParams({ file: subtitle.audioFile })
+  if (subtitle.audioOffset != null) {
+    params.set('offset', String(subtitle.audioOffset))
+    params.set('length', String(subtitle.audioLength ?? 0))
+    params.set('rate', String(subtitle.audioRate ?? 0))
+  }
+  return `tts://clip/?${params}`
+}
@@ -3,12 +3,15 @@
 interface Window {
   electron: {
     openFile: () => Promise<string | null>
-    processVideo: (videoPath: string, enableTts?: boolean) => Promise<SubtitleResult[]>
+    processVideo: (videoPath: string, enableTts?: boolean, progressive?: boolean, seekable?: boolean) => Promise<ProcessVideoResult>
+    readSubtitleIndex: (filePath: string) => Promise<ArrayBuffer | null>
     onProcessingUpdate: (callback: (update: ProcessingUpdate) => void) => void
+    onProcessingMetrics: (callback: (metrics: ProcessingMetrics) => void) => void
     onSubtitleReady: (callback: (subtitle: SubtitleResult) => void) => void
+    onSubtitleUpdate: (callback: (subtitle: SubtitleResult) => void) => void
     removeProcessingListener: () => void
     removeSubtitleListener: () => void
-    readAudioFile: (filePath: string) => Promise<string | null>
+    seekTo: (time: number) => void
   }
 }
 
@@ -18,11 +21,35 @@ interface ProcessingUpdate {
   message: string
 }
 
+interface ProcessVideoResult {
+  indexPath: string | null
+}
+
+interface ProcessingMetrics {
+  elapsed: number
+  cpu: number
+  covered: number
+  rtf: number | null
+  // Process-wide peak (all jobs of a server worker) and its value at job start
+  peak_rss_mb: number | null
+  peak_rss_at_start_mb: number | null
+  stages: Record<string, { calls: number; wall: number; cpu: number; audio_seconds: number; rtf: number | null }>
+  counters: Record<string, number>
+  queues: Record<string, number>
+  final?: boolean
+  first_subtitle?: number | null
+  warmup?: Record<string, number>
+}
+
 interface SubtitleResult {
   id: number
   start: number
   end: number
   text: string
   translatedText: string
+  language?: string
   audioFile?: string | null
+  audioOffset?: number
+  audioLength?: number
+  audioRate?: number
 }